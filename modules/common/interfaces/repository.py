@@ -1,8 +1,9 @@
 """Repository interfaces shared by Module implementations."""
 
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Optional, List, Dict, Any
-from modules.common.models.common import PaginationParams, PaginationResult
+from collections.abc import Mapping
+from typing import Generic, TypeVar, Optional, List, Dict, Any, Sequence, Tuple, Union
+from modules.common.models.common import CursorParams, CursorResult, PaginationParams, PaginationResult
 
 T = TypeVar('T')
 ID = TypeVar('ID')
@@ -27,6 +28,11 @@ class Repository(ABC, Generic[T, ID]):
 class CRUDRepository(Repository[T, ID]):
     """Extended repository contract that adds bulk and pagination helpers."""
     
+    # Default keyset ordering for find_after; must be unique (end with the primary key).
+    cursor_sort: Tuple[str, ...] = ("created_at", "id")
+    # Cursor signing secret; None reads TEMPLATEAI_CURSOR_SECRET.
+    cursor_secret: Optional[Union[str, bytes]] = None
+    
     @abstractmethod
     def find_all(self, filters: Optional[Dict[str, Any]] = None) -> List[T]:
         """Return all entities that match the optional filter criteria."""
@@ -39,6 +45,47 @@ class CRUDRepository(Repository[T, ID]):
     ) -> PaginationResult[T]:
         """Return a paginated result set honoring the provided filters."""
     
+    def find_after(
+        self,
+        cursor: Optional[str],
+        limit: int = 20,
+        filters: Optional[Dict[str, Any]] = None,
+        *,
+        sort: Optional[Sequence[str]] = None,
+        descending: bool = False,
+    ) -> CursorResult[T]:
+        """
+        Return the page after (or, for a "prev" cursor, before) ``cursor`` using
+        keyset pagination over ``sort`` (default `cursor_sort`); None starts at
+        the first page. Cursors are bound to the sort they were issued for.
+        """
+        params = CursorParams(
+            cursor=cursor,
+            limit=limit,
+            sort=tuple(sort or self.cursor_sort),
+            descending=descending,
+            secret=self.cursor_secret,
+        )
+        rows = self.fetch_keyset(params, filters)
+        return CursorResult.from_rows(rows, params, key=lambda entity: self.cursor_key(entity, params.sort))
+    
+    @abstractmethod
+    def fetch_keyset(
+        self,
+        params: CursorParams,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Sequence[T]:
+        """
+        Return up to ``params.get_fetch_limit()`` entities in scan order, e.g. by
+        running the ``(where, args, order_by)`` from `CursorParams.keyset_sql`.
+        """
+    
+    def cursor_key(self, entity: T, sort: Sequence[str]) -> Tuple[Any, ...]:
+        """Return the entity's values for the ``sort`` columns (mapping keys or attributes)."""
+        if isinstance(entity, Mapping):
+            return tuple(entity[column] for column in sort)
+        return tuple(getattr(entity, column) for column in sort)
+    
     @abstractmethod
     def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
         """Return how many entities satisfy the filters."""
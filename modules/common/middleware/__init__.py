@@ -5,8 +5,32 @@
 """
 
 from .auth import require_auth, get_current_user
-from .logging import setup_logging, log_request, log_response
-from .rate_limit import rate_limit, RateLimiter
+from .logging import (
+    setup_logging,
+    shutdown_logging,
+    logging_stats,
+    log_request,
+    log_response,
+    log_event,
+    BoundedQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+)
+from .log_rotation import CompressingRotatingFileHandler
+from .metrics import LatencyHistograms, observe_latency, render_metrics
+from .rate_limit import (
+    rate_limit,
+    RateLimiter,
+    RateLimitExceeded,
+    RateLimitStore,
+    SlidingWindowRateLimiter,
+    GCRARateLimiter,
+    MultiTierRateLimiter,
+    RateLimitDecision,
+    RedisRateLimiter,
+    SharedMemoryRateLimiter,
+    create_limiter,
+)
 
 __all__ = [
     # 
@@ -14,10 +38,30 @@ __all__ = [
     'get_current_user',
     # 
     'setup_logging',
+    'shutdown_logging',
+    'logging_stats',
     'log_request',
     'log_response',
+    'log_event',
+    'BoundedQueueHandler',
+    'JsonFormatter',
+    'SamplingFilter',
+    'CompressingRotatingFileHandler',
+    # 
+    'LatencyHistograms',
+    'observe_latency',
+    'render_metrics',
     # 
     'rate_limit',
     'RateLimiter',
+    'RateLimitExceeded',
+    'RateLimitStore',
+    'SlidingWindowRateLimiter',
+    'GCRARateLimiter',
+    'MultiTierRateLimiter',
+    'RateLimitDecision',
+    'RedisRateLimiter',
+    'SharedMemoryRateLimiter',
+    'create_limiter',
 ]
 
@@ -4,16 +4,32 @@
 
 from __future__ import annotations
 
+import inspect
 import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Union
 
 import jwt
 from jwt import ExpiredSignatureError, InvalidTokenError
 
+from .keyring import KeyRing, UnknownKeyError
+from .permissions import (
+    EMPTY_PERMISSIONS,
+    PermissionSet,
+    RoleRegistry,
+    current_permissions,
+    permission_context,
+    set_current_permissions,
+)
+from .revocation import RevocationList, RevokedTokenError
+
 
 @dataclass
 class AuthConfig:
@@ -22,12 +38,103 @@ class AuthConfig:
     algorithm: str = "HS256"
     token_ttl_seconds: int = 3600
     leeway_seconds: int = 30
+    token_cache_size: int = 10_000
+    token_cache_leeway_seconds: int = 1
+    # 非对称签名（RS256/ES256/EdDSA）时使用，设置后忽略 secret_key
+    keyring: Optional[KeyRing] = None
+    # 基于 jti 的吊销列表；跨 worker 共享时使用 Redis backend
+    revocation: Optional[RevocationList] = None
+    # 角色定义（含继承与通配符），用于预编译权限集合
+    roles: Optional[RoleRegistry] = None
+    # validate_many 的校验线程数；未命中缓存的 token 少于 2 个时不启用线程池
+    verify_workers: int = 4
 
 
 class AuthError(PermissionError):
     """认证失败时抛出的错误。"""
 
 
+class TokenCache:
+    """
+    已校验 token 的有界 LRU 缓存（线程安全）。
+
+    条目在 `exp - leeway_seconds` 时失效，命中时可跳过签名校验与 JSON 解析。
+    条目同时记录签名 key 的 `kid`，便于命中时确认该 key 仍被信任。
+    """
+    
+    def __init__(self, max_entries: int = 10_000, leeway_seconds: int = 1):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.leeway_seconds = leeway_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, token: str, default: Any = None) -> Any:
+        """返回未过期的 payload，否则返回 default。"""
+        entry = self.get_entry(token)
+        return default if entry is None else entry[0]
+    
+    def get_entry(self, token: str) -> Optional[tuple]:
+        """返回未过期条目的 `(payload, kid)`，否则返回 None。"""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1], entry[2]
+    
+    def put(self, token: str, payload: Dict[str, Any], kid: Optional[str] = None):
+        """缓存 payload 及签名 key 的 `kid`；没有 `exp` 或即将过期的 token 不缓存。"""
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        expires_at = exp - self.leeway_seconds
+        if expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[token] = (expires_at, payload, kid)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def pop(self, token: str, default: Any = None) -> Any:
+        """移除并返回缓存的 payload。"""
+        with self._lock:
+            entry = self._entries.pop(token, None)
+        return default if entry is None else entry[1]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, int]:
+        """返回命中/未命中/淘汰计数与当前大小。"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
 class AuthMiddleware:
     """
     负责签发/校验 JWT，同时提供权限检查等工具。
@@ -35,11 +142,16 @@ class AuthMiddleware:
     
     def __init__(self, config: Optional[AuthConfig] = None):
         self.config = config or AuthConfig()
-        if not self.config.secret_key:
+        if self.config.keyring is None and not self.config.secret_key:
             raise ValueError("Auth secret key cannot be empty")
         self.last_validated: Optional[str] = None
-        self.permissions: List[str] = []
-        self.token_cache: Dict[str, Dict[str, Any]] = {}
+        self.roles = self.config.roles or RoleRegistry()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.token_cache = TokenCache(
+            max_entries=self.config.token_cache_size,
+            leeway_seconds=self.config.token_cache_leeway_seconds,
+        )
     
     # --- Token helpers -------------------------------------------------
     def issue_token(
@@ -62,23 +174,87 @@ class AuthMiddleware:
             "exp": int((now + timedelta(seconds=ttl_seconds or self.config.token_ttl_seconds)).timestamp()),
             "jti": secrets.token_hex(8),
         }
-        token = jwt.encode(payload, self.config.secret_key, algorithm=self.config.algorithm)
+        keyring = self.config.keyring
+        kid = None
+        if keyring is not None:
+            signing = keyring.signing_key()
+            kid = signing.kid
+            token = jwt.encode(
+                payload,
+                signing.private_key,
+                algorithm=signing.algorithm,
+                headers={"kid": kid},
+            )
+        else:
+            token = jwt.encode(payload, self.config.secret_key, algorithm=self.config.algorithm)
         bearer = f"Bearer {token}"
-        self.token_cache[bearer] = payload
+        self.token_cache.put(bearer, payload, kid)
         return bearer
     
     def _decode_token(self, token: str) -> Dict[str, Any]:
-        """内部解码函数，统一处理异常。"""
+        """内部解码函数，统一处理异常；优先命中已校验缓存。"""
+        payload = self._cached_payload(token)
+        if payload is None:
+            payload = self._verify_token(token)
+        return self._ensure_not_revoked(payload)
+    
+    def _cached_payload(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        返回缓存的 payload；若签名 key 已被 retire/prune（超过 cut-off），
+        丢弃条目并返回 None，让调用方走完整校验（从而拒绝该 token）。
+        """
+        entry = self.token_cache.get_entry(token)
+        if entry is None:
+            return None
+        payload, kid = entry
+        keyring = self.config.keyring
+        if keyring is not None:
+            try:
+                keyring.verification_key(kid)
+            except UnknownKeyError:
+                self.token_cache.pop(token)
+                return None
+        return payload
+    
+    def _ensure_not_revoked(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        revocation = self.config.revocation
+        jti = payload.get("jti")
+        if revocation is not None and jti and revocation.is_revoked(jti):
+            raise RevokedTokenError("Token has been revoked")
+        return payload
+    
+    def _try_verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """供线程池调用：校验未缓存的 token，失败返回 None。"""
+        try:
+            return self._ensure_not_revoked(self._verify_token(token))
+        except (InvalidTokenError, AuthError):
+            return None
+    
+    def _verify_token(self, token: str, cache: bool = True) -> Dict[str, Any]:
+        """校验签名与声明；`cache` 为 True 时写入已校验缓存。"""
         if not token.startswith("Bearer "):
             raise AuthError("Authorization header must start with 'Bearer '")
         raw = token.split(" ", 1)[1]
-        return jwt.decode(
+        key, algorithm, kid = self._verification_key(raw)
+        payload = jwt.decode(
             raw,
-            self.config.secret_key,
-            algorithms=[self.config.algorithm],
+            key,
+            algorithms=[algorithm],
             options={"require": ["exp", "sub"]},
             leeway=self.config.leeway_seconds,
         )
+        if cache:
+            self.token_cache.put(token, payload, kid)
+        return payload
+    
+    def _verification_key(self, raw: str):
+        """根据 token header 的 `kid` 从 key ring 取缓存的公钥；未配置时用共享密钥。"""
+        keyring = self.config.keyring
+        if keyring is None:
+            return self.config.secret_key, self.config.algorithm, None
+        header = jwt.get_unverified_header(raw)
+        key = keyring.verification_key(header.get("kid"))
+        return key.public_key, key.algorithm, key.kid
     
     # --- Public APIs ---------------------------------------------------
     def validate_token(self, token: str) -> bool:
@@ -87,14 +263,63 @@ class AuthMiddleware:
             return False
         
         try:
-            payload = self._decode_token(token)
+            self._decode_token(token)
         except (ExpiredSignatureError, InvalidTokenError, AuthError):
             return False
         
         self.last_validated = token
-        self.token_cache[token] = payload
         return True
     
+    def validate_many(self, tokens: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量校验：相同 token 只处理一次，命中缓存的直接返回，其余在线程池中校验。
+        返回 {token: payload 或 None（无效）}。
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        misses: List[str] = []
+        for token in dict.fromkeys(tokens):
+            if not token:
+                results[token] = None
+                continue
+            cached = self._cached_payload(token)
+            if cached is None:
+                misses.append(token)
+                continue
+            try:
+                results[token] = self._ensure_not_revoked(cached)
+            except RevokedTokenError:
+                results[token] = None
+        
+        if len(misses) > 1 and self.config.verify_workers > 1:
+            results.update(zip(misses, self._verify_pool().map(self._try_verify, misses)))
+        else:
+            for token in misses:
+                results[token] = self._try_verify(token)
+        return results
+    
+    def _verify_pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.config.verify_workers,
+                        thread_name_prefix="auth-verify",
+                    )
+        return self._executor
+    
+    def close(self, wait: bool = True):
+        """关闭 validate_many 的校验线程池；之后再调用 validate_many 会重新创建。"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    
+    def __enter__(self) -> "AuthMiddleware":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
     def extract_user(self, token: str) -> Optional[Dict[str, Any]]:
         """解析用户信息。"""
         if not token:
@@ -108,29 +333,43 @@ class AuthMiddleware:
         user_id = payload.get("sub") or payload.get("user_id")
         if not user_id:
             return None
-        user = {
+        return {
             "user_id": user_id,
             "username": payload.get("username"),
             "permissions": payload.get("permissions", []),
             "role": payload.get("role"),
         }
-        self.token_cache[token] = payload
-        return user
     
-    def set_permissions(self, permissions: List[str]):
-        """设置当前上下文的权限集合。"""
-        self.permissions = permissions
+    def compile_permissions(self, role: Optional[str], permissions: List[str]) -> PermissionSet:
+        """将角色（含继承）与显式权限编译为不可变集合；相同组合复用同一对象。"""
+        return self.roles.compile(role, permissions)
+    
+    @property
+    def permissions(self) -> List[str]:
+        """当前请求上下文（contextvars）中的权限列表。"""
+        return list(current_permissions())
+    
+    @permissions.setter
+    def permissions(self, permissions: List[str]):
+        self.set_permissions(permissions)
+    
+    def set_permissions(self, permissions: Union[List[str], PermissionSet]):
+        """设置当前上下文的权限集合；存放在 contextvars 中，不同请求/协程互不影响。"""
+        if not isinstance(permissions, PermissionSet):
+            permissions = self.compile_permissions(None, permissions)
+        return set_current_permissions(permissions)
     
     def check_permission(self, permission: str) -> bool:
-        """权限检查。"""
-        return permission in self.permissions
+        """权限检查（支持 `ns:*` 与 `*` 通配符）。"""
+        return permission in current_permissions()
     
     def refresh_token(self, token: str) -> Optional[str]:
-        """根据旧 token 的 payload 生成一个新的 token。"""
-        payload = self.token_cache.get(token)
-        if payload is None:
-            payload = self.extract_user(token)
-        if payload is None:
+        """根据旧 token 的 payload 生成一个新的 token；已过期、无效或已吊销的 token 返回 None。"""
+        if not token:
+            return None
+        try:
+            payload = self._decode_token(token)
+        except (InvalidTokenError, AuthError):
             return None
         
         user_id = payload.get("sub") or payload.get("user_id")
@@ -144,10 +383,20 @@ class AuthMiddleware:
         )
     
     def logout(self, token: str):
-        """移除缓存中的 token 记录。"""
-        self.token_cache.pop(token, None)
+        """移除缓存中的 token 记录；配置了吊销列表时吊销其 jti，使其在所有 worker 上失效。"""
+        payload = self.token_cache.pop(token, None)
+        revocation = self.config.revocation
+        if revocation is not None:
+            if payload is None:
+                # 只为取得 jti/exp 而校验，不写回缓存
+                try:
+                    payload = self._verify_token(token, cache=False)
+                except (InvalidTokenError, AuthError):
+                    payload = None
+            if payload and payload.get("jti") and payload.get("exp"):
+                revocation.revoke(payload["jti"], payload["exp"] + self.config.leeway_seconds)
         self.last_validated = None
-        self.permissions = []
+        self.set_permissions(EMPTY_PERMISSIONS)
 
 
 _default_auth = AuthMiddleware()
@@ -173,20 +422,35 @@ def _resolve_token_from_args(*args, **kwargs) -> Optional[str]:
     return None
 
 
+def _authenticate(args, kwargs) -> PermissionSet:
+    token = _resolve_token_from_args(*args, **kwargs)
+    user = get_current_user(token)
+    if user is None:
+        raise AuthError("Unauthorized request")
+    # 避免把 token 透传到业务函数
+    if "token" in kwargs:
+        kwargs.pop("token")
+    kwargs["current_user"] = user
+    # 编译后的权限集合只绑定到上下文，不放进 user 字典（保持其可 JSON 序列化）
+    return _default_auth.compile_permissions(user["role"], user["permissions"])
+
+
 def require_auth(func: Callable) -> Callable:
     """
     装饰器，确保函数执行前已经通过认证，并将 `current_user` 注入 kwargs。
+    同时支持普通函数与协程函数；权限集合在调用期间绑定到当前上下文。
     """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with permission_context(_authenticate(args, kwargs)):
+                return await func(*args, **kwargs)
+        
+        return async_wrapper
+    
     @wraps(func)
     def wrapper(*args, **kwargs):
-        token = _resolve_token_from_args(*args, **kwargs)
-        user = get_current_user(token)
-        if user is None:
-            raise AuthError("Unauthorized request")
-        # 避免把 token 透传到业务函数
-        if "token" in kwargs:
-            kwargs.pop("token")
-        kwargs["current_user"] = user
-        return func(*args, **kwargs)
+        with permission_context(_authenticate(args, kwargs)):
+            return func(*args, **kwargs)
     
     return wrapper
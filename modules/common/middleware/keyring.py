@@ -0,0 +1,178 @@
+"""
+Key ring for asymmetric JWT signing/verification (RS256/ES256/EdDSA).
+
+Keys are parsed once (PEM or JWK) and cached as key objects by `kid`, so
+verification never re-parses key material per request. Retired keys keep
+verifying until their `not_after` cut-off, which allows overlapping rotation.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from jwt import InvalidTokenError, PyJWK
+from jwt.algorithms import get_default_algorithms
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "PS256", "ES256", "ES384", "ES512", "EdDSA")
+
+
+class UnknownKeyError(InvalidTokenError):
+    """Raised when a token's `kid` is missing, unknown or past its cut-off."""
+
+
+@dataclass
+class SigningKey:
+    """A parsed key plus its rotation metadata."""
+    kid: str
+    algorithm: str
+    public_key: Any
+    private_key: Any = None
+    not_after: Optional[float] = None
+
+    def accepts_at(self, now: float) -> bool:
+        """Return True while tokens signed with this key should still verify."""
+        return self.not_after is None or now < self.not_after
+
+    def to_jwk(self) -> Dict[str, Any]:
+        """Return the public half as a JWK dict."""
+        jwk = json.loads(get_default_algorithms()[self.algorithm].to_jwk(self.public_key))
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeyRing:
+    """Thread-safe `kid` -> `SigningKey` map with one active signing key."""
+
+    def __init__(self, keys: Optional[Iterable[SigningKey]] = None):
+        self._keys: Dict[str, SigningKey] = {}
+        self._lock = threading.Lock()
+        self.active_kid: Optional[str] = None
+        for key in keys or []:
+            self.add(key)
+
+    # --- Loading ---------------------------------------------------------
+    def add(self, key: SigningKey, *, activate: bool = False) -> SigningKey:
+        """Register a parsed key; `activate` makes it the signing key."""
+        if key.algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported algorithm for key ring: {key.algorithm}")
+        with self._lock:
+            self._keys[key.kid] = key
+            if activate or (self.active_kid is None and key.private_key is not None):
+                if key.private_key is None:
+                    raise ValueError(f"Key '{key.kid}' has no private key and cannot sign")
+                self.active_kid = key.kid
+        return key
+
+    def add_pem(
+        self,
+        kid: str,
+        pem: Union[str, bytes],
+        algorithm: str,
+        *,
+        not_after: Optional[float] = None,
+        activate: bool = False,
+    ) -> SigningKey:
+        """Parse a public or private PEM key once and register it."""
+        if isinstance(pem, str):
+            pem = pem.encode("utf-8")
+        prepared = get_default_algorithms()[algorithm].prepare_key(pem)
+        private_key = prepared if hasattr(prepared, "public_key") else None
+        public_key = prepared.public_key() if private_key is not None else prepared
+        return self.add(
+            SigningKey(kid, algorithm, public_key, private_key, not_after),
+            activate=activate,
+        )
+
+    def add_jwk(self, jwk: Dict[str, Any], *, not_after: Optional[float] = None) -> SigningKey:
+        """Parse a single JWK dict (requires `kid` and `alg`) and register it."""
+        parsed = PyJWK(jwk)
+        if not parsed.key_id:
+            raise ValueError("JWK entries must carry a 'kid'")
+        prepared = parsed.key
+        private_key = prepared if hasattr(prepared, "public_key") else None
+        public_key = prepared.public_key() if private_key is not None else prepared
+        return self.add(SigningKey(parsed.key_id, parsed.algorithm_name, public_key, private_key, not_after))
+
+    def load_jwks(self, jwks: Dict[str, Any]) -> List[SigningKey]:
+        """Register every key of a JWKS document (`{"keys": [...]}`)."""
+        return [self.add_jwk(jwk) for jwk in jwks.get("keys", [])]
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path], algorithm: str = "RS256") -> "KeyRing":
+        """
+        Build a key ring from a JWKS/JWK JSON file, a PEM file or a directory of them.
+
+        PEM files use their stem as `kid` and `algorithm` as algorithm.
+        """
+        ring = cls()
+        path = Path(path)
+        files = sorted(path.iterdir()) if path.is_dir() else [path]
+        for file in files:
+            if file.suffix == ".json":
+                document = json.loads(file.read_text(encoding="utf-8"))
+                if "keys" in document:
+                    ring.load_jwks(document)
+                else:
+                    ring.add_jwk(document)
+            elif file.suffix in (".pem", ".key", ".pub"):
+                ring.add_pem(file.stem, file.read_bytes(), algorithm)
+        return ring
+
+    # --- Rotation --------------------------------------------------------
+    def retire(self, kid: str, accept_until: Optional[float] = None):
+        """Stop signing with `kid`; tokens it signed verify until `accept_until` (epoch)."""
+        with self._lock:
+            key = self._keys[kid]
+            key.not_after = time.time() if accept_until is None else accept_until
+            if self.active_kid == kid:
+                self.active_kid = None
+
+    def rotate(self, new_key: SigningKey, grace_seconds: float = 3600) -> SigningKey:
+        """Activate `new_key` and keep the previous signing key valid for `grace_seconds`."""
+        previous = self.active_kid
+        self.add(new_key, activate=True)
+        if previous and previous != new_key.kid:
+            self.retire(previous, time.time() + grace_seconds)
+        return new_key
+
+    def prune(self) -> List[str]:
+        """Drop keys whose cut-off has passed; returns their kids."""
+        now = time.time()
+        with self._lock:
+            expired = [kid for kid, key in self._keys.items() if not key.accepts_at(now)]
+            for kid in expired:
+                del self._keys[kid]
+        return expired
+
+    # --- Lookup ----------------------------------------------------------
+    def signing_key(self) -> SigningKey:
+        """Return the active key used by `issue_token`."""
+        kid = self.active_kid
+        if kid is None:
+            raise ValueError("Key ring has no active signing key")
+        return self._keys[kid]
+
+    def verification_key(self, kid: Optional[str]) -> SigningKey:
+        """Return the cached key for `kid`, enforcing its rotation cut-off."""
+        key = self._keys.get(kid) if kid else None
+        if key is None:
+            raise UnknownKeyError(f"Unknown signing key id: {kid!r}")
+        if not key.accepts_at(time.time()):
+            raise UnknownKeyError(f"Signing key '{kid}' is retired")
+        return key
+
+    def to_jwks(self) -> Dict[str, Any]:
+        """Export public keys that still verify as a JWKS document."""
+        now = time.time()
+        return {"keys": [key.to_jwk() for key in list(self._keys.values()) if key.accepts_at(now)]}
+
+    def __contains__(self, kid: str) -> bool:
+        return kid in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,184 @@
+"""
+Size/time based log rotation with background compression.
+
+Rolling over only closes, renames and reopens the log file on the logging
+thread. Compressing the rotated file (zstd when `zstandard` is installed,
+otherwise gzip) and deleting old files happen on a background thread.
+Retention is a byte budget for all rotated files together rather than a
+file count, so compressed history uses the disk space it actually needs.
+"""
+
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = ("auto", "gzip", "zstd", "none")
+
+_INTERVALS = {"S": 1, "M": 60, "H": 3600, "D": 86_400}
+
+
+class CompressingRotatingFileHandler(logging.FileHandler):
+    """
+    File handler that rotates at ``max_bytes`` and/or on a schedule.
+
+    ``when`` is ``"S"``, ``"M"``, ``"H"`` or ``"D"`` (every ``interval`` units)
+    or ``"midnight"``. Rotated files are named ``<file>.<YYYYmmdd-HHMMSS>``
+    and get a ``.gz``/``.zst`` suffix once compressed. The oldest rotated
+    files are deleted while their total size exceeds ``retention_bytes``.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: Optional[int] = 10 * 1024 * 1024,
+        when: Optional[str] = None,
+        interval: int = 1,
+        retention_bytes: Optional[int] = 100 * 1024 * 1024,
+        compression: str = "auto",
+        encoding: Optional[str] = "utf-8",
+    ):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}, got {compression!r}")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("compression='zstd' requires the zstandard package")
+        if when is not None and when != "midnight" and when.upper() not in _INTERVALS:
+            raise ValueError(f"Unsupported rotation schedule: {when!r}")
+        filename = os.path.abspath(os.fspath(filename))
+        super().__init__(filename, mode="a", encoding=encoding)
+        self.max_bytes = max_bytes
+        self.when = when if when == "midnight" or when is None else when.upper()
+        self.interval = interval
+        self.retention_bytes = retention_bytes
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "gzip"
+        self.compression = compression
+        self._size = os.path.getsize(filename) if os.path.exists(filename) else 0
+        self.rollover_at = self._next_rollover(time.time())
+        self._pending: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="log-compressor", daemon=True)
+        self._worker.start()
+
+    # --- Rotation (logging thread) -----------------------------------------
+    def _next_rollover(self, now: float) -> Optional[float]:
+        if self.when is None:
+            return None
+        if self.when == "midnight":
+            local = time.localtime(now)
+            midnight = time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+            return midnight
+        return now + _INTERVALS[self.when] * self.interval
+
+    def emit(self, record: logging.LogRecord):
+        # Format once, then decide on rollover using the encoded line length.
+        try:
+            message = self.format(record) + self.terminator
+            size = len(message.encode(self.encoding or "utf-8"))
+            if self._should_rollover(size):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self.flush()
+            self._size += size
+        except Exception:
+            self.handleError(record)
+
+    def _should_rollover(self, incoming: int) -> bool:
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return bool(self.max_bytes) and self._size > 0 and self._size + incoming > self.max_bytes
+
+    def doRollover(self):
+        """Rename the current file and hand it to the compressor thread."""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+            stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+            target = f"{self.baseFilename}.{stamp}"
+            counter = 1
+            while any(os.path.exists(target + suffix) for suffix in ("", ".gz", ".zst")):
+                target = f"{self.baseFilename}.{stamp}-{counter}"
+                counter += 1
+            os.replace(self.baseFilename, target)
+            self._pending.put(target)
+        self.stream = self._open()
+        self._size = 0
+        self.rollover_at = self._next_rollover(now)
+
+    # --- Compression and retention (background thread) ---------------------
+    def _run(self):
+        while True:
+            path = self._pending.get()
+            try:
+                if path is None:
+                    return
+                self._compress(path)
+                self._enforce_retention()
+            except Exception as exc:  # keep serving later rotations
+                logger.warning("Log rotation housekeeping failed for %s: %s", path, exc)
+            finally:
+                self._pending.task_done()
+
+    def _compress(self, path: str):
+        if self.compression == "none":
+            return
+        suffix = ".zst" if self.compression == "zstd" else ".gz"
+        temporary = path + suffix + ".tmp"
+        with open(path, "rb") as source:
+            if self.compression == "zstd":
+                with open(temporary, "wb") as target:
+                    zstandard.ZstdCompressor().copy_stream(source, target)
+            else:
+                with gzip.open(temporary, "wb") as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+        os.replace(temporary, path + suffix)
+        os.remove(path)
+
+    def rotated_files(self) -> List[Path]:
+        """Rotated files (compressed or not), oldest first."""
+        base = Path(self.baseFilename)
+        prefix = base.name + "."
+        files = [
+            entry for entry in base.parent.iterdir()
+            if entry.name.startswith(prefix)
+            and entry.name[len(prefix):len(prefix) + 1].isdigit()
+            and not entry.name.endswith(".tmp")
+        ]
+        return sorted(files, key=lambda entry: (entry.stat().st_mtime, entry.name))
+
+    def _enforce_retention(self):
+        if self.retention_bytes is None:
+            return
+        files = self.rotated_files()
+        total = sum(entry.stat().st_size for entry in files)
+        for entry in files:
+            if total <= self.retention_bytes:
+                break
+            total -= entry.stat().st_size
+            entry.unlink()
+
+    def wait_idle(self):
+        """Block until queued compressions have finished."""
+        self._pending.join()
+
+    def close(self):
+        """Finish pending compressions, then close the file."""
+        if self._worker.is_alive():
+            self._pending.put(None)
+            self._worker.join()
+        super().close()
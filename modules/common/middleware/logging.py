@@ -1,17 +1,323 @@
 """Logging helpers for consistent request/response instrumentation."""
 
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys
-from typing import Optional, Dict, Any
-from datetime import datetime, timezone
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
+
+from .log_rotation import CompressingRotatingFileHandler
+from .metrics import observe_latency
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+OVERFLOW_POLICIES = ("drop", "block", "sample")
+
+
+def _json_dumps(document: Dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(document, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:  # e.g. integers wider than 64 bits
+            pass
+    return json.dumps(document, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Serialize each record once into a single, properly escaped JSON line.
+    
+    Keys match the fields expected by the Fluentd/Logstash pipeline
+    (``timestamp``, ``level``, ``logger``, ``message``, ``module``,
+    ``function``, ``line``); a ``fields`` dict passed through ``extra`` is
+    merged in at the top level. Uses orjson when it is installed.
+    """
+    
+    def __init__(self, datefmt: Optional[str] = None, static_fields: Optional[Dict[str, Any]] = None):
+        super().__init__(datefmt=datefmt)
+        self.static_fields = dict(static_fields or {})
+        self._second_cache = (None, "")
+    
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        if self.datefmt:
+            return self.formatTime(record, self.datefmt)
+        # Records arrive many per second, so the strftime part is reused.
+        second = int(record.created)
+        cached_second, prefix = self._second_cache
+        if cached_second != second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second_cache = (second, prefix)
+        return f"{prefix}.{int(record.msecs):03d}Z"
+    
+    def format(self, record: logging.LogRecord) -> str:
+        document = {
+            "timestamp": self._timestamp(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        if self.static_fields:
+            document.update(self.static_fields)
+        fields = getattr(record, "fields", None)
+        if fields:
+            document.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            document["exception"] = record.exc_text
+        if record.stack_info:
+            document["stack"] = self.formatStack(record.stack_info)
+        return _json_dumps(document)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Cut log volume on hot paths without losing the signal.
+    
+    - Per-path sampling: records whose ``fields["path"]`` matches ``path_rates``
+      (exact path or ``"/prefix/*"``) are kept with that probability; other
+      paths use ``default_rate``. Records without a path are not sampled.
+    - Records at ``keep_level`` or above and requests slower than ``slow_ms``
+      (``fields["duration_ms"]``) are never sampled out.
+    - Duplicate suppression: each distinct rendered line (plus its status)
+      gets a token bucket of ``burst`` records refilled at
+      ``refill_per_second``. Suppressed repeats are counted and reported as
+      "[N similar messages suppressed]" on the next record that gets through.
+      This also collapses storms of identical errors; pass
+      ``dedup_important=False`` to exempt kept records from suppression.
+    
+    The decision is stored on the record, so attaching one filter to several
+    handlers neither double-counts nor disagrees.
+    """
+    
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        path_rates: Optional[Dict[str, float]] = None,
+        *,
+        keep_level: int = logging.WARNING,
+        slow_ms: Optional[float] = 1000.0,
+        burst: int = 10,
+        refill_per_second: float = 1.0,
+        max_keys: int = 10_000,
+        dedup_important: bool = True,
+        seed: Optional[int] = None,
+    ):
+        super().__init__()
+        self.default_rate = default_rate
+        self.exact_rates: Dict[str, float] = {}
+        self.prefix_rates: List[Tuple[str, float]] = []
+        for path, rate in (path_rates or {}).items():
+            if path.endswith("*"):
+                self.prefix_rates.append((path[:-1], rate))
+            else:
+                self.exact_rates[path] = rate
+        # Longest prefix wins.
+        self.prefix_rates.sort(key=lambda item: len(item[0]), reverse=True)
+        self.keep_level = keep_level
+        self.slow_ms = slow_ms
+        self.burst = burst
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self.dedup_important = dedup_important
+        self._random = random.Random(seed)
+        self._rate_cache: Dict[str, float] = {}
+        self._buckets: "OrderedDict[Tuple, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.sampled_out = 0
+        self.suppressed = 0
+    
+    def rate_for(self, path: Optional[str]) -> float:
+        """Return the keep probability for ``path`` (1.0 when there is no path)."""
+        if path is None:
+            return 1.0
+        rate = self._rate_cache.get(path)
+        if rate is None:
+            rate = self.exact_rates.get(path)
+            if rate is None:
+                rate = next((r for prefix, r in self.prefix_rates if path.startswith(prefix)), self.default_rate)
+            if len(self._rate_cache) >= self.max_keys:
+                self._rate_cache.clear()
+            self._rate_cache[path] = rate
+        return rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        decision = getattr(record, "_sampling_decision", None)
+        if decision is None:
+            decision = self._decide(record)
+            record._sampling_decision = decision
+        return decision
+    
+    def _decide(self, record: logging.LogRecord) -> bool:
+        fields = getattr(record, "fields", None) or {}
+        important = record.levelno >= self.keep_level
+        if not important and self.slow_ms is not None:
+            important = fields.get("duration_ms", 0) >= self.slow_ms
+        if important:
+            if not self.dedup_important:
+                return True
+        else:
+            rate = self.rate_for(fields.get("path"))
+            if rate < 1.0 and self._random.random() >= rate:
+                self.sampled_out += 1
+                return False
+        
+        try:
+            message = record.getMessage()
+        except Exception:  # bad format args: let the handler report it
+            message = str(record.msg)
+        key = (record.name, record.levelno, message, fields.get("status"))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                # [tokens, last refill, suppressed since last emitted record]
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.refill_per_second)
+                bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.suppressed += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+            record.fields = dict(fields, suppressed=suppressed)
+        return True
+    
+    def stats(self) -> Dict[str, int]:
+        """Return how many records were sampled out or suppressed as duplicates."""
+        return {"sampled_out": self.sampled_out, "suppressed": self.suppressed, "keys": len(self._buckets)}
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler over a bounded queue with an explicit overflow policy.
+
+    - ``drop``: discard the record when the queue is full.
+    - ``block``: wait up to ``block_timeout`` seconds for space, then drop.
+    - ``sample``: once the queue is past ``sample_threshold`` of its capacity,
+      keep only one in ``sample_every`` records below WARNING; drop when full.
+    """
+    
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        overflow: str = "drop",
+        *,
+        block_timeout: float = 1.0,
+        sample_every: int = 10,
+        sample_threshold: float = 0.5,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        super().__init__(queue.Queue(maxsize))
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.sample_every = max(1, sample_every)
+        self.sample_mark = int(maxsize * sample_threshold)
+        self._counter_lock = threading.Lock()
+        self._seen = 0
+        self.queued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge args so later mutation of them cannot change the message;
+        # formatting and timestamps are left to the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        if self.overflow == "sample" and record.levelno < logging.WARNING \
+                and self.queue.qsize() >= self.sample_mark:
+            with self._counter_lock:
+                self._seen += 1
+                if self._seen % self.sample_every:
+                    self.sampled_out += 1
+                    return
+        try:
+            if self.overflow == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return
+        with self._counter_lock:
+            self.queued += 1
+    
+    def stats(self) -> Dict[str, int]:
+        """Return queued/dropped/sampled-out totals and the current backlog."""
+        return {
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "pending": self.queue.qsize(),
+            "capacity": self.maxsize,
+        }
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue."""
+    
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+_listener: Optional[_DrainingQueueListener] = None
+_queue_handler: Optional[BoundedQueueHandler] = None
+_atexit_registered = False
 
 
 def setup_logging(
     level: str = "INFO",
     format_string: Optional[str] = None,
-    log_file: Optional[str] = None
+    log_file: Optional[str] = None,
+    *,
+    use_queue: bool = False,
+    queue_size: int = 10_000,
+    overflow: str = "drop",
+    structured: bool = False,
+    sampling: Optional[SamplingFilter] = None,
+    max_bytes: Optional[int] = None,
+    rotate_when: Optional[str] = None,
+    retention_bytes: Optional[int] = None,
 ) -> logging.Logger:
-    """Configure the root logger with optional console/file handlers."""
+    """
+    Configure the root logger with optional console/file handlers.
+    
+    ``structured=True`` writes JSON lines via `JsonFormatter` instead of
+    ``format_string``. With ``use_queue=True`` the root logger only enqueues
+    records; a background QueueListener formats and writes them, so request
+    threads never wait on I/O. ``sampling`` attaches a `SamplingFilter` before
+    any formatting or enqueueing happens. Setting ``max_bytes`` and/or
+    ``rotate_when`` makes ``log_file`` a `CompressingRotatingFileHandler`
+    that compresses rotated files in the background and keeps at most
+    ``retention_bytes`` of them (100MB by default).
+    """
+    global _listener, _queue_handler, _atexit_registered
     if format_string is None:
         format_string = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
@@ -19,25 +325,82 @@ def setup_logging(
     logger.setLevel(getattr(logging, level.upper()))
     
     # 
+    shutdown_logging()
     logger.handlers.clear()
     
     # 
-    formatter = logging.Formatter(format_string)
+    formatter = JsonFormatter() if structured else logging.Formatter(format_string)
+    handlers: List[logging.Handler] = []
     
     # 
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # 
-    if log_file:
+    if log_file and (max_bytes or rotate_when):
+        rotation = {"max_bytes": max_bytes, "when": rotate_when}
+        if retention_bytes is not None:
+            rotation["retention_bytes"] = retention_bytes
+        file_handler = CompressingRotatingFileHandler(log_file, **rotation)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    elif log_file:
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    if not use_queue:
+        for handler in handlers:
+            if sampling is not None:
+                handler.addFilter(sampling)
+            logger.addHandler(handler)
+        return logger
     
+    _queue_handler = BoundedQueueHandler(queue_size, overflow)
+    if sampling is not None:
+        _queue_handler.addFilter(sampling)
+    _listener = _DrainingQueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(_queue_handler)
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
     return logger
 
 
+def shutdown_logging():
+    """Flush pending queued records, stop the listener and close its handlers."""
+    global _listener, _queue_handler
+    listener, handler = _listener, _queue_handler
+    _listener = _queue_handler = None
+    if handler is not None:
+        logging.getLogger().removeHandler(handler)
+    if listener is not None:
+        listener.stop()
+        for target in listener.handlers:
+            target.close()
+
+
+def logging_stats() -> Dict[str, int]:
+    """Return the active queue handler's counters (empty when queue mode is off)."""
+    return _queue_handler.stats() if _queue_handler is not None else {}
+
+
+def log_event(
+    message: str,
+    fields: Optional[Dict[str, Any]] = None,
+    *,
+    level: int = logging.INFO,
+    logger: Optional[logging.Logger] = None
+):
+    """Log ``message`` with structured ``fields``; no work is done when ``level`` is disabled."""
+    if logger is None:
+        logger = logging.getLogger()
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields or {}})
+
+
 def log_request(
     method: str,
     path: str,
@@ -45,14 +408,16 @@ def log_request(
     params: Optional[Dict[str, Any]] = None,
     logger: Optional[logging.Logger] = None
 ):
-    """Log an HTTP-style request line with parameters and timestamp."""
+    """Log an HTTP-style request line; method/path/params are also attached as fields."""
     if logger is None:
         logger = logging.getLogger()
+    if not logger.isEnabledFor(logging.INFO):
+        return
     
+    params = params or {}
     logger.info(
-        f"Request: {method} {path} | "
-        f"Params: {params or {}} | "
-        f"Time: {datetime.now(timezone.utc).isoformat()}"
+        "Request: %s %s | Params: %s", method, path, params,
+        extra={"fields": {"event": "request", "method": method, "path": path, "params": params}},
     )
 
 
@@ -62,15 +427,22 @@ def log_response(
     duration_ms: float,
     logger: Optional[logging.Logger] = None
 ):
-    """Log response information and choose INFO/ERROR level based on status code."""
+    """
+    Log response information and choose INFO/ERROR level based on status code.
+    The duration is always recorded in the latency histograms, even when the
+    log level is disabled.
+    """
+    observe_latency(path, status_code, duration_ms)
     if logger is None:
         logger = logging.getLogger()
     
     level = logging.ERROR if status_code >= 400 else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
     logger.log(
         level,
-        f"Response: {status_code} {path} | "
-        f"Duration: {duration_ms:.2f}ms | "
-        f"Time: {datetime.now(timezone.utc).isoformat()}"
+        "Response: %s %s | Duration: %.2fms", status_code, path, duration_ms,
+        extra={"fields": {
+            "event": "response", "status": status_code, "path": path, "duration_ms": duration_ms,
+        }},
     )
-
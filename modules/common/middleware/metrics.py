@@ -0,0 +1,203 @@
+"""
+In-process request latency histograms with Prometheus text export.
+
+Durations land in log-linear buckets: every power of two between ``min_ms``
+and ``max_ms`` is split into ``sub_buckets`` equal steps, which bounds the
+relative error of any quantile by ``1 / sub_buckets`` with a small fixed
+number of counters per series. Each thread records into its own shard, so
+`observe` never takes a lock; shards are merged only when a snapshot or an
+export is requested. When a thread exits its shard is folded into a shared
+aggregate, so thread-per-request servers do not accumulate shards.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import weakref
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+SeriesKey = Tuple[str, int]
+
+OTHER_PATH = "__other__"
+
+
+class _Shard:
+    """Counters owned (and only written) by one thread."""
+
+    __slots__ = ("series",)
+
+    def __init__(self):
+        # (path, status) -> [bucket counts..., sum_ms]
+        self.series: Dict[SeriesKey, List[float]] = {}
+
+
+class _ShardOwner:
+    """Referenced only from the owning thread's locals; collected when the thread exits."""
+
+    __slots__ = ("__weakref__",)
+
+
+class LatencyHistograms:
+    """Per-path, per-status log-linear latency histograms."""
+
+    def __init__(
+        self,
+        min_ms: float = 0.1,
+        max_ms: float = 60_000.0,
+        sub_buckets: int = 4,
+        max_series: int = 1_000,
+    ):
+        if min_ms <= 0 or max_ms <= min_ms or sub_buckets < 1:
+            raise ValueError("require 0 < min_ms < max_ms and sub_buckets >= 1")
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.sub_buckets = sub_buckets
+        self.max_series = max_series
+        powers = math.ceil(math.log2(max_ms / min_ms))
+        # Bucket 0 holds values <= min_ms; the last bucket is the +Inf overflow.
+        self.bounds_ms: List[float] = [min_ms] + [
+            min_ms * 2 ** power * (1 + step / sub_buckets)
+            for power in range(powers)
+            for step in range(1, sub_buckets + 1)
+        ]
+        self.bucket_count = len(self.bounds_ms) + 1
+        self._paths: Dict[str, None] = {}
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._retired: Dict[SeriesKey, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def bucket_index(self, duration_ms: float) -> int:
+        """Return the bucket holding ``duration_ms`` (upper bounds are inclusive, like ``le``)."""
+        return bisect_left(self.bounds_ms, duration_ms)
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            owner = self._local.owner = _ShardOwner()
+            weakref.finalize(owner, self._retire, shard).atexit = False
+            self._shards.append(shard)  # list.append is atomic; no lock needed
+        return shard
+
+    def _retire(self, shard: _Shard):
+        """Fold a finished thread's shard into the shared aggregate."""
+        with self._lock:
+            _merge_into(self._retired, shard.series)
+            try:
+                self._shards.remove(shard)
+            except ValueError:
+                pass
+
+    def observe(self, path: str, status: int, duration_ms: float):
+        """Record one request without taking a lock."""
+        if path not in self._paths:
+            # Cap label cardinality: unknown paths beyond the limit share one series.
+            if len(self._paths) >= self.max_series:
+                path = OTHER_PATH
+            else:
+                self._paths[path] = None
+        key = (path, status)
+        series = self._shard().series
+        counts = series.get(key)
+        if counts is None:
+            counts = series[key] = [0] * self.bucket_count + [0.0]
+        counts[bisect_left(self.bounds_ms, duration_ms)] += 1
+        counts[-1] += duration_ms
+
+    def snapshot(self) -> Dict[SeriesKey, List[float]]:
+        """Merge every shard into ``{(path, status): [bucket counts..., sum_ms]}``."""
+        with self._lock:
+            shards = list(self._shards)
+            merged = {key: list(counts) for key, counts in self._retired.items()}
+        for shard in shards:
+            _merge_into(merged, dict(shard.series))
+        return merged
+
+    def quantile(self, q: float, path: Optional[str] = None, status: Optional[int] = None) -> Optional[float]:
+        """
+        Estimate the ``q`` quantile in ms (the upper bound of the bucket holding it)
+        across series matching ``path``/``status``; None without observations.
+        """
+        totals = [0] * self.bucket_count
+        for (series_path, series_status), counts in self.snapshot().items():
+            if (path is None or series_path == path) and (status is None or series_status == status):
+                for index in range(self.bucket_count):
+                    totals[index] += counts[index]
+        count = sum(totals)
+        if not count:
+            return None
+        rank = q * count
+        running = 0
+        for index, bucket in enumerate(totals):
+            running += bucket
+            if running >= rank and bucket:
+                return self.bounds_ms[index] if index < len(self.bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def render_prometheus(self, name: str = "http_request_duration_seconds") -> str:
+        """
+        Export as Prometheus text: a ``<name>`` histogram (seconds) plus an
+        ``http_requests_total`` counter, both labelled by ``path`` and ``status``.
+        """
+        snapshot = sorted(self.snapshot().items())
+        bounds = [_format_float(bound / 1000) for bound in self.bounds_ms] + ["+Inf"]
+        lines = [
+            f"# HELP {name} Request latency in seconds.",
+            f"# TYPE {name} histogram",
+        ]
+        totals = []
+        for (path, status), counts in snapshot:
+            labels = f'path="{_escape(path)}",status="{status}"'
+            cumulative = 0
+            for bound, bucket in zip(bounds, counts):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {_format_float(counts[-1] / 1000)}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+            totals.append((labels, cumulative))
+        lines.append("# HELP http_requests_total Requests handled.")
+        lines.append("# TYPE http_requests_total counter")
+        lines.extend(f"http_requests_total{{{labels}}} {count}" for labels, count in totals)
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all observations (tests and process forks)."""
+        with self._lock:
+            self._retired.clear()
+            for shard in list(self._shards):
+                shard.series.clear()
+            self._paths.clear()
+
+
+def _merge_into(target: Dict[SeriesKey, List[float]], source: Dict[SeriesKey, List[float]]):
+    for key, counts in list(source.items()):
+        existing = target.get(key)
+        if existing is None:
+            target[key] = list(counts)
+        else:
+            for index, value in enumerate(counts):
+                existing[index] += value
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_float(value: float) -> str:
+    return repr(round(value, 9))
+
+
+default_histograms = LatencyHistograms()
+
+
+def observe_latency(path: str, status: int, duration_ms: float):
+    """Record a request in the process-wide `default_histograms`."""
+    default_histograms.observe(path, status, duration_ms)
+
+
+def render_metrics() -> str:
+    """Prometheus text for the process-wide histograms (serve it at ``/metrics``)."""
+    return default_histograms.render_prometheus()
@@ -0,0 +1,167 @@
+"""
+Precompiled permission sets, role inheritance and per-request permission context.
+
+Permissions are colon-separated names (``posts:edit``). A trailing ``*``
+grants a whole namespace (``posts:*``) and a bare ``*`` grants everything.
+`PermissionSet` turns a permission list into interned frozensets once, so a
+check is a few hash lookups instead of a linear scan with wildcard matching.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+
+class PermissionSet:
+    """Immutable, compiled set of granted permissions."""
+
+    __slots__ = ("exact", "prefixes", "allow_all")
+
+    def __init__(self, permissions: Iterable[str] = ()):
+        exact = set()
+        prefixes = set()
+        allow_all = False
+        for permission in permissions:
+            if permission == "*":
+                allow_all = True
+            elif permission.endswith("*"):
+                prefixes.add(sys.intern(permission[:-1]))
+            else:
+                exact.add(sys.intern(permission))
+        self.exact: FrozenSet[str] = frozenset(exact)
+        self.prefixes: FrozenSet[str] = frozenset(prefixes)
+        self.allow_all = allow_all
+
+    def __contains__(self, permission: str) -> bool:
+        if self.allow_all or permission in self.exact:
+            return True
+        if self.prefixes:
+            # Check each namespace of "a:b:c" ("a:", "a:b:") against the wildcards.
+            end = permission.find(":")
+            while end != -1:
+                if permission[:end + 1] in self.prefixes:
+                    return True
+                end = permission.find(":", end + 1)
+        return False
+
+    def __iter__(self) -> Iterator[str]:
+        if self.allow_all:
+            yield "*"
+        yield from sorted(self.exact)
+        for prefix in sorted(self.prefixes):
+            yield prefix + "*"
+
+    def __len__(self) -> int:
+        return len(self.exact) + len(self.prefixes) + int(self.allow_all)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PermissionSet):
+            return NotImplemented
+        return (self.exact, self.prefixes, self.allow_all) == (other.exact, other.prefixes, other.allow_all)
+
+    def __hash__(self) -> int:
+        return hash((self.exact, self.prefixes, self.allow_all))
+
+    def __repr__(self) -> str:
+        return f"PermissionSet({list(self)!r})"
+
+
+EMPTY_PERMISSIONS = PermissionSet()
+
+
+class RoleRegistry:
+    """
+    Role definitions with inheritance, expanded once at load time.
+
+    Definition format (YAML or JSON)::
+
+        roles:
+          viewer: {permissions: ["posts:read"]}
+          editor: {inherits: [viewer], permissions: ["posts:*"]}
+          admin:  {inherits: [editor], permissions: ["*"]}
+    """
+
+    def __init__(self, roles: Optional[Dict[str, Dict[str, List[str]]]] = None, cache_size: int = 4096):
+        self._definitions = dict(roles or {})
+        self._expanded: Dict[str, Tuple[str, ...]] = {}
+        for role in self._definitions:
+            self._expanded[role] = self._expand(role, ())
+        self.cache_size = cache_size
+        self._compiled: Dict[Tuple[Optional[str], Tuple[str, ...]], PermissionSet] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "RoleRegistry":
+        """Load a role definition file (`.yaml`/`.yml` or `.json`)."""
+        path = Path(path)
+        text = path.read_text(encoding="utf-8")
+        if path.suffix in (".yaml", ".yml"):
+            import yaml
+            document = yaml.safe_load(text) or {}
+        else:
+            document = json.loads(text)
+        return cls(document.get("roles", {}))
+
+    def _expand(self, role: str, trail: Tuple[str, ...]) -> Tuple[str, ...]:
+        if role in trail:
+            raise ValueError(f"Role inheritance cycle: {' -> '.join(trail + (role,))}")
+        if role in self._expanded:
+            return self._expanded[role]
+        definition = self._definitions.get(role)
+        if definition is None:
+            raise ValueError(f"Unknown role: {role}")
+        permissions = list(definition.get("permissions", []))
+        for parent in definition.get("inherits", []):
+            permissions.extend(self._expand(parent, trail + (role,)))
+        return tuple(dict.fromkeys(permissions))
+
+    def role_permissions(self, role: Optional[str]) -> Tuple[str, ...]:
+        """Return the role's permissions including inherited ones (empty for unknown roles)."""
+        return self._expanded.get(role, ()) if role else ()
+
+    def compile(self, role: Optional[str] = None, permissions: Iterable[str] = ()) -> PermissionSet:
+        """Return the (memoized) PermissionSet for a role plus explicit grants."""
+        key = (role, tuple(permissions))
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = PermissionSet(self.role_permissions(role) + key[1])
+            with self._lock:
+                if len(self._compiled) >= self.cache_size:
+                    self._compiled.clear()
+                self._compiled[key] = compiled
+        return compiled
+
+
+_current_permissions: contextvars.ContextVar[PermissionSet] = contextvars.ContextVar(
+    "current_permissions", default=EMPTY_PERMISSIONS,
+)
+
+
+def current_permissions() -> PermissionSet:
+    """Return the permissions bound to the current request context."""
+    return _current_permissions.get()
+
+
+def set_current_permissions(permissions: PermissionSet) -> contextvars.Token:
+    """Bind permissions to the current context; pass the token to `reset_current_permissions`."""
+    return _current_permissions.set(permissions)
+
+
+def reset_current_permissions(token: contextvars.Token):
+    _current_permissions.reset(token)
+
+
+@contextmanager
+def permission_context(permissions: PermissionSet) -> Iterator[PermissionSet]:
+    """Bind permissions for the duration of a `with` block."""
+    token = _current_permissions.set(permissions)
+    try:
+        yield permissions
+    finally:
+        _current_permissions.reset(token)
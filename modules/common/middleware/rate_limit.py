@@ -1,40 +1,712 @@
-"""Simple in-memory rate limiter utilities."""
+"""
+Rate limiting for endpoints and background jobs.
 
+- `RateLimitStore`: bounded, sharded, LRU-swept identifier map shared by
+  the in-process limiters.
+- In-process algorithms: `RateLimiter` (exact sliding log),
+  `SlidingWindowRateLimiter` (weighted two-window counter) and
+  `GCRARateLimiter` (one timestamp per identifier), selected by name through
+  `create_limiter`; `MultiTierRateLimiter` checks several quotas in one pass.
+- Cross-process backends: `SharedMemoryRateLimiter` (GCRA buckets in a
+  `multiprocessing.shared_memory` segment for pre-forked workers) and
+  `RedisRateLimiter` (sliding log in a Redis sorted set with a local
+  fallback when Redis is unreachable).
+- `rate_limit`: decorator for sync and async callables that raises
+  `RateLimitExceeded` or, with ``wait=True``, sleeps until admitted.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import logging
+import math
+import multiprocessing
+import os
+import struct
+import threading
 import time
-from typing import Dict, Tuple, Optional, Callable, Any
-from collections import defaultdict
+import uuid
+from typing import Dict, List, NamedTuple, Tuple, Optional, Callable, Any, Type
+from bisect import bisect_right
+from collections import OrderedDict
 from functools import wraps
+from multiprocessing import shared_memory
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+# Errors that mean Redis could not serve the request (triggers local fallback).
+_REDIS_ERRORS: Tuple[Type[BaseException], ...] = (
+    (redis.RedisError, OSError) if redis is not None else (OSError,)
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitStore:
+    """Bounded, sharded map of identifier -> limiter entry.
+
+    Entries are lists whose first item is the expiry time after which the
+    state is equivalent to a fresh identifier; limiters update entries in
+    place. Lookups never insert, expired entries are dropped lazily plus an
+    amortized sweep from the least-recently-used end of the shard on every
+    insert, and each shard is capped so the number of tracked identifiers
+    never exceeds `max_identifiers` (LRU eviction).
+
+    Each shard also owns a lock (lock striping): limiters hold
+    `lock_for(identifier)` around their read-modify-write so concurrent
+    threads neither over-admit nor corrupt a shard.
+    """
+    
+    def __init__(self, max_identifiers: int = 100_000, shards: int = 16):
+        """Initialize an empty store split into `shards` LRU maps."""
+        if max_identifiers < 1 or shards < 1:
+            raise ValueError("max_identifiers and shards must be positive")
+        shards = min(shards, max_identifiers)
+        self.max_identifiers = max_identifiers
+        self.shard_capacity = max_identifiers // shards
+        self._shards: List["OrderedDict[str, list]"] = [OrderedDict() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        # Counters live per shard so they are only written under that shard's lock.
+        self._evictions = [0] * shards
+        self._expirations = [0] * shards
+    
+    @property
+    def evictions(self) -> int:
+        """Entries dropped because a shard was full."""
+        return sum(self._evictions)
+    
+    @property
+    def expirations(self) -> int:
+        """Entries dropped because their window had passed."""
+        return sum(self._expirations)
+    
+    def lock_for(self, identifier: str) -> threading.Lock:
+        """Return the lock guarding the identifier's shard."""
+        return self._locks[hash(identifier) % len(self._locks)]
+    
+    def get(self, identifier: str, now: float) -> Optional[list]:
+        """Return the live entry for the identifier, or None."""
+        index = hash(identifier) % len(self._shards)
+        shard = self._shards[index]
+        entry = shard.get(identifier)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del shard[identifier]
+            self._expirations[index] += 1
+            return None
+        shard.move_to_end(identifier)
+        return entry
+    
+    def add(self, identifier: str, entry: list, now: float):
+        """Track a new entry, sweeping expired ones and enforcing the cap."""
+        index = hash(identifier) % len(self._shards)
+        shard = self._shards[index]
+        # Amortized sweep: idle entries collect at the LRU end.
+        for _ in range(2):
+            if not shard:
+                break
+            oldest = next(iter(shard.values()))
+            if oldest[0] > now:
+                break
+            shard.popitem(last=False)
+            self._expirations[index] += 1
+        
+        shard[identifier] = entry
+        shard.move_to_end(identifier)
+        if len(shard) > self.shard_capacity:
+            shard.popitem(last=False)
+            self._evictions[index] += 1
+    
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self._shards[hash(identifier) % len(self._shards)]
+    
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+    
+    def clear(self):
+        """Forget every tracked identifier."""
+        for shard in self._shards:
+            shard.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Return size/capacity and eviction counters."""
+        return {
+            "size": len(self),
+            "capacity": self.shard_capacity * len(self._shards),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
 
 
 class RateLimiter:
     """Track requests per identifier within a sliding window."""
     
-    def __init__(self, max_requests: int = 100, window_seconds: int = 60):
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        *,
+        max_identifiers: int = 100_000,
+        shards: int = 16,
+    ):
+        """Initialize a limiter with the given quota and window size."""
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.requests = RateLimitStore(max_identifiers, shards)
+    
+    def is_allowed(self, identifier: str) -> Tuple[bool, int]:
+        """Return (allowed, remaining) for the provided identifier."""
+        with self.requests.lock_for(identifier):
+            now = time.time()
+            
+            # Entry layout: [expires_at, sorted timestamps]
+            entry = self.requests.get(identifier, now)
+            if entry is None:
+                entry = [0.0, []]
+                self.requests.add(identifier, entry, now)
+            timestamps = entry[1]
+            
+            # 
+            stale = bisect_right(timestamps, now - self.window_seconds)
+            if stale:
+                del timestamps[:stale]
+            
+            # 
+            if len(timestamps) >= self.max_requests:
+                return False, 0
+            
+            timestamps.append(now)
+            entry[0] = now + self.window_seconds
+            return True, self.max_requests - len(timestamps)
+    
+    def retry_after(self, identifier: str) -> float:
+        """Return seconds until the identifier may make another request."""
+        with self.requests.lock_for(identifier):
+            now = time.time()
+            entry = self.requests.get(identifier, now)
+            if entry is None:
+                return 0.0
+            timestamps = entry[1]
+            live = len(timestamps) - bisect_right(timestamps, now - self.window_seconds)
+            if live < self.max_requests:
+                return 0.0
+            # The request that has to age out before a slot frees up.
+            return max(0.0, timestamps[-self.max_requests] + self.window_seconds - now)
+
+
+def _sliding_window_retry_after(
+    current: int,
+    previous: int,
+    limit: int,
+    window_start: float,
+    window_seconds: float,
+    now: float,
+) -> float:
+    """Seconds until ``previous * (1 - elapsed) + current + 1 <= limit`` holds."""
+    if current + 1 <= limit:
+        if previous * (1.0 - (now - window_start) / window_seconds) + current + 1 <= limit:
+            return 0.0
+        # Wait until enough of the previous window has slid out.
+        fraction = 1.0 - (limit - current - 1) / previous
+        return max(0.0, window_start + fraction * window_seconds - now)
+    
+    # The current window is full: wait for it to become the previous one
+    # and decay far enough.
+    fraction = max(0.0, 1.0 - (limit - 1) / current)
+    return max(0.0, window_start + (1.0 + fraction) * window_seconds - now)
+
+
+class SlidingWindowRateLimiter:
+    """Approximate sliding window built from the current and previous fixed windows.
+
+    Each identifier keeps ``[expires_at, window_index, current_count,
+    previous_count]`` so memory and work per check are O(1) regardless of
+    ``max_requests``.
+    """
+    
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        *,
+        max_identifiers: int = 100_000,
+        shards: int = 16,
+    ):
+        """Initialize a limiter with the given quota and window size."""
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.counters = RateLimitStore(max_identifiers, shards)
+    
+    def _current(self, identifier: str, now: float) -> Tuple[Optional[list], int]:
+        """Return the identifier's state rolled forward to the current window."""
+        window_index = int(now // self.window_seconds)
+        state = self.counters.get(identifier, now)
+        if state is not None and state[1] != window_index:
+            # Roll the window: the old current count becomes the previous one
+            # only when the windows are adjacent.
+            state[3] = state[2] if state[1] == window_index - 1 else 0
+            state[2] = 0
+            state[1] = window_index
+        return state, window_index
+    
+    def is_allowed(self, identifier: str) -> Tuple[bool, int]:
+        """Return (allowed, remaining) for the provided identifier."""
+        with self.counters.lock_for(identifier):
+            now = time.time()
+            state, window_index = self._current(identifier, now)
+            if state is None:
+                state = [0.0, window_index, 0, 0]
+                self.counters.add(identifier, state, now)
+            
+            elapsed = (now - window_index * self.window_seconds) / self.window_seconds
+            estimated = state[3] * (1.0 - elapsed) + state[2]
+            
+            if estimated + 1 > self.max_requests:
+                return False, 0
+            
+            state[2] += 1
+            # Counts stop mattering once the next window has fully passed.
+            state[0] = (window_index + 2) * self.window_seconds
+            return True, max(0, int(self.max_requests - estimated - 1))
+    
+    def retry_after(self, identifier: str) -> float:
+        """Return seconds until the identifier may make another request."""
+        with self.counters.lock_for(identifier):
+            now = time.time()
+            state, window_index = self._current(identifier, now)
+            if state is None:
+                return 0.0
+            return _sliding_window_retry_after(
+                state[2], state[3], self.max_requests,
+                window_index * self.window_seconds, self.window_seconds, now,
+            )
+
+
+class GCRARateLimiter:
+    """Generic Cell Rate Algorithm limiter (a token bucket stored as one float).
+
+    Each identifier only keeps its theoretical arrival time (TAT). Requests are
+    spaced ``window_seconds / max_requests`` apart and bursts up to
+    ``max_requests`` are allowed.
+    """
+    
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        *,
+        max_identifiers: int = 100_000,
+        shards: int = 16,
+    ):
         """Initialize a limiter with the given quota and window size."""
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests: Dict[str, list] = defaultdict(list)
+        self.emission_interval = window_seconds / max_requests
+        self.arrivals = RateLimitStore(max_identifiers, shards)
+    
+    def is_allowed(self, identifier: str) -> Tuple[bool, int]:
+        """Return (allowed, remaining) for the provided identifier."""
+        with self.arrivals.lock_for(identifier):
+            now = time.time()
+            # The TAT doubles as the expiry: once `now` passes it the bucket is full.
+            entry = self.arrivals.get(identifier, now)
+            tat = now if entry is None else entry[0]
+            new_tat = tat + self.emission_interval
+            allow_at = new_tat - self.window_seconds
+            
+            if now < allow_at:
+                return False, 0
+            
+            if entry is None:
+                self.arrivals.add(identifier, [new_tat], now)
+            else:
+                entry[0] = new_tat
+            # Small epsilon keeps float rounding from under-reporting by one.
+            remaining = math.floor((now - allow_at) / self.emission_interval + 1e-9)
+            return True, min(remaining, self.max_requests - 1)
+    
+    def retry_after(self, identifier: str) -> float:
+        """Return seconds until the identifier may make another request."""
+        with self.arrivals.lock_for(identifier):
+            now = time.time()
+            entry = self.arrivals.get(identifier, now)
+            if entry is None:
+                return 0.0
+            return max(0.0, entry[0] + self.emission_interval - self.window_seconds - now)
+
+
+class RateLimitDecision(NamedTuple):
+    """Outcome of a check: `remaining` and `retry_after` are the tightest across tiers."""
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+class MultiTierRateLimiter:
+    """Several ``(limit, window_seconds)`` quotas on one identifier, checked in one pass.
+
+    Every tier is a sliding-window counter. All tiers of an identifier live in a
+    single flat entry ``[expires_at, index_0, current_0, previous_0, index_1,
+    ...]`` so one lookup and one lock cover the whole check, and a request is
+    only counted when every tier admits it.
+    """
+    
+    def __init__(
+        self,
+        tiers: List[Tuple[int, float]],
+        *,
+        max_identifiers: int = 100_000,
+        shards: int = 16,
+    ):
+        """Initialize with tiers such as ``[(10, 1), (100, 60), (10_000, 86_400)]``."""
+        if not tiers:
+            raise ValueError("At least one (limit, window_seconds) tier is required")
+        self.tiers = sorted((int(limit), window) for limit, window in tiers)
+        # (offset into the entry, limit, window) for each tier.
+        self._layout = tuple(
+            (1 + 3 * position, limit, window)
+            for position, (limit, window) in enumerate(self.tiers)
+        )
+        self._longest_window = max(window for _, window in self.tiers)
+        self.counters = RateLimitStore(max_identifiers, shards)
+    
+    @property
+    def max_requests(self) -> int:
+        """The smallest configured limit."""
+        return self.tiers[0][0]
+    
+    def _roll(self, state: list, now: float):
+        """Advance every tier of the entry to its current window."""
+        for offset, _, window in self._layout:
+            window_index = int(now // window)
+            if state[offset] != window_index:
+                state[offset + 2] = state[offset + 1] if state[offset] == window_index - 1 else 0
+                state[offset + 1] = 0
+                state[offset] = window_index
+    
+    def _retry_after(self, state: list, now: float) -> float:
+        """Longest wait any tier imposes on the (rolled) entry."""
+        return max(
+            _sliding_window_retry_after(
+                state[offset + 1], state[offset + 2], limit,
+                state[offset] * window, window, now,
+            )
+            for offset, limit, window in self._layout
+        )
+    
+    def _consume(self, identifier: str, with_retry: bool) -> Tuple[bool, int, float]:
+        with self.counters.lock_for(identifier):
+            now = time.time()
+            state = self.counters.get(identifier, now)
+            if state is None:
+                state = [0.0] + [0] * (3 * len(self._layout))
+                self.counters.add(identifier, state, now)
+            
+            remaining = None
+            for offset, limit, window in self._layout:
+                window_index = int(now // window)
+                if state[offset] != window_index:
+                    state[offset + 2] = state[offset + 1] if state[offset] == window_index - 1 else 0
+                    state[offset + 1] = 0
+                    state[offset] = window_index
+                estimated = (
+                    state[offset + 2] * (1.0 - (now - window_index * window) / window)
+                    + state[offset + 1]
+                )
+                if estimated + 1 > limit:
+                    if not with_retry:
+                        return False, 0, 0.0
+                    self._roll(state, now)
+                    return False, 0, self._retry_after(state, now)
+                tier_remaining = int(limit - estimated - 1)
+                if remaining is None or tier_remaining < remaining:
+                    remaining = tier_remaining
+            
+            for offset, _, _ in self._layout:
+                state[offset + 1] += 1
+            # Counts stop mattering once the longest tier's next window has passed.
+            state[0] = (int(now // self._longest_window) + 2) * self._longest_window
+            return True, max(0, remaining), 0.0
+    
+    def check(self, identifier: str) -> RateLimitDecision:
+        """Count one request against every tier if all of them admit it."""
+        return RateLimitDecision(*self._consume(identifier, with_retry=True))
+    
+    def is_allowed(self, identifier: str) -> Tuple[bool, int]:
+        """Return (allowed, remaining) for the provided identifier."""
+        allowed, remaining, _ = self._consume(identifier, with_retry=False)
+        return allowed, remaining
+    
+    def retry_after(self, identifier: str) -> float:
+        """Return seconds until every tier admits another request."""
+        with self.counters.lock_for(identifier):
+            now = time.time()
+            state = self.counters.get(identifier, now)
+            if state is None:
+                return 0.0
+            self._roll(state, now)
+            return self._retry_after(state, now)
+
+
+class SharedMemoryRateLimiter:
+    """GCRA limiter whose buckets live in a `multiprocessing.shared_memory` segment.
+
+    Create it in the master process before forking; every pre-forked worker
+    then shares one quota without a network round trip. Identifiers are hashed
+    into fixed 16-byte slots (``fingerprint, TAT``). Updates are serialized by
+    a stripe of inherited `multiprocessing.Lock` objects, one per group of
+    slots. When all probe slots of a group are live with other identifiers the
+    request shares the home slot's bucket, which can only make limiting
+    stricter, never looser.
+    """
+    
+    _SLOT = struct.Struct("<Qd")
+    _PROBES = 4
+    
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        *,
+        slots: int = 65_536,
+        stripes: int = 64,
+        name: Optional[str] = None,
+    ):
+        """Create the shared segment (optionally under `name`) and its lock stripe."""
+        if stripes < 1 or slots < stripes or slots % stripes:
+            raise ValueError("slots must be a positive multiple of stripes")
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.emission_interval = window_seconds / max_requests
+        self.slots = slots
+        self._memory = shared_memory.SharedMemory(name=name, create=True, size=slots * self._SLOT.size)
+        self._memory.buf[:slots * self._SLOT.size] = bytes(slots * self._SLOT.size)
+        self._locks = [multiprocessing.Lock() for _ in range(stripes)]
+        self._owner_pid = os.getpid()
+    
+    @property
+    def name(self) -> str:
+        """Name of the shared memory segment."""
+        return self._memory.name
+    
+    def _fingerprint(self, identifier: str) -> int:
+        # Stable across processes (unlike `hash`); 0 marks an empty slot.
+        digest = hashlib.blake2b(identifier.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") or 1
+    
+    def _locate(self, fingerprint: int, now: float) -> Tuple[int, int, float]:
+        """Return (byte offset, slot owner, TAT) to use. Caller holds the stripe lock.
+
+        Probes stay within one stripe because ``slots % stripes == 0``.
+        """
+        stripes = len(self._locks)
+        home = fingerprint % self.slots
+        buf = self._memory.buf
+        free = None
+        for probe in range(self._PROBES):
+            slot = (home + probe * stripes) % self.slots
+            offset = slot * self._SLOT.size
+            owner, tat = self._SLOT.unpack_from(buf, offset)
+            if owner == fingerprint:
+                return offset, owner, tat
+            if free is None and (owner == 0 or tat <= now):
+                free = offset
+        if free is not None:
+            return free, fingerprint, 0.0
+        # Every probe slot is busy: share the home bucket without taking it over.
+        offset = home * self._SLOT.size
+        owner, tat = self._SLOT.unpack_from(buf, offset)
+        return offset, owner, tat
+    
+    def is_allowed(self, identifier: str) -> Tuple[bool, int]:
+        """Return (allowed, remaining) for the provided identifier."""
+        fingerprint = self._fingerprint(identifier)
+        with self._locks[fingerprint % len(self._locks)]:
+            now = time.time()
+            offset, owner, tat = self._locate(fingerprint, now)
+            new_tat = max(tat, now) + self.emission_interval
+            allow_at = new_tat - self.window_seconds
+            
+            if now < allow_at:
+                return False, 0
+            
+            self._SLOT.pack_into(self._memory.buf, offset, owner, new_tat)
+        remaining = math.floor((now - allow_at) / self.emission_interval + 1e-9)
+        return True, min(remaining, self.max_requests - 1)
+    
+    def retry_after(self, identifier: str) -> float:
+        """Return seconds until the identifier may make another request."""
+        fingerprint = self._fingerprint(identifier)
+        with self._locks[fingerprint % len(self._locks)]:
+            now = time.time()
+            _, _, tat = self._locate(fingerprint, now)
+        return max(0.0, tat + self.emission_interval - self.window_seconds - now)
+    
+    def close(self, unlink: Optional[bool] = None):
+        """Detach from the segment; the creating process also unlinks it by default."""
+        self._memory.close()
+        if unlink is None:
+            unlink = os.getpid() == self._owner_pid
+        if unlink:
+            try:
+                self._memory.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# Algorithms selectable through `rate_limit(algorithm=...)`.
+RATE_LIMIT_ALGORITHMS: Dict[str, Type[Any]] = {
+    "sliding_log": RateLimiter,
+    "sliding_window": SlidingWindowRateLimiter,
+    "gcra": GCRARateLimiter,
+}
+
+
+def create_limiter(
+    algorithm: str = "sliding_log",
+    max_requests: int = 100,
+    window_seconds: int = 60,
+):
+    """Build a limiter for the named algorithm."""
+    try:
+        limiter_cls = RATE_LIMIT_ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(
+            f"Unknown rate limit algorithm '{algorithm}'. "
+            f"Choose from: {', '.join(sorted(RATE_LIMIT_ALGORITHMS))}"
+        ) from None
+    return limiter_cls(max_requests, window_seconds)
+
+
+# Trim, count and add in one atomic round trip (see CACHE_GUIDE `rate:<module>:<id>`).
+# KEYS[1] = zset key; ARGV = now_ms, window_ms, max_requests, member
+_REDIS_SLIDING_LOG_SCRIPT = """
+local now_ms = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_ms - window_ms)
+local count = redis.call('ZCARD', KEYS[1])
+if count >= limit then
+    return {0, 0}
+end
+redis.call('ZADD', KEYS[1], now_ms, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window_ms)
+return {1, limit - count - 1}
+"""
+
+
+class RedisRateLimiter:
+    """Sliding-log limiter shared by every worker through a Redis sorted set.
+
+    Each identifier maps to ``rate:<module>:<identifier>``. When Redis cannot be
+    reached the check falls back to a local limiter and Redis is retried after
+    `retry_interval` seconds.
+    """
+    
+    def __init__(
+        self,
+        max_requests: int = 100,
+        window_seconds: int = 60,
+        *,
+        client: Any = None,
+        url: Optional[str] = None,
+        module: str = "default",
+        fallback: Any = None,
+        retry_interval: float = 5.0,
+    ):
+        """Initialize with a redis client (or URL) and an optional local fallback."""
+        if client is None:
+            if redis is None:
+                raise ImportError("redis package not installed. Run `pip install redis`.")
+            client = redis.from_url(url or "redis://localhost:6379", socket_timeout=0.5)
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.client = client
+        self.module = module
+        self.fallback = fallback or RateLimiter(max_requests, window_seconds)
+        self.retry_interval = retry_interval
+        self._script = client.register_script(_REDIS_SLIDING_LOG_SCRIPT)
+        self._unavailable_until = 0.0
+    
+    def key_for(self, identifier: str) -> str:
+        """Return the Redis key used for the identifier."""
+        return f"rate:{self.module}:{identifier}"
     
     def is_allowed(self, identifier: str) -> Tuple[bool, int]:
         """Return (allowed, remaining) for the provided identifier."""
         now = time.time()
-        window_start = now - self.window_seconds
+        if now < self._unavailable_until:
+            return self.fallback.is_allowed(identifier)
         
-        # 
-        self.requests[identifier] = [
-            ts for ts in self.requests[identifier]
-            if ts > window_start
-        ]
+        try:
+            allowed, remaining = self._script(
+                keys=[self.key_for(identifier)],
+                args=[
+                    int(now * 1000),
+                    int(self.window_seconds * 1000),
+                    self.max_requests,
+                    f"{now:.6f}-{uuid.uuid4().hex[:12]}",
+                ],
+            )
+        except _REDIS_ERRORS as exc:
+            self._unavailable_until = now + self.retry_interval
+            logger.warning("Redis rate limiter unavailable, using local limits: %s", exc)
+            return self.fallback.is_allowed(identifier)
         
-        # 
-        if len(self.requests[identifier]) >= self.max_requests:
-            remaining = 0
-        else:
-            self.requests[identifier].append(now)
-            remaining = self.max_requests - len(self.requests[identifier])
+        return bool(allowed), int(remaining)
+    
+    def retry_after(self, identifier: str) -> float:
+        """Return seconds until the identifier may make another request."""
+        now = time.time()
+        if now < self._unavailable_until:
+            return self.fallback.retry_after(identifier)
         
-        allowed = len(self.requests[identifier]) <= self.max_requests
-        return allowed, remaining
+        key = self.key_for(identifier)
+        try:
+            count = self.client.zcount(key, f"({int((now - self.window_seconds) * 1000)}", "+inf")
+            if count < self.max_requests:
+                return 0.0
+            # The entry that has to age out before a slot frees up.
+            entries = self.client.zrange(key, -self.max_requests, -self.max_requests, withscores=True)
+        except _REDIS_ERRORS:
+            return self.fallback.retry_after(identifier)
+        if not entries:
+            return 0.0
+        return max(0.0, entries[0][1] / 1000 + self.window_seconds - now)
+
+
+# Limiters that answer from process or shared memory; anything else (e.g.
+# RedisRateLimiter) may block on I/O and is run off the event loop.
+_IN_PROCESS_LIMITERS: Tuple[Type[Any], ...] = (
+    RateLimiter,
+    SlidingWindowRateLimiter,
+    GCRARateLimiter,
+    MultiTierRateLimiter,
+    SharedMemoryRateLimiter,
+)
+
+
+async def _call_limiter(limiter: Any, method: str, identifier: str) -> Any:
+    """Call ``limiter.<method>(identifier)`` from a coroutine without blocking the loop."""
+    call = getattr(limiter, method)
+    if inspect.iscoroutinefunction(call):
+        return await call(identifier)
+    if isinstance(limiter, _IN_PROCESS_LIMITERS):
+        return call(identifier)
+    return await asyncio.get_running_loop().run_in_executor(None, call, identifier)
+
+
+class RateLimitExceeded(Exception):
+    """Raised by `rate_limit` when a call is over quota."""
+    
+    def __init__(self, remaining: int = 0, retry_after: Optional[float] = None):
+        super().__init__(f"Rate limit exceeded. Remaining: {remaining}")
+        self.remaining = remaining
+        self.retry_after = retry_after
 
 
 # 
@@ -44,25 +716,79 @@ _default_limiter = RateLimiter(max_requests=100, window_seconds=60)
 def rate_limit(
     max_requests: int = 100,
     window_seconds: int = 60,
-    identifier_func: Optional[Callable[..., str]] = None
+    identifier_func: Optional[Callable[..., str]] = None,
+    algorithm: str = "sliding_log",
+    limiter: Any = None,
+    wait: bool = False,
+    max_wait: Optional[float] = None,
+    tiers: Optional[List[Tuple[int, float]]] = None,
 ):
-    """Decorator factory that enforces RateLimiter on a function."""
-    limiter = RateLimiter(max_requests, window_seconds)
+    """Decorator factory that enforces a rate limiter on a function.
+
+    `algorithm` picks the limiter implementation: ``sliding_log`` (exact,
+    O(max_requests) state), ``sliding_window`` or ``gcra`` (both O(1) state).
+    Pass a prebuilt `limiter` (e.g. `RedisRateLimiter`) to share quotas
+    across processes; it takes precedence over the other settings. `tiers`
+    builds a `MultiTierRateLimiter` instead of a single-window limiter.
+
+    Coroutine functions get an async wrapper. It awaits the limiter's
+    ``is_allowed``/``retry_after`` when they are coroutines and otherwise runs
+    limiters that may block on I/O (anything but the in-process ones) in the
+    loop's default executor. With ``wait=True`` an over-quota call sleeps
+    (``asyncio.sleep`` for coroutines) until the limiter admits it instead of
+    raising `RateLimitExceeded`; `max_wait` caps the total sleep.
+    """
+    if limiter is None and tiers:
+        limiter = MultiTierRateLimiter(tiers)
+    elif limiter is None:
+        limiter = create_limiter(algorithm, max_requests, window_seconds)
     
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
+        def resolve_identifier(args, kwargs) -> str:
             # 
             if identifier_func:
-                identifier = identifier_func(*args, **kwargs)
-            else:
-                identifier = func.__name__
-            
-            allowed, remaining = limiter.is_allowed(identifier)
-            if not allowed:
-                raise Exception(f"Rate limit exceeded. Remaining: {remaining}")
-            
-            return func(*args, **kwargs)
+                return identifier_func(*args, **kwargs)
+            return func.__name__
+        
+        def next_delay(remaining: int, waited: float, delay: Optional[float]) -> float:
+            """Return how long to sleep before retrying, or raise."""
+            if not wait:
+                raise RateLimitExceeded(remaining, delay)
+            # Never spin: other callers may grab a freed slot first.
+            delay = max(delay or 0.0, 0.001)
+            if max_wait is not None and waited + delay > max_wait:
+                raise RateLimitExceeded(remaining, delay)
+            return delay
+        
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                identifier = resolve_identifier(args, kwargs)
+                waited = 0.0
+                while True:
+                    allowed, remaining = await _call_limiter(limiter, "is_allowed", identifier)
+                    if allowed:
+                        return await func(*args, **kwargs)
+                    retry_after = (
+                        await _call_limiter(limiter, "retry_after", identifier)
+                        if hasattr(limiter, "retry_after") else None
+                    )
+                    delay = next_delay(remaining, waited, retry_after)
+                    await asyncio.sleep(delay)
+                    waited += delay
+            return async_wrapper
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            identifier = resolve_identifier(args, kwargs)
+            waited = 0.0
+            while True:
+                allowed, remaining = limiter.is_allowed(identifier)
+                if allowed:
+                    return func(*args, **kwargs)
+                retry_after = limiter.retry_after(identifier) if hasattr(limiter, "retry_after") else None
+                delay = next_delay(remaining, waited, retry_after)
+                time.sleep(delay)
+                waited += delay
         return wrapper
     return decorator
-
@@ -0,0 +1,279 @@
+"""
+`jti`-based token revocation with an in-process Bloom filter fast path.
+
+Most tokens are not revoked, so `RevocationList.is_revoked` answers "no"
+from a local Bloom filter without touching the backend. Only filter hits
+(real revocations plus rare false positives) are confirmed against the
+shared backend. New revocations are pulled from the backend incrementally,
+either lazily by `is_revoked` once the filter is older than
+`refresh_interval` or by an optional background thread, so every worker's
+filter converges.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from jwt import InvalidTokenError
+
+logger = logging.getLogger(__name__)
+
+
+class RevokedTokenError(InvalidTokenError):
+    """Raised when a token's `jti` has been revoked."""
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` items at `error_rate`."""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("capacity must be positive and 0 < error_rate < 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> bool:
+        """Set the item's bits; returns False when they were all set already."""
+        positions = self._positions(item)
+        # Concurrent read-modify-write on the same byte could drop a bit.
+        with self._lock:
+            added = False
+            for position in positions:
+                mask = 1 << (position & 7)
+                if not self._bits[position >> 3] & mask:
+                    self._bits[position >> 3] |= mask
+                    added = True
+            if added:
+                self.count += 1
+            return added
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class InMemoryRevocationBackend:
+    """Process-local backend; useful for tests and single-process services."""
+
+    def __init__(self):
+        self._revoked = {}
+        # (sequence, jti, expires_at); expired entries are pruned on read.
+        self._log: List[Tuple[int, str, float]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: float):
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._sequence += 1
+            self._log.append((self._sequence, jti, expires_at))
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def _prune(self, now: float):
+        # Caller holds the lock. A missed expired jti is harmless: its token no longer validates.
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._log = [entry for entry in self._log if entry[2] > now]
+
+    def changes_since(self, cursor: Any) -> Tuple[List[str], Any]:
+        """Return jtis revoked after `cursor` and the new cursor."""
+        start = cursor or 0
+        with self._lock:
+            self._prune(time.time())
+            return [jti for sequence, jti, _ in self._log if sequence > start], self._sequence
+
+    def active(self) -> List[str]:
+        """Return every jti whose token has not expired yet."""
+        with self._lock:
+            self._prune(time.time())
+            return list(self._revoked)
+
+
+# Record a revocation atomically. The log score comes from a server-side
+# counter, so it is assigned in commit order regardless of client clocks.
+# KEYS = jti key, log zset, expiry zset, sequence counter
+# ARGV = ttl seconds, jti, expires_at (s)
+_REDIS_REVOKE_SCRIPT = """
+redis.call('SET', KEYS[1], 1, 'EX', ARGV[1])
+local sequence = redis.call('INCR', KEYS[4])
+redis.call('ZADD', KEYS[2], sequence, ARGV[2])
+redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+local now = tonumber(redis.call('TIME')[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now, 'LIMIT', 0, 1000)
+if #expired > 0 then
+    redis.call('ZREM', KEYS[2], unpack(expired))
+    redis.call('ZREM', KEYS[3], unpack(expired))
+end
+return sequence
+"""
+
+
+class RedisRevocationBackend:
+    """
+    Shared backend using `revoked:<namespace>:<jti>` keys (TTL = token lifetime)
+    plus a `revoked:<namespace>` sorted set that feeds incremental refreshes.
+    Log entries are scored by a server-side sequence (`revoked:<namespace>:_sequence`),
+    so a reader's cursor never skips a revocation committed after it; a
+    second sorted set holds each entry's expiry for pruning.
+    """
+
+    def __init__(self, client: Any, namespace: str = "auth", max_token_ttl: int = 86_400):
+        self.client = client
+        self.namespace = namespace
+        self.max_token_ttl = max_token_ttl
+        self.log_key = f"revoked:{namespace}"
+        self.expiry_key = f"revoked:{namespace}:_expires"
+        self.sequence_key = f"revoked:{namespace}:_sequence"
+        self._revoke_script = client.register_script(_REDIS_REVOKE_SCRIPT)
+
+    def key_for(self, jti: str) -> str:
+        return f"revoked:{self.namespace}:{jti}"
+
+    def revoke(self, jti: str, expires_at: float):
+        now = time.time()
+        ttl = max(1, int(math.ceil(expires_at - now)))
+        # Log entries are kept no longer than the longest token lifetime.
+        expires_at = min(expires_at, now + self.max_token_ttl)
+        self._revoke_script(
+            keys=[self.key_for(jti), self.log_key, self.expiry_key, self.sequence_key],
+            args=[ttl, jti, int(math.ceil(expires_at))],
+        )
+
+    def is_revoked(self, jti: str) -> bool:
+        return bool(self.client.exists(self.key_for(jti)))
+
+    def changes_since(self, cursor: Any) -> Tuple[List[str], Any]:
+        low = f"({int(cursor)}" if cursor else "-inf"
+        entries = self.client.zrangebyscore(self.log_key, low, "+inf", withscores=True)
+        if not entries:
+            return [], cursor
+        jtis = [member.decode("utf-8") if isinstance(member, bytes) else member for member, _ in entries]
+        return jtis, int(entries[-1][1])
+
+    def active(self) -> List[str]:
+        jtis, _ = self.changes_since(None)
+        return jtis
+
+
+class RevocationList:
+    """
+    Bloom-filtered view over a revocation backend, refreshed incrementally.
+
+    `is_revoked` refreshes lazily when the last refresh is older than
+    ``refresh_interval`` seconds (0 disables this). Only one caller
+    refreshes at a time; the others answer from the current filter.
+    `start()` moves refreshing to a background thread instead.
+    """
+
+    def __init__(
+        self,
+        backend: Any = None,
+        *,
+        capacity: int = 1_000_000,
+        error_rate: float = 0.001,
+        refresh_interval: float = 5.0,
+    ):
+        self.backend = backend or InMemoryRevocationBackend()
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._cursor: Any = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_refresh = 0.0
+        self.backend_checks = 0
+        self.refresh()
+
+    def revoke(self, jti: str, expires_at: float):
+        """Revoke `jti` until `expires_at` (the token's `exp`)."""
+        self.backend.revoke(jti, expires_at)
+        self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        """Fast negative from the filter; positives are confirmed by the backend."""
+        if (
+            self.refresh_interval > 0
+            and self._thread is None
+            and time.monotonic() - self._last_refresh >= self.refresh_interval
+        ):
+            self._refresh_if_stale()
+        if jti not in self._filter:
+            return False
+        self.backend_checks += 1
+        return self.backend.is_revoked(jti)
+
+    def refresh(self) -> int:
+        """Pull revocations made elsewhere since the last refresh; returns how many."""
+        with self._refresh_lock:
+            return self._pull()
+
+    def _pull(self) -> int:
+        # Caller holds _refresh_lock.
+        self._last_refresh = time.monotonic()
+        jtis, self._cursor = self.backend.changes_since(self._cursor)
+        for jti in jtis:
+            self._filter.add(jti)
+        if self._filter.count > self.capacity:
+            self._rebuild()
+        return len(jtis)
+
+    def _refresh_if_stale(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # another caller is refreshing
+        try:
+            if time.monotonic() - self._last_refresh >= self.refresh_interval:
+                self._pull()
+        except Exception as exc:  # serve from the current filter; retry after the next interval
+            logger.warning("Revocation refresh failed: %s", exc)
+        finally:
+            self._refresh_lock.release()
+
+    def _rebuild(self):
+        """Replace a saturated filter with one holding only still-active revocations."""
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        for jti in self.backend.active():
+            fresh.add(jti)
+        self._filter = fresh
+
+    # --- Background refresh ----------------------------------------------
+    def start(self):
+        """Start the daemon thread that calls `refresh` every `refresh_interval`."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="revocation-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as exc:  # keep refreshing after transient backend errors
+                logger.warning("Revocation refresh failed: %s", exc)
@@ -4,18 +4,40 @@
 
 """
 
-from .base import BaseModel, TimestampMixin
+from .base import BaseModel, TimestampMixin, CompactTimestampMixin, EpochTimestamp, NOW, slotted_model
+from .batch import ModelBatch
+from .loading import ModelValidationError, load_models, loader_for
+from .serialization import dump_models, dumps_models, serializers_for
 from .common import (
     PaginationParams,
     PaginationResult,
+    Cursor,
+    CursorParams,
+    CursorResult,
+    InvalidCursorError,
     ApiResponse,
 )
 
 __all__ = [
     'BaseModel',
     'TimestampMixin',
+    'CompactTimestampMixin',
+    'EpochTimestamp',
+    'NOW',
+    'slotted_model',
+    'ModelBatch',
+    'ModelValidationError',
+    'load_models',
+    'loader_for',
+    'dump_models',
+    'dumps_models',
+    'serializers_for',
     'PaginationParams',
     'PaginationResult',
+    'Cursor',
+    'CursorParams',
+    'CursorResult',
+    'InvalidCursorError',
     'ApiResponse',
 ]
 
@@ -1,27 +1,52 @@
 """Base dataclasses and mixins for module models."""
 
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, field, asdict
+import inspect
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Iterable, List
+from dataclasses import dataclass, field
+
+from .loading import load_models, loader_for
+from .serialization import dumps, serializers_for
 
 
 @dataclass
 class BaseModel:
     """Lightweight base model with helpers for dict/JSON conversion."""
     
+    # Empty slots let `slotted_model` subclasses drop the per-instance __dict__;
+    # ordinary subclasses still get one.
+    __slots__ = ()
+    
+    # How `from_dict` treats keys that are not fields: "ignore", "collect"
+    # (into the dict field named by ``__extra_field__``) or "raise".
+    __unknown_fields__ = "ignore"
+    __extra_field__ = "extra"
+    
     def to_dict(self) -> Dict[str, Any]:
-        """Return a shallow dictionary representation."""
-        return asdict(self)
+        """Return a dictionary representation (same result as `dataclasses.asdict`)."""
+        return serializers_for(self.__class__)[0](self)
     
-    def to_json(self) -> str:
-        """Serialize the model to JSON using default=str."""
-        import json
-        return json.dumps(self.to_dict(), default=str, ensure_ascii=False)
+    def to_json(self, *, compact: bool = False) -> str:
+        """
+        Serialize the model to JSON; non-JSON values are rendered with str().
+        ``compact=True`` drops whitespace and uses orjson when installed.
+        """
+        return dumps(serializers_for(self.__class__)[1](self), compact=compact)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], *, unknown: Optional[str] = None):
+        """
+        Instantiate the dataclass from a dict, validating field types and
+        coercing ISO datetimes, UUID strings, enums and nested models.
+        Raises `ModelValidationError` on invalid data.
+        """
+        return loader_for(cls, unknown)(data)
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]):
-        """Instantiate the dataclass from a dict."""
-        return cls(**data)
+    def from_dicts(cls, rows: Iterable[Dict[str, Any]], *, unknown: Optional[str] = None) -> List[Any]:
+        """Load many dicts (DB rows, parsed JSON) with one compiled loader."""
+        return load_models(cls, rows, unknown)
 
 
 @dataclass
@@ -34,3 +59,127 @@ class TimestampMixin:
         """Update the `updated_at` timestamp to now."""
         self.updated_at = datetime.now(timezone.utc)
 
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class _Now:
+    """Default marker for timestamps that start at the current time."""
+    
+    def __repr__(self) -> str:
+        return "<now>"
+
+
+NOW = _Now()
+
+
+class EpochTimestamp:
+    """
+    Dataclass field descriptor that stores a datetime as integer microseconds
+    since the epoch (in the slot ``_<name>_us``) and returns an aware UTC
+    datetime on access. Accepts datetimes (naive ones are taken as UTC), epoch
+    microseconds, None, or `NOW`.
+    """
+    
+    def __init__(self, *, default_now: bool = False):
+        self.default_now = default_now
+        self.name = ""
+        self.storage = ""
+    
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+        self.storage = f"_{name}_us"
+    
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        if obj is None:
+            # Read by @dataclass as the field default.
+            return NOW if self.default_now else None
+        value = getattr(obj, self.storage)
+        return None if value is None else _EPOCH + _MICROSECOND * value
+    
+    def __set__(self, obj: Any, value: Any):
+        setattr(obj, self.storage, self.to_epoch(value))
+    
+    def to_epoch(self, value: Any) -> Optional[int]:
+        if value is None:
+            return None
+        if value is NOW:
+            return time.time_ns() // 1000
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return (value - _EPOCH) // _MICROSECOND
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        raise TypeError(
+            f"{self.name} expects a datetime, epoch microseconds or None, got {type(value).__name__}"
+        )
+
+
+@dataclass
+class CompactTimestampMixin:
+    """
+    Drop-in replacement for `TimestampMixin` that keeps `created_at` and
+    `updated_at` as epoch-microsecond integers and materializes datetimes on
+    access, so `to_dict`/`from_dict` see the same values. Slotted, for use
+    with `slotted_model`.
+    """
+    __slots__ = ("_created_at_us", "_updated_at_us")
+    
+    created_at: datetime = EpochTimestamp(default_now=True)
+    updated_at: Optional[datetime] = EpochTimestamp()
+    
+    def touch(self):
+        """Update the `updated_at` timestamp to now."""
+        self.updated_at = NOW
+
+
+def _defined_by_base(cls: type, name: str) -> bool:
+    # True when a base already provides storage for the field (a slot, an
+    # EpochTimestamp or another data descriptor).
+    for base in cls.__mro__[1:]:
+        if name in base.__dict__:
+            return inspect.isdatadescriptor(base.__dict__[name])
+    return False
+
+
+def _add_slots(cls: type) -> type:
+    if "__slots__" in cls.__dict__:
+        return cls
+    namespace = dict(cls.__dict__)
+    slots = []
+    for model_field in cls.__dataclass_fields__.values():
+        attribute = namespace.get(model_field.name)
+        if isinstance(attribute, EpochTimestamp):
+            slots.append(attribute.storage)
+        elif not _defined_by_base(cls, model_field.name):
+            slots.append(model_field.name)
+            # The default now lives in the generated __init__ and would clash with the slot.
+            namespace.pop(model_field.name, None)
+    namespace["__slots__"] = tuple(slots)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted.__qualname__ = cls.__qualname__
+    return slotted
+
+
+def slotted_model(cls: Optional[type] = None, **dataclass_options: Any):
+    """
+    Class decorator: ``@dataclass`` plus ``__slots__`` for every field, so
+    instances carry no per-instance ``__dict__`` (``dataclass(slots=True)``
+    needs Python 3.10+). Every base class must declare ``__slots__`` too, as
+    `BaseModel` and `CompactTimestampMixin` do. Methods of the decorated class
+    must not use zero-argument ``super()``, because the class is re-created.
+
+        @slotted_model
+        class Run(CompactTimestampMixin, BaseModel):
+            status: str = "pending"
+    """
+    def wrap(target: type) -> type:
+        if "__dataclass_fields__" not in target.__dict__:
+            target = dataclass(target, **dataclass_options)
+        return _add_slots(target)
+    
+    return wrap if cls is None else wrap(cls)
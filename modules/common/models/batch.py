@@ -0,0 +1,296 @@
+"""
+Columnar (struct-of-arrays) container for large lists of models.
+
+`ModelBatch` stores one column per dataclass field. ``int`` and ``float``
+fields (including ``Optional[...]`` ones that hold no None) are kept in typed
+`array.array` buffers exposed as memoryviews; all other fields are plain
+lists. Slicing a batch slices the memoryviews without copying data. Filters
+and aggregations run through C-level iterators (``map``, ``compress``,
+``sum``), not one Python attribute lookup per model.
+"""
+
+from __future__ import annotations
+
+import csv
+import dataclasses
+import functools
+import itertools
+import operator
+import typing
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Generic, IO, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from .serialization import ATOMIC_TYPES, JSON_NATIVE_TYPES, _asdict_value, _json_from_asdict_value, dumps
+
+M = TypeVar("M")
+
+Column = Union[memoryview, List[Any]]
+
+_TYPECODES = {int: "q", float: "d", "int": "q", "float": "d"}
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+_MISSING = object()
+
+
+def _typecode(annotation: Any) -> Optional[str]:
+    if typing.get_origin(annotation) is Union:
+        members = [member for member in typing.get_args(annotation) if member is not type(None)]
+        if len(members) != 1:
+            return None
+        annotation = members[0]
+    try:
+        return _TYPECODES.get(annotation)
+    except TypeError:  # unhashable annotation
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _layout(model_cls: type) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """``(field name, array typecode or None)`` for every field of ``model_cls``."""
+    try:
+        hints = typing.get_type_hints(model_cls)
+    except Exception:  # unresolvable forward references: fall back to raw annotations
+        hints = {}
+    return tuple(
+        (model_field.name, _typecode(hints.get(model_field.name, model_field.type)))
+        for model_field in dataclasses.fields(model_cls)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _record_builder(names: Tuple[str, ...]) -> Callable[[Sequence[Sequence[Any]]], List[Dict[str, Any]]]:
+    """Compile ``columns -> [ {name: value, ...}, ... ]`` for one field layout."""
+    variables = ", ".join(f"v{index}" for index in range(len(names)))
+    items = ", ".join(f"{name!r}: v{index}" for index, name in enumerate(names))
+    source = f"def build(columns):\n    return [{{{items}}} for {variables}, in zip(*columns)]"
+    namespace: Dict[str, Any] = {}
+    exec(source, namespace)  # noqa: S102 - source is built from dataclass field names only
+    return namespace["build"]
+
+
+@functools.lru_cache(maxsize=None)
+def _init_names(model_cls: type) -> frozenset:
+    return frozenset(model_field.name for model_field in dataclasses.fields(model_cls) if model_field.init)
+
+
+def _build_column(typecode: Optional[str], values: Iterable[Any]) -> Column:
+    if isinstance(values, memoryview):
+        return values
+    if isinstance(values, array):
+        return memoryview(values)
+    values = values if isinstance(values, list) else list(values)
+    if typecode is not None:
+        try:
+            return memoryview(array(typecode, values))
+        except (TypeError, OverflowError):  # None or out-of-range values: keep a list column
+            pass
+    return values
+
+
+class ModelBatch(Generic[M]):
+    """
+    Struct-of-arrays view over many instances of one dataclass model.
+
+        batch = ModelBatch.from_models(runs)
+        slow = batch.where("latency_ms", ">", 500).where("status", "==", "failed")
+        slow.mean("latency_ms"), slow.to_json()
+    """
+
+    def __init__(self, model_cls: type, columns: Dict[str, Iterable[Any]]):
+        layout = _layout(model_cls)
+        missing = [name for name, _ in layout if name not in columns]
+        if missing:
+            raise ValueError(f"Missing columns for {model_cls.__name__}: {', '.join(missing)}")
+        self.model_cls = model_cls
+        self.names: Tuple[str, ...] = tuple(name for name, _ in layout)
+        self._columns: Dict[str, Column] = {
+            name: _build_column(typecode, columns[name]) for name, typecode in layout
+        }
+        lengths = {len(column) for column in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+    # --- Construction ------------------------------------------------------
+    @classmethod
+    def from_models(cls, models: Iterable[M], model_cls: Optional[type] = None) -> "ModelBatch[M]":
+        """Build a batch from model instances (all of ``model_cls``, default: the first item's class)."""
+        models = models if isinstance(models, list) else list(models)
+        if model_cls is None:
+            if not models:
+                raise ValueError("model_cls is required for an empty batch")
+            model_cls = models[0].__class__
+        return cls(model_cls, {
+            name: list(map(operator.attrgetter(name), models)) for name, _ in _layout(model_cls)
+        })
+
+    @classmethod
+    def from_records(cls, model_cls: type, records: Iterable[Dict[str, Any]]) -> "ModelBatch":
+        """Build a batch from dicts (e.g. DB rows) without creating model instances."""
+        records = records if isinstance(records, list) else list(records)
+        return cls(model_cls, {
+            name: list(map(operator.itemgetter(name), records)) for name, _ in _layout(model_cls)
+        })
+
+    # --- Access ------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return f"ModelBatch({self.model_cls.__name__}, rows={self._length})"
+
+    def column(self, name: str) -> Column:
+        """Return a column: a memoryview for numeric fields, otherwise a list."""
+        try:
+            return self._columns[name]
+        except KeyError:
+            raise KeyError(f"{self.model_cls.__name__} has no field {name!r}") from None
+
+    def is_numeric(self, name: str) -> bool:
+        return isinstance(self.column(name), memoryview)
+
+    def __getitem__(self, key: Union[int, slice, str]) -> Any:
+        if isinstance(key, str):
+            return self.column(key)
+        if isinstance(key, slice):
+            # Memoryview columns are sliced without copying; list columns copy references.
+            return self._derive({name: column[key] for name, column in self._columns.items()})
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("ModelBatch index out of range")
+        return self._model(tuple(column[key] for column in self._columns.values()))
+
+    def __iter__(self) -> Iterator[M]:
+        """Iterate over the rows as model instances."""
+        return map(self._model, self._rows())
+
+    def _model(self, row: Tuple[Any, ...]) -> M:
+        init_names = _init_names(self.model_cls)
+        return self.model_cls(**{name: value for name, value in zip(self.names, row) if name in init_names})
+
+    def _rows(self) -> Iterator[Tuple[Any, ...]]:
+        return zip(*self._columns.values())
+
+    def _derive(self, columns: Dict[str, Column]) -> "ModelBatch[M]":
+        batch = self.__class__.__new__(self.__class__)
+        batch.model_cls = self.model_cls
+        batch.names = self.names
+        batch._columns = columns
+        batch._length = len(next(iter(columns.values()))) if columns else 0
+        return batch
+
+    # --- Selection ---------------------------------------------------------
+    def take(self, indices: Sequence[int]) -> "ModelBatch[M]":
+        """Return a new batch with the rows at ``indices`` (copies the selected values)."""
+        columns: Dict[str, Column] = {}
+        for name, column in self._columns.items():
+            values = map(column.__getitem__, indices)
+            columns[name] = memoryview(array(column.format, values)) if isinstance(column, memoryview) else list(values)
+        return self._derive(columns)
+
+    def filter(self, mask: Iterable[Any]) -> "ModelBatch[M]":
+        """Keep the rows whose entry in ``mask`` is truthy."""
+        selectors = bytes(map(bool, mask))
+        columns: Dict[str, Column] = {}
+        for name, column in self._columns.items():
+            values = itertools.compress(column, selectors)
+            columns[name] = memoryview(array(column.format, values)) if isinstance(column, memoryview) else list(values)
+        return self._derive(columns)
+
+    def mask(self, name: str, op: Union[str, Callable[[Any], Any]], value: Any = _MISSING) -> Iterator[bool]:
+        """
+        Lazily evaluate a predicate over one column. ``op`` is a comparison
+        (``==``, ``!=``, ``<``, ``<=``, ``>``, ``>=``), ``in``/``not in``, or a
+        one-argument callable. None never satisfies an ordering comparison.
+        """
+        column = self.column(name)
+        if callable(op):
+            return map(op, column)
+        if op in ("in", "not in"):
+            selected = map(operator.contains, itertools.repeat(value), column)
+            return selected if op == "in" else map(operator.not_, selected)
+        try:
+            compare = _OPERATORS[op]
+        except KeyError:
+            raise ValueError(f"Unsupported operator: {op!r}") from None
+        if isinstance(column, memoryview) or op in ("==", "!="):
+            return map(compare, column, itertools.repeat(value))
+        return (item is not None and compare(item, value) for item in column)
+
+    def where(self, name: str, op: Union[str, Callable[[Any], Any]], value: Any = _MISSING) -> "ModelBatch[M]":
+        """Filter rows by a predicate on one column (see `mask`)."""
+        return self.filter(self.mask(name, op, value))
+
+    def group_by(self, name: str) -> Dict[Any, "ModelBatch[M]"]:
+        """Split the batch into one sub-batch per distinct value of ``name``."""
+        groups: Dict[Any, List[int]] = defaultdict(list)
+        for index, key in enumerate(self.column(name)):
+            groups[key].append(index)
+        return {key: self.take(indices) for key, indices in groups.items()}
+
+    # --- Aggregation -------------------------------------------------------
+    def _values(self, name: str) -> Sequence[Any]:
+        column = self.column(name)
+        if isinstance(column, memoryview):
+            return column
+        return [item for item in column if item is not None]
+
+    def count(self, name: Optional[str] = None) -> int:
+        """Number of rows, or of non-None values in ``name``."""
+        return self._length if name is None else len(self._values(name))
+
+    def sum(self, name: str) -> Union[int, float]:
+        return sum(self._values(name))
+
+    def mean(self, name: str) -> Optional[float]:
+        values = self._values(name)
+        return sum(values) / len(values) if len(values) else None
+
+    def min(self, name: str) -> Any:
+        return min(self._values(name), default=None)
+
+    def max(self, name: str) -> Any:
+        return max(self._values(name), default=None)
+
+    def value_counts(self, name: str) -> Dict[Any, int]:
+        return dict(Counter(self.column(name)))
+
+    # --- Export --------------------------------------------------------------
+    def _converted(self, fast_types: frozenset, convert: Callable[[Any], Any]) -> List[Sequence[Any]]:
+        columns = []
+        for name in self.names:
+            column = self._columns[name]
+            if not isinstance(column, memoryview):
+                column = [item if item.__class__ in fast_types else convert(item) for item in column]
+            columns.append(column)
+        return columns
+
+    def to_models(self) -> List[M]:
+        return list(self)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Rows as dicts, equal to ``[model.to_dict() for model in batch]``."""
+        return _record_builder(self.names)(self._converted(ATOMIC_TYPES, _asdict_value))
+
+    def to_json(self, *, compact: bool = False) -> str:
+        """JSON array of the rows, identical to ``dumps_models(batch.to_models())``."""
+        records = _record_builder(self.names)(self._converted(JSON_NATIVE_TYPES, _json_from_asdict_value))
+        return dumps(records, compact=compact)
+
+    def to_csv(self, stream: IO[str], *, header: bool = True) -> int:
+        """Write the rows as CSV (values rendered with str()); returns the row count."""
+        writer = csv.writer(stream)
+        if header:
+            writer.writerow(self.names)
+        writer.writerows(self._rows())
+        return self._length
@@ -1,10 +1,29 @@
 """Common pagination and response models shared by APIs."""
 
-from typing import Generic, TypeVar, Optional, List, Any
-from dataclasses import dataclass
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Generic, TypeVar, Optional, List, Any, Callable, Sequence, Tuple, Union
+from dataclasses import dataclass, field
+from uuid import UUID
 
 T = TypeVar('T')
 
+logger = logging.getLogger(__name__)
+
+CURSOR_SECRET_ENV = "TEMPLATEAI_CURSOR_SECRET"
+CURSOR_DIRECTIONS = ("next", "prev")
+
+# Used when no secret is configured: cursors then only verify in this process.
+_PROCESS_CURSOR_SECRET = secrets.token_bytes(32)
+_warned_missing_secret = False
+
 
 @dataclass
 class PaginationParams:
@@ -55,6 +74,238 @@ class PaginationResult(Generic[T]):
         return self.page > 1
 
 
+class InvalidCursorError(ValueError):
+    """Raised for cursors that are malformed, tampered with, or issued for another sort order."""
+
+
+def _cursor_secret(secret: Optional[Union[str, bytes]]) -> bytes:
+    global _warned_missing_secret
+    if secret is None:
+        secret = os.getenv(CURSOR_SECRET_ENV)
+    if not secret:
+        if not _warned_missing_secret:
+            _warned_missing_secret = True
+            logger.warning(
+                "%s is not set; pagination cursors are only valid within this process", CURSOR_SECRET_ENV
+            )
+        return _PROCESS_CURSOR_SECRET
+    return secret.encode("utf-8") if isinstance(secret, str) else secret
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+_KEY_DECODERS = {"dt": datetime.fromisoformat, "d": date.fromisoformat, "u": UUID, "n": Decimal}
+
+
+def _pack_key_value(value: Any) -> Any:
+    if value is None or value.__class__ in (str, int, float, bool):
+        return value
+    if isinstance(value, datetime):
+        return ["dt", value.isoformat()]
+    if isinstance(value, date):
+        return ["d", value.isoformat()]
+    if isinstance(value, UUID):
+        return ["u", str(value)]
+    if isinstance(value, Decimal):
+        return ["n", str(value)]
+    raise TypeError(f"Unsupported cursor key type: {type(value).__name__}")
+
+
+def _unpack_key_value(value: Any) -> Any:
+    if isinstance(value, list):
+        tag, text = value
+        return _KEY_DECODERS[tag](text)
+    return value
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Decoded keyset position: the sort key of a boundary row, the paging
+    direction and the sort order. ``inclusive`` cursors also return the
+    boundary row itself (used to link back from an empty page).
+    """
+    key: Tuple[Any, ...]
+    direction: str = "next"
+    sort: Tuple[str, ...] = ()
+    descending: bool = False
+    inclusive: bool = False
+    
+    def encode(self, secret: Optional[Union[str, bytes]] = None) -> str:
+        """Return an opaque, HMAC-signed, URL-safe token."""
+        payload = {
+            "k": [_pack_key_value(value) for value in self.key],
+            "d": self.direction,
+            "s": list(self.sort),
+            "o": "desc" if self.descending else "asc",
+            "i": self.inclusive,
+        }
+        body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        signature = hmac.new(_cursor_secret(secret), body.encode("ascii"), hashlib.sha256).digest()[:16]
+        return f"{body}.{_b64encode(signature)}"
+    
+    @classmethod
+    def decode(cls, token: str, secret: Optional[Union[str, bytes]] = None) -> "Cursor":
+        """Verify and decode a token produced by `encode`."""
+        try:
+            body, signature = token.split(".")
+            expected = hmac.new(_cursor_secret(secret), body.encode("ascii"), hashlib.sha256).digest()[:16]
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise InvalidCursorError("Cursor signature mismatch")
+            payload = json.loads(_b64decode(body))
+            cursor = cls(
+                key=tuple(_unpack_key_value(value) for value in payload["k"]),
+                direction=payload["d"],
+                sort=tuple(payload["s"]),
+                descending=payload["o"] == "desc",
+                inclusive=payload["i"],
+            )
+            if payload["o"] not in ("asc", "desc") or not isinstance(cursor.inclusive, bool):
+                raise InvalidCursorError("Malformed cursor")
+        except InvalidCursorError:
+            raise
+        except (ValueError, TypeError, KeyError, AttributeError, UnicodeError):
+            raise InvalidCursorError("Malformed cursor") from None
+        if cursor.direction not in CURSOR_DIRECTIONS:
+            raise InvalidCursorError("Malformed cursor")
+        return cursor
+
+
+@dataclass
+class CursorParams:
+    """
+    Keyset (cursor) pagination parameters: an opaque cursor plus a clamped
+    limit. Unlike OFFSET, the query seeks straight to the cursor's sort key,
+    so deep pages cost the same as the first one. ``sort`` must be a unique
+    ordering (end it with the primary key).
+    """
+    cursor: Optional[str] = None
+    limit: int = 20
+    max_limit: int = 100
+    sort: Tuple[str, ...] = ("created_at", "id")
+    descending: bool = False
+    secret: Optional[Union[str, bytes]] = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        """Clamp the limit and verify the cursor against the sort order."""
+        if self.limit < 1:
+            self.limit = 20
+        if self.limit > self.max_limit:
+            self.limit = self.max_limit
+        self.sort = tuple(self.sort)
+        self.position: Optional[Cursor] = Cursor.decode(self.cursor, self.secret) if self.cursor else None
+        if self.position is not None and (
+            self.position.sort != self.sort
+            or self.position.descending != self.descending
+            or len(self.position.key) != len(self.sort)
+        ):
+            raise InvalidCursorError("Cursor was issued for a different sort order")
+    
+    @property
+    def direction(self) -> str:
+        """``"next"`` (rows after the cursor) or ``"prev"`` (rows before it)."""
+        return self.position.direction if self.position else "next"
+    
+    @property
+    def key(self) -> Optional[Tuple[Any, ...]]:
+        """Sort key of the boundary row, or None for the first page."""
+        return self.position.key if self.position else None
+    
+    @property
+    def inclusive(self) -> bool:
+        """True when the page starts at the boundary row instead of after it."""
+        return self.position.inclusive if self.position else False
+    
+    def get_limit(self) -> int:
+        """Return the page size."""
+        return self.limit
+    
+    def get_fetch_limit(self) -> int:
+        """Rows to fetch: one extra row tells whether another page exists."""
+        return self.limit + 1
+    
+    def keyset_sql(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        placeholder: str = "%s",
+    ) -> Tuple[str, List[Any], str]:
+        """
+        Return ``(where, args, order_by)`` for a row-value keyset query, e.g.
+        ``("(created_at, id) > (%s, %s)", [...], "created_at ASC, id ASC")``.
+        ``where`` is empty on the first page. Column names are inserted
+        verbatim and must come from code, never from the request. Rows come
+        back in scan order; pass them to `CursorResult.from_rows` unchanged.
+        """
+        columns = tuple(columns or self.sort)
+        scan_descending = self.descending != (self.direction == "prev")
+        order_by = ", ".join(f"{column} {'DESC' if scan_descending else 'ASC'}" for column in columns)
+        if self.key is None:
+            return "", [], order_by
+        comparison = ("<" if scan_descending else ">") + ("=" if self.inclusive else "")
+        where = "({}) {} ({})".format(", ".join(columns), comparison, ", ".join([placeholder] * len(columns)))
+        return where, list(self.key), order_by
+
+
+@dataclass
+class CursorResult(Generic[T]):
+    """Keyset-paginated page with opaque cursors to the neighbouring pages."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    
+    def has_next(self) -> bool:
+        """Return True when there is a next page."""
+        return self.next_cursor is not None
+    
+    def has_prev(self) -> bool:
+        """Return True when there is a previous page."""
+        return self.prev_cursor is not None
+    
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[T],
+        params: CursorParams,
+        key: Callable[[T], Sequence[Any]],
+    ) -> "CursorResult[T]":
+        """
+        Build a page from up to ``params.get_fetch_limit()`` rows in the scan
+        order of `CursorParams.keyset_sql`. ``key`` returns a row's sort key,
+        in ``params.sort`` order. An empty page reached through a cursor (the
+        rows past it were deleted) links back with an inclusive cursor, so the
+        boundary row is not skipped.
+        """
+        items = list(rows[:params.limit])
+        more = len(rows) > params.limit
+        backwards = params.direction == "prev"
+        if backwards:
+            items.reverse()
+        
+        def encode(sort_key: Sequence[Any], direction: str, inclusive: bool = False) -> str:
+            cursor = Cursor(tuple(sort_key), direction, params.sort, params.descending, inclusive)
+            return cursor.encode(params.secret)
+        
+        if not items:
+            if params.key is None:
+                return cls(items)
+            if backwards:
+                return cls(items, next_cursor=encode(params.key, "next", inclusive=True))
+            return cls(items, prev_cursor=encode(params.key, "prev", inclusive=True))
+        has_next = params.key is not None if backwards else more
+        has_prev = more if backwards else params.key is not None
+        return cls(
+            items,
+            next_cursor=encode(key(items[-1]), "next") if has_next else None,
+            prev_cursor=encode(key(items[0]), "prev") if has_prev else None,
+        )
+
+
 @dataclass
 class ApiResponse:
     """Simple API response envelope."""
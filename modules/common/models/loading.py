@@ -0,0 +1,295 @@
+"""
+Per-class compiled loaders behind `BaseModel.from_dict`.
+
+`loader_for(cls, unknown)` generates one function per dataclass that reads
+each field from the input mapping, applies defaults, validates the value
+against the field's type hint and coerces the common wire formats:
+
+- ISO-8601 strings to ``datetime``/``date`` (a trailing ``Z`` is accepted),
+- strings to ``UUID`` and ``Decimal``, ints to ``float``,
+- raw values to ``Enum`` members, dicts to nested dataclasses,
+- items of ``List[...]``/``Dict[..., ...]`` containers, and JSON lists to
+  tuples and sets.
+
+Values already of the expected type are passed through without a call.
+The instance is built by calling the class with keyword arguments, so the
+input dict is never copied. Keys that are not fields are ignored,
+collected into the model's extra field, or rejected, depending on
+``unknown``.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import enum
+import typing
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from uuid import UUID
+
+UNKNOWN_MODES = ("ignore", "collect", "raise")
+
+_LOADERS_ATTRIBUTE = "__model_loaders__"
+
+_NONE_TYPE = type(None)
+
+Converter = Callable[[Any], Any]
+Loader = Callable[[Dict[str, Any]], Any]
+
+
+class ModelValidationError(ValueError):
+    """Raised when input data cannot be loaded into a model."""
+
+
+def _parse_datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        if value.endswith(("Z", "z")):
+            value = value[:-1] + "+00:00"
+        return datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value
+    raise TypeError(f"expected datetime or ISO string, got {type(value).__name__}")
+
+
+def _parse_date(value: Any) -> date:
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        raise TypeError(f"expected date or ISO string, got {type(value).__name__}")
+    return date.fromisoformat(value)
+
+
+def _parse_uuid(value: Any) -> UUID:
+    if isinstance(value, str):
+        return UUID(value)
+    if isinstance(value, UUID):
+        return value
+    raise TypeError(f"expected UUID or string, got {type(value).__name__}")
+
+
+def _parse_decimal(value: Any) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise TypeError(f"expected Decimal, number or string, got {type(value).__name__}")
+    try:
+        return Decimal(str(value) if isinstance(value, float) else value)
+    except InvalidOperation:
+        raise ValueError(f"invalid decimal {value!r}") from None
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"expected float, got {type(value).__name__}")
+    return float(value)
+
+
+def _instance_of(expected: Union[type, Tuple[type, ...]]) -> Converter:
+    def check(value: Any) -> Any:
+        # bool is an int subclass, but a bool is never a valid int.
+        if isinstance(value, expected) and not (isinstance(value, bool) and expected is int):
+            return value
+        name = expected.__name__ if isinstance(expected, type) else " | ".join(t.__name__ for t in expected)
+        raise TypeError(f"expected {name}, got {type(value).__name__}")
+    return check
+
+
+def _enum_converter(enum_cls: type) -> Converter:
+    def convert(value: Any) -> Any:
+        return enum_cls(value)
+    return convert
+
+
+def _dataclass_converter(model_cls: type) -> Converter:
+    def convert(value: Any) -> Any:
+        if not isinstance(value, dict):
+            raise TypeError(f"expected {model_cls.__name__} or dict, got {type(value).__name__}")
+        return loader_for(model_cls)(value)
+    return convert
+
+
+def _list_converter(item: Optional[Tuple[frozenset, Converter]]) -> Converter:
+    def convert(value: Any) -> Any:
+        if not isinstance(value, (list, tuple)):
+            raise TypeError(f"expected list, got {type(value).__name__}")
+        if item is None:
+            return value if isinstance(value, list) else list(value)
+        fast, item_convert = item
+        return [entry if entry.__class__ in fast else item_convert(entry) for entry in value]
+    return convert
+
+
+def _collection_converter(collection: type) -> Converter:
+    # JSON has no tuples or sets: accept any of the built-in collections.
+    def convert(value: Any) -> Any:
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            raise TypeError(f"expected {collection.__name__}, got {type(value).__name__}")
+        return collection(value)
+    return convert
+
+
+def _dict_converter(item: Optional[Tuple[frozenset, Converter]]) -> Converter:
+    def convert(value: Any) -> Any:
+        if not isinstance(value, dict):
+            raise TypeError(f"expected dict, got {type(value).__name__}")
+        if item is None:
+            return value
+        fast, item_convert = item
+        return {key: entry if entry.__class__ in fast else item_convert(entry) for key, entry in value.items()}
+    return convert
+
+
+_SCALARS: Dict[type, Converter] = {
+    datetime: _parse_datetime,
+    date: _parse_date,
+    UUID: _parse_uuid,
+    Decimal: _parse_decimal,
+    float: _to_float,
+}
+
+
+def _converter(annotation: Any) -> Optional[Tuple[frozenset, Converter]]:
+    """
+    ``(types that pass through unchanged, converter)`` for a type hint, or
+    None when the hint cannot be checked (``Any``, type variables, ...).
+    """
+    origin = typing.get_origin(annotation)
+    if origin is Union:
+        members = typing.get_args(annotation)
+        non_none = [member for member in members if member is not _NONE_TYPE]
+        if len(non_none) == 1:
+            inner = _converter(non_none[0])
+            if inner is None:
+                return None
+            fast, convert = inner
+            return fast | {_NONE_TYPE}, convert
+        if all(isinstance(member, type) for member in members):
+            return frozenset(members), _instance_of(tuple(members))
+        return None
+    if origin is list or annotation is list:
+        args = typing.get_args(annotation)
+        return frozenset(), _list_converter(_converter(args[0]) if args else None)
+    if origin is dict or annotation is dict:
+        args = typing.get_args(annotation)
+        return frozenset(), _dict_converter(_converter(args[1]) if len(args) == 2 else None)
+    if origin in (tuple, set, frozenset) or annotation in (tuple, set, frozenset):
+        collection = origin or annotation
+        return frozenset({collection}), _collection_converter(collection)
+    if origin is not None:
+        return (frozenset({origin}), _instance_of(origin)) if isinstance(origin, type) else None
+    if not isinstance(annotation, type) or annotation is typing.Any:
+        return None
+    if annotation in _SCALARS:
+        return frozenset({annotation}), _SCALARS[annotation]
+    if issubclass(annotation, enum.Enum):
+        return frozenset({annotation}), _enum_converter(annotation)
+    if dataclasses.is_dataclass(annotation):
+        return frozenset({annotation}), _dataclass_converter(annotation)
+    if annotation is object:
+        return None
+    return frozenset({annotation}), _instance_of(annotation)
+
+
+def _type_hints(cls: type) -> Dict[str, Any]:
+    try:
+        return typing.get_type_hints(cls)
+    except Exception:  # unresolvable forward references: only check resolved annotations
+        return {
+            model_field.name: model_field.type
+            for model_field in dataclasses.fields(cls)
+            if not isinstance(model_field.type, str)
+        }
+
+
+def _compile_loader(cls: type, unknown: str) -> Loader:
+    model_fields = dataclasses.fields(cls)
+    hints = _type_hints(cls)
+    extra_field = getattr(cls, "__extra_field__", "extra")
+    if unknown == "collect" and extra_field not in {model_field.name for model_field in model_fields if model_field.init}:
+        raise TypeError(f"{cls.__name__} needs a dict field {extra_field!r} to collect unknown keys")
+
+    namespace: Dict[str, Any] = {
+        "cls": cls,
+        "MISSING": dataclasses.MISSING,
+        "Error": ModelValidationError,
+        "handle_unknown": _unknown_handler(cls, unknown, frozenset(model_field.name for model_field in model_fields)),
+    }
+    lines = ["def load(data):", "    hits = 0"]
+    arguments = []
+    for index, model_field in enumerate(model_fields):
+        name = model_field.name
+        variable = f"v{index}"
+        lines.append(f"    {variable} = data.get({name!r}, MISSING)")
+        if not model_field.init:
+            # Output of to_dict() includes init=False fields; accept and drop them.
+            lines.append(f"    if {variable} is not MISSING: hits += 1")
+            continue
+        lines.append(f"    if {variable} is MISSING:")
+        if model_field.default is not dataclasses.MISSING:
+            namespace[f"D{index}"] = model_field.default
+            lines.append(f"        {variable} = D{index}")
+        elif model_field.default_factory is not dataclasses.MISSING:
+            namespace[f"F{index}"] = model_field.default_factory
+            lines.append(f"        {variable} = F{index}()")
+        else:
+            lines.append(f"        raise Error({cls.__name__ + '.' + name + ': field is required'!r})")
+        lines.append("    else:")
+        lines.append("        hits += 1")
+        converter = _converter(hints[name]) if name in hints else None
+        if converter is not None:
+            namespace[f"T{index}"], namespace[f"C{index}"] = converter
+            lines.append(f"        if {variable}.__class__ not in T{index}:")
+            lines.append("            try:")
+            lines.append(f"                {variable} = C{index}({variable})")
+            lines.append("            except (TypeError, ValueError) as exc:")
+            message = f"{cls.__name__}.{name}: "
+            lines.append(f"                raise Error({message!r} + str(exc)) from None")
+        arguments.append(f"{name}={variable}")
+    lines.append("    if hits != len(data):")
+    if unknown == "collect":
+        index = next(i for i, model_field in enumerate(model_fields) if model_field.name == extra_field)
+        lines.append(f"        v{index} = handle_unknown(data, v{index})")
+    else:
+        lines.append("        handle_unknown(data, None)")
+    lines.append(f"    return cls({', '.join(arguments)})")
+    exec("\n".join(lines), namespace)  # noqa: S102 - source is built from dataclass field names only
+    load = namespace["load"]
+    load.__qualname__ = f"{cls.__qualname__}.load"
+    return load
+
+
+def _unknown_handler(cls: type, unknown: str, known: frozenset) -> Callable[[Dict[str, Any], Any], Any]:
+    def handle(data: Dict[str, Any], collected: Any) -> Any:
+        extras = {key: value for key, value in data.items() if key not in known}
+        if unknown == "raise" and extras:
+            raise ModelValidationError(f"{cls.__name__}: unknown field(s) {', '.join(map(str, extras))}")
+        if unknown == "collect":
+            collected = dict(collected) if collected else {}
+            collected.update(extras)
+        return collected
+    return handle
+
+
+def loader_for(cls: type, unknown: Optional[str] = None) -> Loader:
+    """
+    Return the compiled ``dict -> instance`` loader for a dataclass. ``unknown``
+    defaults to the class attribute ``__unknown_fields__`` (``"ignore"``).
+    """
+    if unknown is None:
+        unknown = getattr(cls, "__unknown_fields__", "ignore")
+    if unknown not in UNKNOWN_MODES:
+        raise ValueError(f"unknown must be one of {UNKNOWN_MODES}, got {unknown!r}")
+    loaders = cls.__dict__.get(_LOADERS_ATTRIBUTE)
+    if loaders is None:
+        loaders = {}
+        setattr(cls, _LOADERS_ATTRIBUTE, loaders)
+    loader = loaders.get(unknown)
+    if loader is None:
+        loader = loaders[unknown] = _compile_loader(cls, unknown)
+    return loader
+
+
+def load_models(cls: type, rows: Iterable[Dict[str, Any]], unknown: Optional[str] = None) -> List[Any]:
+    """Load many dicts (DB rows, parsed JSON) with one compiled loader."""
+    return list(map(loader_for(cls, unknown), rows))
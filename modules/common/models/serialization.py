@@ -0,0 +1,166 @@
+"""
+Per-class compiled serializers for dataclass models.
+
+`dataclasses.asdict` walks every field through reflection and deep-copies
+each value on every call. `serializers_for(cls)` instead generates two plain
+functions from the class's fields once, and caches them on the class:
+
+- ``to_dict``: same result as ``asdict``. Immutable values (str, numbers,
+  datetime, UUID, Enum, ...) are passed through without copying; containers
+  and nested dataclasses are still copied recursively, like ``asdict`` does.
+- ``to_json_dict``: a JSON-ready dict equal to what ``json.dumps(...,
+  default=str)`` would have produced, so no ``default`` callback is needed.
+
+`dumps` uses the stdlib encoder by default (byte-for-byte compatible with
+the previous ``to_json``); ``compact=True`` switches to compact separators and
+to orjson when it is installed.
+"""
+
+from __future__ import annotations
+
+import copy
+import dataclasses
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Values that asdict() would deep-copy into an equal, immutable value.
+ATOMIC_TYPES = frozenset({
+    str, int, float, bool, type(None), bytes, complex,
+    datetime, date, time, timedelta, UUID, Decimal,
+})
+# Values the json module encodes without calling `default`.
+JSON_NATIVE_TYPES = frozenset({str, int, float, bool, type(None)})
+
+Serializer = Callable[[Any], Dict[str, Any]]
+
+_CACHE_ATTRIBUTE = "__model_serializers__"
+
+
+def _asdict_value(value: Any) -> Any:
+    """Copy one value the way `dataclasses.asdict` does."""
+    cls = value.__class__
+    if cls in ATOMIC_TYPES or isinstance(value, Enum):
+        return value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return serializers_for(cls)[0](value)
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return cls(*[_asdict_value(item) for item in value])
+    if isinstance(value, (list, tuple)):
+        return cls(_asdict_value(item) for item in value)
+    if isinstance(value, dict):
+        return cls((_asdict_value(key), _asdict_value(item)) for key, item in value.items())
+    return copy.deepcopy(value)
+
+
+def _json_value(value: Any) -> Any:
+    """Convert an asdict-style value into what ``json.dumps(default=str)`` would encode."""
+    cls = value.__class__
+    if cls in JSON_NATIVE_TYPES:
+        return value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return serializers_for(cls)[1](value)
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    # The json module encodes str/int/float subclasses (e.g. str/int Enums) by
+    # their underlying value, and everything else through `default=str`.
+    if isinstance(value, str):
+        return str.__str__(value)
+    if isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        return float(value)
+    return str(value)
+
+
+def _json_from_asdict_value(value: Any) -> Any:
+    """Serialize a raw field value straight to its JSON form (fields may hold nested dataclasses)."""
+    cls = value.__class__
+    if cls in JSON_NATIVE_TYPES:
+        return value
+    if cls in ATOMIC_TYPES or isinstance(value, Enum):
+        return _json_value(value)
+    return _json_value(_asdict_value(value))
+
+
+def _compile(cls: type, name: str, fast_types: str, convert: Callable) -> Serializer:
+    names = [field.name for field in dataclasses.fields(cls)]
+    lines = [f"def {name}(self):"]
+    for index, field_name in enumerate(names):
+        lines.append(f"    v{index} = self.{field_name}")
+    items = ", ".join(
+        f"{field_name!r}: v{index} if v{index}.__class__ in FAST else convert(v{index})"
+        for index, field_name in enumerate(names)
+    )
+    lines.append(f"    return {{{items}}}")
+    namespace: Dict[str, Any] = {"FAST": fast_types, "convert": convert}
+    exec("\n".join(lines), namespace)  # noqa: S102 - source is built from dataclass field names only
+    function = namespace[name]
+    function.__qualname__ = f"{cls.__qualname__}.{name}"
+    return function
+
+
+def serializers_for(cls: type) -> Tuple[Serializer, Serializer]:
+    """Return ``(to_dict, to_json_dict)`` for a dataclass, compiling them on first use."""
+    cached = cls.__dict__.get(_CACHE_ATTRIBUTE)
+    if cached is None:
+        cached = (
+            _compile(cls, "to_dict", ATOMIC_TYPES, _asdict_value),
+            _compile(cls, "to_json_dict", JSON_NATIVE_TYPES, _json_from_asdict_value),
+        )
+        setattr(cls, _CACHE_ATTRIBUTE, cached)
+    return cached
+
+
+def dumps(obj: Any, *, compact: bool = False) -> str:
+    """
+    Encode a JSON-ready object. The default output matches ``json.dumps(...,
+    ensure_ascii=False)``; ``compact=True`` drops whitespace and uses orjson
+    when available.
+    """
+    if compact:
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+            except TypeError:  # e.g. integers wider than 64 bits
+                pass
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def dump_models(models: Iterable[Any]) -> List[Dict[str, Any]]:
+    """``to_dict`` for a list of models, reusing each class's compiled serializer."""
+    results = []
+    current_cls = None
+    to_dict = None
+    for model in models:
+        if model.__class__ is not current_cls:
+            current_cls = model.__class__
+            to_dict = serializers_for(current_cls)[0]
+        results.append(to_dict(model))
+    return results
+
+
+def dumps_models(models: Iterable[Any], *, compact: bool = False) -> str:
+    """Serialize a list of models to a JSON array in one encoder call."""
+    items = []
+    current_cls = None
+    to_json_dict = None
+    for model in models:
+        if model.__class__ is not current_cls:
+            current_cls = model.__class__
+            to_json_dict = serializers_for(current_cls)[1]
+        items.append(to_json_dict(model))
+    return dumps(items, compact=compact)
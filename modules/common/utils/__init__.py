@@ -27,6 +27,29 @@ from .encryption import (
     verify_password,
     encrypt_data,
     decrypt_data,
+    encrypt_many,
+    decrypt_many,
+    rotate_data,
+    get_encryption_context,
+    clear_encryption_cache,
+    BlindIndex,
+    blind_index,
+)
+from .stream_encryption import (
+    StreamIntegrityError,
+    encrypt_iter,
+    decrypt_iter,
+    encrypt_stream,
+    decrypt_stream,
+    encrypt_file,
+    decrypt_file,
+    encrypt_bytes,
+    decrypt_bytes,
+)
+from .password_hashing import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    calibrate_iterations,
 )
 
 __all__ = [
@@ -50,5 +73,24 @@ __all__ = [
     'verify_password',
     'encrypt_data',
     'decrypt_data',
+    'encrypt_many',
+    'decrypt_many',
+    'rotate_data',
+    'get_encryption_context',
+    'clear_encryption_cache',
+    'BlindIndex',
+    'blind_index',
+    'StreamIntegrityError',
+    'encrypt_iter',
+    'decrypt_iter',
+    'encrypt_stream',
+    'decrypt_stream',
+    'encrypt_file',
+    'decrypt_file',
+    'encrypt_bytes',
+    'decrypt_bytes',
+    'PasswordHasher',
+    'PasswordHasherBusy',
+    'calibrate_iterations',
 ]
 
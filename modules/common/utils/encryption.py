@@ -10,16 +10,30 @@ import base64
 import os
 import secrets
 import hashlib
-from dataclasses import dataclass
-from typing import Optional
+import hmac
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 # PBKDF2 默认配置
 PBKDF2_ALGORITHM = "sha256"
 PBKDF2_ITERATIONS = 600_000
 PBKDF2_SALT_BYTES = 16
 
+# 加密 key 配置：当前 key 与仍可解密的旧 key（逗号分隔，用于轮换）
+ENCRYPTION_KEY_ENV = "TEMPLATEAI_ENCRYPTION_KEY"
+PREVIOUS_KEYS_ENV = "TEMPLATEAI_ENCRYPTION_PREVIOUS_KEYS"
+# 可选：盲索引使用独立的 key 环；未设置时从加密 key 经 HKDF 派生（不同 info，互不可推）
+BLIND_INDEX_KEY_ENV = "TEMPLATEAI_BLIND_INDEX_KEY"
+CONTEXT_CACHE_SIZE = 64
+
+SecretSpec = Union[str, Sequence[str], None]
+
 
 def _encode_bytes(data: bytes) -> str:
     """将字节序列做 url-safe 的 base64 编码。"""
@@ -68,28 +82,91 @@ def verify_password(password: str, hashed_password: str) -> bool:
         return False
 
 
+def _derive_key(secret: str) -> bytes:
+    """把 secret 归一化为 Fernet key：合法的 32 字节 base64 key 原样使用，其余按明文处理。"""
+    try:
+        if len(_decode_bytes(secret)) == 32:
+            return secret.encode("utf-8")
+    except Exception:
+        pass
+    # 兼容直接传入明文，使用 sha256 归一化后转成 Fernet key
+    return base64.urlsafe_b64encode(hashlib.sha256(secret.encode("utf-8")).digest())
+
+
 @dataclass
 class EncryptionContext:
-    """包装 Fernet key 的 helper，避免重复推导。"""
+    """包装 Fernet key 的 helper，避免重复推导；cipher 对象只构建一次。"""
     key: bytes
+    # 轮换后仍可解密的旧 key（只用于解密）
+    previous_keys: Tuple[bytes, ...] = ()
+    _cipher: Optional[Union[Fernet, MultiFernet]] = field(default=None, init=False, repr=False, compare=False)
 
     @classmethod
-    def from_secret(cls, secret: Optional[str] = None) -> "EncryptionContext":
-        # 尝试从环境变量读取
-        secret = secret or os.environ.get("TEMPLATEAI_ENCRYPTION_KEY")
-        if secret is None:
-            raise ValueError("Missing encryption key. Set TEMPLATEAI_ENCRYPTION_KEY or pass `secret`.")
-        
-        try:
-            key_bytes = _decode_bytes(secret)
-        except Exception:
-            # 兼容直接传入明文，使用 sha256 归一化后转成 Fernet key
-            key_bytes = hashlib.sha256(secret.encode("utf-8")).digest()
-            key_bytes = base64.urlsafe_b64encode(key_bytes)
-        return cls(key=key_bytes)
+    def from_secret(cls, secret: SecretSpec = None) -> "EncryptionContext":
+        """
+        由 secret 推导 key。secret 可以是单个字符串，或 [当前 key, 旧 key...] 序列；
+        未传入时读取 TEMPLATEAI_ENCRYPTION_KEY 与 TEMPLATEAI_ENCRYPTION_PREVIOUS_KEYS。
+        """
+        secrets_ = _resolve_secrets(secret)
+        keys = [_derive_key(item) for item in secrets_]
+        return cls(key=keys[0], previous_keys=tuple(keys[1:]))
+
+    def cipher(self) -> Union[Fernet, MultiFernet]:
+        if self._cipher is None:
+            primary = Fernet(self.key)
+            if self.previous_keys:
+                self._cipher = MultiFernet([primary] + [Fernet(key) for key in self.previous_keys])
+            else:
+                self._cipher = primary
+        return self._cipher
+
+    def rotate(self, token: str) -> str:
+        """用当前 key 重新加密一个（可能由旧 key 加密的）token。"""
+        cipher = self.cipher()
+        if isinstance(cipher, Fernet):
+            # 单 key 时解密再加密，保证 token 有效并刷新时间戳
+            return cipher.encrypt(cipher.decrypt(token.encode("utf-8"))).decode("utf-8")
+        return cipher.rotate(token.encode("utf-8")).decode("utf-8")
+
 
-    def cipher(self) -> Fernet:
-        return Fernet(self.key)
+def _resolve_secrets(secret: SecretSpec) -> Tuple[str, ...]:
+    if isinstance(secret, str) and secret:
+        return (secret,)
+    if secret:
+        return tuple(secret)
+    current = os.environ.get(ENCRYPTION_KEY_ENV)
+    if not current:
+        raise ValueError("Missing encryption key. Set TEMPLATEAI_ENCRYPTION_KEY or pass `secret`.")
+    previous = os.environ.get(PREVIOUS_KEYS_ENV, "")
+    return (current,) + tuple(item for item in previous.split(",") if item)
+
+
+_context_cache: "OrderedDict[bytes, EncryptionContext]" = OrderedDict()
+_context_lock = threading.Lock()
+
+
+def get_encryption_context(secret: SecretSpec = None) -> EncryptionContext:
+    """
+    返回进程级缓存的 EncryptionContext，缓存 key 是 secret 的 SHA-256 指纹，
+    因此 key 推导与 cipher 构建对同一 secret 只发生一次。
+    """
+    secrets_ = _resolve_secrets(secret)
+    fingerprint = hashlib.sha256("\0".join(secrets_).encode("utf-8")).digest()
+    ctx = _context_cache.get(fingerprint)
+    if ctx is None:
+        ctx = EncryptionContext.from_secret(secrets_)
+        ctx.cipher()
+        with _context_lock:
+            _context_cache[fingerprint] = ctx
+            if len(_context_cache) > CONTEXT_CACHE_SIZE:
+                _context_cache.popitem(last=False)
+    return ctx
+
+
+def clear_encryption_cache():
+    """清空 context 缓存（例如 key 轮换或测试后）。"""
+    with _context_lock:
+        _context_cache.clear()
 
 
 def encrypt_data(data: str, *, secret: Optional[str] = None) -> str:
@@ -99,7 +176,7 @@ def encrypt_data(data: str, *, secret: Optional[str] = None) -> str:
     if not isinstance(data, str):
         raise ValueError("data must be a string")
     
-    ctx = EncryptionContext.from_secret(secret)
+    ctx = get_encryption_context(secret)
     token = ctx.cipher().encrypt(data.encode("utf-8"))
     return token.decode("utf-8")
 
@@ -112,10 +189,141 @@ def decrypt_data(encrypted_data: str, *, secret: Optional[str] = None, default:
         return default
     
     try:
-        ctx = EncryptionContext.from_secret(secret)
+        ctx = get_encryption_context(secret)
         decrypted = ctx.cipher().decrypt(encrypted_data.encode("utf-8"))
         return decrypted.decode("utf-8")
     except (InvalidToken, ValueError):
         return default
 
 
+def encrypt_many(values: Iterable[str], *, secret: SecretSpec = None) -> List[str]:
+    """批量加密：整批复用同一个 cipher。"""
+    encrypt = get_encryption_context(secret).cipher().encrypt
+    results = []
+    for value in values:
+        if not isinstance(value, str):
+            raise ValueError("data must be a string")
+        results.append(encrypt(value.encode("utf-8")).decode("utf-8"))
+    return results
+
+
+def decrypt_many(tokens: Iterable[str], *, secret: SecretSpec = None, default: str = "") -> List[str]:
+    """批量解密：整批复用同一个 cipher，单条失败时该位置返回 default。"""
+    decrypt = get_encryption_context(secret).cipher().decrypt
+    results = []
+    for token in tokens:
+        try:
+            results.append(decrypt(token.encode("utf-8")).decode("utf-8") if token else default)
+        except (InvalidToken, ValueError):
+            results.append(default)
+    return results
+
+
+def rotate_data(encrypted_data: str, *, secret: SecretSpec = None) -> str:
+    """用当前 key 重新加密由旧 key 加密的数据（secret 需包含旧 key）。"""
+    return get_encryption_context(secret).rotate(encrypted_data)
+
+
+class BlindIndex:
+    """
+    加密列的盲索引：对（规范化后的）明文做 HMAC-SHA256 并截断，得到确定性的查找 token，
+    可在数据库中建普通索引做等值查询，而密文本身仍是随机的 Fernet token。
+
+    - 每列使用独立的 HMAC key（HKDF 以 column 为 info 派生），不同列的相同值不会关联；
+    - index key 与加密 key 分离：优先使用 `index_secret` / TEMPLATEAI_BLIND_INDEX_KEY，
+      否则从加密 key 环派生；
+    - `bits` 截断长度越短泄露越少但碰撞越多，查询结果需解密后二次确认；
+    - key 轮换期间用 `lookup_tokens` 同时查新旧 token，并用 `reindex` 分批重建。
+    """
+
+    def __init__(
+        self,
+        column: str,
+        *,
+        secret: SecretSpec = None,
+        index_secret: SecretSpec = None,
+        bits: int = 64,
+        normalizer: Optional[Callable[[str], str]] = None,
+    ):
+        if bits % 8 or not 8 <= bits <= 256:
+            raise ValueError("bits must be a multiple of 8 between 8 and 256")
+        self.column = column
+        self.secret = secret
+        self.bits = bits
+        self.normalizer = normalizer
+        if index_secret is None and os.environ.get(BLIND_INDEX_KEY_ENV):
+            index_secret = [item for item in os.environ[BLIND_INDEX_KEY_ENV].split(",") if item]
+        if index_secret is not None:
+            masters = [_derive_key(item) for item in _resolve_secrets(index_secret)]
+        else:
+            ctx = get_encryption_context(secret)
+            masters = [ctx.key, *ctx.previous_keys]
+        info = b"templateai/blind-index/v1:" + column.encode("utf-8")
+        # 预先构建 HMAC 原型，每次计算只需 copy()
+        self._prototypes = [
+            hmac.new(
+                HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info).derive(master),
+                digestmod=hashlib.sha256,
+            )
+            for master in masters
+        ]
+
+    def _token(self, prototype: "hmac.HMAC", value: str) -> str:
+        if self.normalizer is not None:
+            value = self.normalizer(value)
+        mac = prototype.copy()
+        mac.update(value.encode("utf-8"))
+        return _encode_bytes(mac.digest()[:self.bits // 8]).rstrip("=")
+
+    def compute(self, value: str) -> str:
+        """用当前 key 计算 value 的盲索引 token。"""
+        return self._token(self._prototypes[0], value)
+
+    def compute_many(self, values: Iterable[str]) -> List[str]:
+        prototype = self._prototypes[0]
+        return [self._token(prototype, value) for value in values]
+
+    def lookup_tokens(self, value: str) -> List[str]:
+        """返回当前 key 与所有旧 key 下的 token，轮换期间用 `IN (...)` 查询。"""
+        return list(dict.fromkeys(self._token(prototype, value) for prototype in self._prototypes))
+
+    def reindex(
+        self,
+        rows: Iterable[Tuple[Any, str]],
+        *,
+        batch_size: int = 1000,
+    ) -> Iterator[List[Tuple[Any, Optional[str]]]]:
+        """
+        key 轮换时分批重建索引：rows 为 (row_id, 密文)，按批解密（可用旧 key 解密）后
+        用当前 key 计算新 token，逐批产出 [(row_id, token)]；无法解密的行 token 为 None。
+        """
+        batch: List[Tuple[Any, str]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield self._reindex_batch(batch)
+                batch = []
+        if batch:
+            yield self._reindex_batch(batch)
+
+    def _reindex_batch(self, batch: List[Tuple[Any, str]]) -> List[Tuple[Any, Optional[str]]]:
+        decrypt = get_encryption_context(self.secret).cipher().decrypt
+        results: List[Tuple[Any, Optional[str]]] = []
+        for row_id, token in batch:
+            try:
+                results.append((row_id, self.compute(decrypt(token.encode("utf-8")).decode("utf-8"))))
+            except (InvalidToken, ValueError, AttributeError):
+                results.append((row_id, None))
+        return results
+
+
+def blind_index(
+    value: str,
+    *,
+    column: str = "",
+    secret: SecretSpec = None,
+    bits: int = 64,
+    normalizer: Optional[Callable[[str], str]] = None,
+) -> str:
+    """计算单个值的盲索引 token（批量场景请复用 `BlindIndex`）。"""
+    return BlindIndex(column, secret=secret, bits=bits, normalizer=normalizer).compute(value)
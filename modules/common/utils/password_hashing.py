@@ -0,0 +1,176 @@
+"""
+Off-request-thread password hashing with bounded concurrency.
+
+`hash_password`/`verify_password` are CPU-bound PBKDF2 calls. `PasswordHasher`
+runs them on a worker pool (threads by default: ``hashlib.pbkdf2_hmac``
+releases the GIL; a process pool is available too), caps how many hashes may
+be queued so a login storm is shed instead of starving the server, and
+upgrades stored hashes whose iteration count is below the current policy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from .encryption import PBKDF2_ALGORITHM, PBKDF2_ITERATIONS, hash_password, verify_password
+
+EXECUTORS = ("thread", "process")
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when the hashing queue is full (map it to HTTP 429/503)."""
+
+
+def calibrate_iterations(
+    target_ms: float = 250.0,
+    *,
+    sample_iterations: int = 100_000,
+    min_iterations: int = PBKDF2_ITERATIONS,
+    max_iterations: int = 10_000_000,
+) -> int:
+    """
+    Return the PBKDF2 iteration count that takes about ``target_ms`` on this
+    machine, clamped to ``[min_iterations, max_iterations]`` and rounded to
+    the nearest 10k. The floor keeps slow hardware at the recommended minimum.
+    """
+    salt = os.urandom(16)
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        hashlib.pbkdf2_hmac(PBKDF2_ALGORITHM, b"calibration", salt, sample_iterations)
+        best = min(best, time.perf_counter() - start)
+    iterations = int(sample_iterations * (target_ms / 1000) / best)
+    iterations = max(min_iterations, min(max_iterations, iterations))
+    return round(iterations, -4)
+
+
+def hash_iterations(hashed_password: str) -> Optional[int]:
+    """Return the iteration count stored in a PBKDF2 hash (None if unparseable)."""
+    try:
+        scheme, iterations, _, _ = hashed_password.split("$")
+        return int(iterations) if scheme == "pbkdf2_sha256" else None
+    except (AttributeError, ValueError):
+        return None
+
+
+def _hash_with_iterations(password: str, iterations: int) -> str:
+    # Module-level so it can be pickled for the process pool.
+    return hash_password(password, iterations=iterations)
+
+
+class PasswordHasher:
+    """
+    Bounded, pool-backed password hashing service.
+
+    At most ``max_pending`` hashes may be running or queued. Synchronous
+    callers wait up to ``queue_timeout`` seconds for a slot. Coroutines never
+    block the event loop: they get `PasswordHasherBusy` as soon as the queue
+    is full.
+    """
+
+    def __init__(
+        self,
+        iterations: Optional[int] = None,
+        *,
+        target_ms: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        max_pending: int = 64,
+        queue_timeout: float = 5.0,
+        executor: str = "thread",
+    ):
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}, got {executor!r}")
+        if iterations is None:
+            iterations = calibrate_iterations(target_ms) if target_ms else PBKDF2_ITERATIONS
+        self.iterations = iterations
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.executor_kind = executor
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self.rejected = 0
+
+    # --- Pool management ---------------------------------------------------
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.executor_kind == "process":
+                        self._executor = ProcessPoolExecutor(self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _submit(self, blocking: bool, func: Callable, *args) -> Future:
+        acquired = self._slots.acquire(timeout=self.queue_timeout) if blocking else self._slots.acquire(False)
+        if not acquired:
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many password hashing requests in flight")
+        try:
+            future = self._pool().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self, wait: bool = True):
+        """Shut the worker pool down."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def __enter__(self) -> "PasswordHasher":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # --- Policy --------------------------------------------------------------
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when the stored hash uses fewer iterations than the current policy."""
+        iterations = hash_iterations(hashed_password)
+        return iterations is None or iterations < self.iterations
+
+    # --- Synchronous API -----------------------------------------------------
+    def hash(self, password: str) -> str:
+        return self._submit(True, _hash_with_iterations, password, self.iterations).result()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._submit(True, verify_password, password, hashed_password).result()
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a login; when it succeeds and the stored cost is outdated, also
+        return a fresh hash to persist. Returns ``(valid, new_hash_or_None)``.
+        """
+        if not self.verify(password, hashed_password):
+            return False, None
+        return True, self.hash(password) if self.needs_rehash(hashed_password) else None
+
+    def hash_many(self, passwords: Iterable[str]) -> List[str]:
+        """Hash a batch in parallel across the pool (e.g. bulk user imports)."""
+        futures = [self._submit(True, _hash_with_iterations, password, self.iterations) for password in passwords]
+        return [future.result() for future in futures]
+
+    # --- Asynchronous API ----------------------------------------------------
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(False, _hash_with_iterations, password, self.iterations))
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(False, verify_password, password, hashed_password))
+
+    async def verify_and_update_async(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        if not await self.verify_async(password, hashed_password):
+            return False, None
+        if not self.needs_rehash(hashed_password):
+            return True, None
+        return True, await self.hash_async(password)
@@ -0,0 +1,232 @@
+"""
+Chunked, authenticated streaming encryption (AES-256-GCM) for large payloads.
+
+Format::
+
+    header  = b"TAES" | version (1) | key id (4) | chunk size (4) | salt (16)
+    segment = AES-GCM(stream key, nonce = counter (11) | final flag (1), aad = header)
+
+Each stream derives its own key from the master key with HKDF and a random
+salt, so the per-segment nonce can simply be a counter. The counter stops
+segments from being reordered or dropped, and the final flag stops the stream
+from being truncated. Because the header is the AAD of every segment, it is
+authenticated too. Memory use is bounded by the chunk size; plaintext is raw
+bytes, with no text or base64 round trip.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import itertools
+import os
+import secrets
+import struct
+from typing import BinaryIO, Iterable, Iterator, Tuple, Union
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from .encryption import SecretSpec, get_encryption_context
+
+MAGIC = b"TAES"
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+SALT_BYTES = 16
+TAG_BYTES = 16
+
+_HEADER = struct.Struct(">4sB4sI16s")
+HEADER_BYTES = _HEADER.size
+
+_HKDF_INFO = b"templateai/stream-encryption/v1"
+
+
+class StreamIntegrityError(ValueError):
+    """The stream is malformed, truncated, reordered, tampered with, or uses an unknown key."""
+
+
+def _master_keys(secret: SecretSpec) -> Tuple[bytes, ...]:
+    ctx = get_encryption_context(secret)
+    return tuple(base64.urlsafe_b64decode(key) for key in (ctx.key,) + ctx.previous_keys)
+
+
+def _key_id(master: bytes) -> bytes:
+    return hashlib.sha256(b"stream-key-id" + master).digest()[:4]
+
+
+def _stream_cipher(master: bytes, salt: bytes) -> AESGCM:
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=_HKDF_INFO)
+    return AESGCM(hkdf.derive(master))
+
+
+def _nonce(counter: int, final: bool) -> bytes:
+    return counter.to_bytes(11, "big") + (b"\x01" if final else b"\x00")
+
+
+def _rechunk(chunks: Iterable[bytes], size: int) -> Iterator[bytes]:
+    """
+    Yield exactly ``size`` bytes at a time (zero-copy views where possible),
+    then the remainder, which is always shorter than ``size`` and may be empty.
+    """
+    pending = bytearray()
+    for chunk in chunks:
+        view = memoryview(chunk)
+        if pending:
+            take = min(size - len(pending), len(view))
+            pending += view[:take]
+            view = view[take:]
+            if len(pending) < size:
+                continue
+            yield bytes(pending)
+            pending.clear()
+        while len(view) >= size:
+            yield view[:size]
+            view = view[size:]
+        pending += view
+    yield bytes(pending)
+
+
+def _with_final_flag(pieces: Iterator[bytes]) -> Iterator[Tuple[bytes, bool]]:
+    previous = next(pieces)
+    for piece in pieces:
+        yield previous, False
+        previous = piece
+    yield previous, True
+
+
+def encrypt_iter(
+    chunks: Iterable[bytes],
+    *,
+    secret: SecretSpec = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Encrypt an iterable of byte strings of any size; yields the header and then
+    one encrypted segment per ``chunk_size`` bytes of plaintext.
+    """
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}")
+    master = _master_keys(secret)[0]
+    return _encrypt_segments(chunks, master, chunk_size)
+
+
+def _encrypt_segments(chunks: Iterable[bytes], master: bytes, chunk_size: int) -> Iterator[bytes]:
+    salt = secrets.token_bytes(SALT_BYTES)
+    header = _HEADER.pack(MAGIC, VERSION, _key_id(master), chunk_size, salt)
+    encrypt = _stream_cipher(master, salt).encrypt
+    yield header
+    for counter, (piece, final) in enumerate(_with_final_flag(_rechunk(chunks, chunk_size))):
+        yield encrypt(_nonce(counter, final), piece, header)
+
+
+def decrypt_iter(chunks: Iterable[bytes], *, secret: SecretSpec = None) -> Iterator[bytes]:
+    """
+    Decrypt a stream produced by `encrypt_iter`, yielding plaintext segments.
+
+    Segments are yielded as soon as they verify. A failure later in the stream
+    raises `StreamIntegrityError`, so callers must treat output as
+    provisional until the iterator finishes.
+    """
+    return _decrypt_segments(chunks, _master_keys(secret))
+
+
+def _decrypt_segments(chunks: Iterable[bytes], masters: Tuple[bytes, ...]) -> Iterator[bytes]:
+    iterator = iter(chunks)
+    head = b""
+    for chunk in iterator:
+        # Only tiny leading chunks are concatenated; usually the first chunk holds the header.
+        head = head + bytes(chunk) if head else chunk
+        if len(head) >= HEADER_BYTES:
+            break
+    if len(head) < HEADER_BYTES:
+        raise StreamIntegrityError("Stream is too short to contain a header")
+    head = memoryview(head)
+    header = bytes(head[:HEADER_BYTES])
+    magic, version, key_id, chunk_size, salt = _HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise StreamIntegrityError("Not an encrypted stream or unsupported version")
+    master = next((key for key in masters if _key_id(key) == key_id), None)
+    if master is None:
+        raise StreamIntegrityError("Stream was encrypted with an unknown key")
+    decrypt = _stream_cipher(master, salt).decrypt
+
+    body = itertools.chain((head[HEADER_BYTES:],), iterator)
+    counter = 0
+    try:
+        for counter, (piece, final) in enumerate(_with_final_flag(_rechunk(body, chunk_size + TAG_BYTES))):
+            if final and len(piece) < TAG_BYTES:
+                raise StreamIntegrityError("Stream is truncated")
+            yield decrypt(_nonce(counter, final), piece, header)
+    except InvalidTag:
+        raise StreamIntegrityError(f"Segment {counter} failed authentication") from None
+
+
+def _read_chunks(source: BinaryIO, size: int) -> Iterator[bytes]:
+    return iter(lambda: source.read(size), b"")
+
+
+def encrypt_stream(
+    source: BinaryIO,
+    target: BinaryIO,
+    *,
+    secret: SecretSpec = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Encrypt a readable binary file object into ``target``; returns bytes written."""
+    written = 0
+    for piece in encrypt_iter(_read_chunks(source, chunk_size), secret=secret, chunk_size=chunk_size):
+        target.write(piece)
+        written += len(piece)
+    return written
+
+
+def decrypt_stream(source: BinaryIO, target: BinaryIO, *, secret: SecretSpec = None) -> int:
+    """Decrypt ``source`` into ``target``; returns plaintext bytes written."""
+    written = 0
+    for piece in decrypt_iter(_read_chunks(source, DEFAULT_CHUNK_SIZE + TAG_BYTES), secret=secret):
+        target.write(piece)
+        written += len(piece)
+    return written
+
+
+def encrypt_file(
+    source_path: Union[str, "os.PathLike[str]"],
+    target_path: Union[str, "os.PathLike[str]"],
+    *,
+    secret: SecretSpec = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Encrypt a file on disk in bounded memory."""
+    with open(source_path, "rb") as source, open(target_path, "wb") as target:
+        return encrypt_stream(source, target, secret=secret, chunk_size=chunk_size)
+
+
+def decrypt_file(
+    source_path: Union[str, "os.PathLike[str]"],
+    target_path: Union[str, "os.PathLike[str]"],
+    *,
+    secret: SecretSpec = None,
+) -> int:
+    """
+    Decrypt a file on disk in bounded memory. On failure the partial output is
+    removed, so a truncated or tampered file never leaves plaintext behind.
+    """
+    try:
+        with open(source_path, "rb") as source, open(target_path, "wb") as target:
+            return decrypt_stream(source, target, secret=secret)
+    except StreamIntegrityError:
+        os.remove(target_path)
+        raise
+
+
+def encrypt_bytes(data: bytes, *, secret: SecretSpec = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+    """Encrypt an in-memory byte string (same format as the streaming API)."""
+    return b"".join(encrypt_iter((data,), secret=secret, chunk_size=chunk_size))
+
+
+def decrypt_bytes(data: bytes, *, secret: SecretSpec = None) -> bytes:
+    """Decrypt the output of `encrypt_bytes`/`encrypt_stream`."""
+    return b"".join(decrypt_iter((data,), secret=secret))
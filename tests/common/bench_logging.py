@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Logging benchmark: eager f-string + format-string "JSON" vs. lazy structured JSON.
+
+Usage:
+    python tests/common/bench_logging.py --records 200000
+"""
+
+import argparse
+import io
+import logging
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.middleware import logging as log_middleware
+from modules.common.middleware.logging import JsonFormatter, log_response
+
+# The formatter previously configured in observability/logging/python_logging.yaml.
+LEGACY_FORMAT = ('{"timestamp": "%(asctime)s", "level": "%(levelname)s", "logger": "%(name)s", '
+                 '"message": "%(message)s", "module": "%(module)s", "function": "%(funcName)s", '
+                 '"line": %(lineno)d}')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Logging benchmark")
+    parser.add_argument("--records", type=int, default=200_000, help="log_response calls per case")
+    return parser.parse_args()
+
+
+def legacy_log_response(status_code, path, duration_ms, logger):
+    """log_response as it was before structured logging."""
+    level = logging.ERROR if status_code >= 400 else logging.INFO
+    logger.log(
+        level,
+        f"Response: {status_code} {path} | "
+        f"Duration: {duration_ms:.2f}ms | "
+        f"Time: {datetime.now(timezone.utc).isoformat()}"
+    )
+
+
+def make_logger(formatter: logging.Formatter, level: int) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{id(formatter)}")
+    logger.propagate = False
+    logger.setLevel(level)
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setFormatter(formatter)
+    logger.handlers = [handler]
+    return logger
+
+
+def run(func, formatter: logging.Formatter, level: int, records: int) -> float:
+    logger = make_logger(formatter, level)
+    start = time.perf_counter()
+    for i in range(records):
+        func(200, "/api/users", i * 0.01, logger=logger)
+    return records / (time.perf_counter() - start)
+
+
+def main() -> int:
+    args = parse_args()
+    cases = [
+        ("legacy (INFO)", legacy_log_response, logging.Formatter(LEGACY_FORMAT), logging.INFO),
+        ("structured (INFO)", log_response, JsonFormatter(), logging.INFO),
+        ("legacy (disabled)", legacy_log_response, logging.Formatter(LEGACY_FORMAT), logging.WARNING),
+        ("structured (disabled)", log_response, JsonFormatter(), logging.WARNING),
+    ]
+    print(f"json backend: {'orjson' if log_middleware.orjson is not None else 'json'}")
+    print(f"{'case':<24}{'records/s':>12}")
+    for name, func, formatter, level in cases:
+        rate = run(func, formatter, level, args.records)
+        print(f"{name:<24}{rate:>12,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Model benchmarks:
+
+- serialization: `dataclasses.asdict` + `json.dumps(default=str)` vs.
+  compiled per-class serializers;
+- memory (``--memory``): bytes per instance of a regular model vs. a
+  `slotted_model` with `CompactTimestampMixin`;
+- analytics (``--batch``): row-by-row loops vs. `ModelBatch` columns;
+- loading (``--load``): ``cls(**row)`` vs. compiled `from_dict`/`from_dicts`.
+
+Usage:
+    python tests/common/bench_models.py --count 10000
+    python tests/common/bench_models.py --memory --count 100000
+    python tests/common/bench_models.py --batch --count 100000
+    python tests/common/bench_models.py --load --count 10000
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.models import (
+    BaseModel,
+    CompactTimestampMixin,
+    ModelBatch,
+    TimestampMixin,
+    dump_models,
+    dumps_models,
+    slotted_model,
+)
+from modules.common.models import serialization
+
+
+@dataclass
+class Run(TimestampMixin, BaseModel):
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    name: str = "nightly"
+    status: str = "succeeded"
+    latency_ms: float = 12.5
+    attempts: int = 1
+    error: Optional[str] = None
+    tags: List[str] = field(default_factory=lambda: ["ci", "eval"])
+
+
+@dataclass
+class RunRow(TimestampMixin, BaseModel):
+    id: str = ""
+    status: str = "succeeded"
+    latency_ms: float = 0.0
+    attempts: int = 1
+
+
+@slotted_model
+class SlimRunRow(CompactTimestampMixin, BaseModel):
+    id: str = ""
+    status: str = "succeeded"
+    latency_ms: float = 0.0
+    attempts: int = 1
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Model serialization benchmark")
+    parser.add_argument("--count", type=int, default=10_000, help="Models per list")
+    parser.add_argument("--repeat", type=int, default=5, help="Best of N runs")
+    parser.add_argument("--memory", action="store_true", help="Measure bytes per instance instead")
+    parser.add_argument("--batch", action="store_true", help="Compare row loops with ModelBatch columns")
+    parser.add_argument("--load", action="store_true", help="Compare cls(**row) with compiled loaders")
+    return parser.parse_args()
+
+
+def best_of(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bytes_per_instance(cls, ids, latencies) -> float:
+    # Field values are created up front, so only the instance and its timestamps are counted.
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    rows = [cls(id=ids[i], latency_ms=latencies[i]) for i in range(len(ids))]
+    rows[0].touch()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return (allocated - sys.getsizeof(rows)) / len(rows)
+
+
+def run_memory(count: int) -> int:
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+    latencies = [float(i) for i in range(count)]
+    print(f"{'model':<34}{'bytes/instance':>16}")
+    for label, cls in (
+        ("dataclass + TimestampMixin", RunRow),
+        ("slotted + CompactTimestampMixin", SlimRunRow),
+    ):
+        print(f"{label:<34}{bytes_per_instance(cls, ids, latencies):>16.1f}")
+    return 0
+
+
+def run_batch(count: int, repeat: int) -> int:
+    rows = [
+        RunRow(id=str(i), status="failed" if i % 7 == 0 else "succeeded", latency_ms=float(i % 1000))
+        for i in range(count)
+    ]
+    batch = ModelBatch.from_models(rows)
+    cases = [
+        ("build batch", lambda: ModelBatch.from_models(rows)),
+        ("mean (rows)", lambda: sum(row.latency_ms for row in rows) / len(rows)),
+        ("mean (batch)", lambda: batch.mean("latency_ms")),
+        ("filter (rows)", lambda: [row for row in rows if row.latency_ms > 500 and row.status == "failed"]),
+        ("filter (batch)", lambda: batch.where("latency_ms", ">", 500).where("status", "==", "failed")),
+        ("to_dict (rows)", lambda: [row.to_dict() for row in rows]),
+        ("to_records (batch)", lambda: batch.to_records()),
+        ("to_json (rows)", lambda: dumps_models(rows)),
+        ("to_json (batch)", lambda: batch.to_json()),
+    ]
+    print(f"{'case':<22}{'ms':>10}")
+    for name, func in cases:
+        print(f"{name:<22}{best_of(repeat, func) * 1000:>10.2f}")
+    return 0
+
+
+def run_load(count: int, repeat: int) -> int:
+    runs = [Run(latency_ms=float(i)) for i in range(count)]
+    rows = [run.to_dict() for run in runs]
+    wire = json.loads(dumps_models(runs))
+    known = {"created_at", "updated_at", "id", "name", "status", "latency_ms", "attempts", "error", "tags"}
+
+    def clean(row):
+        # The ad-hoc loop callers wrote before: copy known keys, parse by hand.
+        data = {key: value for key, value in row.items() if key in known}
+        data["id"] = uuid.UUID(data["id"])
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return Run(**data)
+
+    cases = [
+        ("cls(**row)", lambda: [Run(**row) for row in rows]),
+        ("from_dict", lambda: [Run.from_dict(row) for row in rows]),
+        ("from_dicts", lambda: Run.from_dicts(rows)),
+        ("clean + cls (JSON)", lambda: [clean(row) for row in wire]),
+        ("from_dicts (JSON)", lambda: Run.from_dicts(wire)),
+    ]
+    print(f"{'case':<22}{'ms':>10}{'models/s':>14}")
+    for name, func in cases:
+        elapsed = best_of(repeat, func)
+        print(f"{name:<22}{elapsed * 1000:>10.1f}{count / elapsed:>14,.0f}")
+    return 0
+
+
+def main() -> int:
+    args = parse_args()
+    if args.load:
+        return run_load(args.count, args.repeat)
+    if args.memory:
+        return run_memory(args.count)
+    if args.batch:
+        return run_batch(args.count, args.repeat)
+    runs = [Run(latency_ms=float(i)) for i in range(args.count)]
+    cases = [
+        ("asdict", lambda: [asdict(run) for run in runs]),
+        ("to_dict (compiled)", lambda: [run.to_dict() for run in runs]),
+        ("dump_models", lambda: dump_models(runs)),
+        ("asdict + json", lambda: json.dumps([asdict(run) for run in runs], default=str, ensure_ascii=False)),
+        ("to_json (compiled)", lambda: [run.to_json() for run in runs]),
+        ("dumps_models", lambda: dumps_models(runs)),
+        ("dumps_models compact", lambda: dumps_models(runs, compact=True)),
+    ]
+    print(f"json backend for compact: {'orjson' if serialization.orjson is not None else 'json'}")
+    print(f"{'case':<22}{'ms':>10}{'models/s':>14}")
+    for name, func in cases:
+        elapsed = best_of(args.repeat, func)
+        print(f"{name:<22}{elapsed * 1000:>10.1f}{args.count / elapsed:>14,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
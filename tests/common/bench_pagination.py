@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Pagination benchmark: OFFSET/LIMIT vs. keyset cursors at increasing page depth.
+
+Uses an in-memory SQLite table with an index on the sort key, so it runs
+without a database server; Postgres shows the same shape (OFFSET scans and
+discards every skipped row).
+
+Usage:
+    python tests/common/bench_pagination.py --rows 200000 --page-size 20
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.models import Cursor, CursorParams, CursorResult, PaginationParams
+
+SECRET = "bench-cursor-secret"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="OFFSET vs. keyset pagination benchmark")
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows in the table")
+    parser.add_argument("--page-size", type=int, default=20, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=20, help="Queries per measurement")
+    return parser.parse_args()
+
+
+def build(rows: int) -> sqlite3.Connection:
+    db = sqlite3.connect(":memory:")
+    db.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY, created_at INTEGER, status TEXT)")
+    db.executemany("INSERT INTO runs VALUES (?, ?, ?)", ((i, i // 3, "succeeded") for i in range(rows)))
+    db.execute("CREATE INDEX runs_created_id ON runs (created_at, id)")
+    return db
+
+
+def offset_page(db: sqlite3.Connection, page: int, page_size: int):
+    params = PaginationParams(page=page, page_size=page_size, max_page_size=page_size)
+    return db.execute(
+        "SELECT id, created_at, status FROM runs ORDER BY created_at, id LIMIT ? OFFSET ?",
+        (params.get_limit(), params.get_offset()),
+    ).fetchall()
+
+
+def keyset_page(db: sqlite3.Connection, cursor: str, page_size: int):
+    params = CursorParams(cursor=cursor, limit=page_size, max_limit=page_size, secret=SECRET)
+    where, args, order_by = params.keyset_sql(placeholder="?")
+    rows = db.execute(
+        f"SELECT id, created_at, status FROM runs {'WHERE ' + where if where else ''} "
+        f"ORDER BY {order_by} LIMIT ?",
+        args + [params.get_fetch_limit()],
+    ).fetchall()
+    return CursorResult.from_rows(rows, params, key=lambda row: (row[1], row[0]))
+
+
+def timed(repeat: int, func) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> int:
+    args = parse_args()
+    db = build(args.rows)
+    last_page = args.rows // args.page_size
+    print(f"{'page':>8}{'OFFSET ms':>12}{'keyset ms':>12}")
+    for page in (1, 100, 1_000, 5_000, last_page):
+        if page > last_page:
+            continue
+        boundary = (page - 1) * args.page_size - 1
+        cursor = None
+        if boundary >= 0:
+            cursor = Cursor((boundary // 3, boundary), "next", ("created_at", "id")).encode(SECRET)
+        offset_ms = timed(args.repeat, lambda: offset_page(db, page, args.page_size))
+        keyset_ms = timed(args.repeat, lambda: keyset_page(db, cursor, args.page_size))
+        assert [row[0] for row in offset_page(db, page, args.page_size)] == [
+            row[0] for row in keyset_page(db, cursor, args.page_size).items
+        ]
+        print(f"{page:>8}{offset_ms:>12.3f}{keyset_ms:>12.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Rate limiter benchmark: list-based sliding log vs. O(1) algorithms.
+
+Usage:
+    python tests/common/bench_rate_limit.py --identifiers 20000 --checks 200000
+    python tests/common/bench_rate_limit.py --hostile --max-identifiers 10000
+    python tests/common/bench_rate_limit.py --tiers
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.middleware.rate_limit import (
+    RATE_LIMIT_ALGORITHMS,
+    MultiTierRateLimiter,
+    SlidingWindowRateLimiter,
+)
+
+# Per-second, per-minute and per-day quotas.
+TIERS = [(10, 1), (100, 60), (10_000, 86_400)]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rate limiter benchmark")
+    parser.add_argument("--identifiers", type=int, default=20_000, help="Distinct client identifiers")
+    parser.add_argument("--checks", type=int, default=200_000, help="Total is_allowed calls")
+    parser.add_argument("--max-requests", type=int, default=100, help="Quota per window")
+    parser.add_argument("--window", type=int, default=60, help="Window size in seconds")
+    parser.add_argument("--max-identifiers", type=int, default=100_000, help="Store cap per limiter")
+    parser.add_argument("--hostile", action="store_true", help="Every check uses a new identifier (scan traffic)")
+    parser.add_argument("--tiers", action="store_true", help="Compare stacked limiters with MultiTierRateLimiter")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for identifier selection")
+    return parser.parse_args()
+
+
+def run(algorithm: str, ids, max_requests: int, window: int, max_identifiers: int) -> dict:
+    limiter = RATE_LIMIT_ALGORITHMS[algorithm](max_requests, window, max_identifiers=max_identifiers)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for identifier in ids:
+        limiter.is_allowed(identifier)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "algorithm": algorithm,
+        "checks_per_sec": round(len(ids) / elapsed),
+        "us_per_check": round(elapsed / len(ids) * 1e6, 2),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def run_tiers(ids) -> None:
+    """Time three stacked sliding-window limiters against one multi-tier limiter."""
+    stacked = [SlidingWindowRateLimiter(limit, window) for limit, window in TIERS]
+    start = time.perf_counter()
+    for identifier in ids:
+        for limiter in stacked:
+            if not limiter.is_allowed(identifier)[0]:
+                break
+    stacked_us = (time.perf_counter() - start) / len(ids) * 1e6
+
+    multi = MultiTierRateLimiter(TIERS)
+    start = time.perf_counter()
+    for identifier in ids:
+        multi.is_allowed(identifier)
+    multi_us = (time.perf_counter() - start) / len(ids) * 1e6
+
+    print(f"{'limiter':<16}{'us/check':>10}")
+    print(f"{'stacked x3':<16}{stacked_us:>10.2f}")
+    print(f"{'multi_tier':<16}{multi_us:>10.2f}")
+
+
+def main() -> int:
+    args = parse_args()
+    rng = random.Random(args.seed)
+    # A skewed population so hot identifiers fill their whole quota.
+    population = [f"client-{i}" for i in range(args.identifiers)]
+    if args.hostile:
+        ids = [f"scan-{i}" for i in range(args.checks)]
+    else:
+        ids = [population[min(int(rng.expovariate(5 / args.identifiers)), args.identifiers - 1)]
+               for _ in range(args.checks)]
+
+    if args.tiers:
+        run_tiers(ids)
+        return 0
+
+    print(f"{'algorithm':<16}{'checks/s':>12}{'us/check':>10}{'peak MB':>10}")
+    for algorithm in RATE_LIMIT_ALGORITHMS:
+        result = run(algorithm, ids, args.max_requests, args.window, args.max_identifiers)
+        print(f"{result['algorithm']:<16}{result['checks_per_sec']:>12}"
+              f"{result['us_per_check']:>10}{result['peak_mb']:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,16 +3,38 @@
 Auth middleware tests.
 """
 
+import asyncio
+import json
 import os
 import sys
+import tempfile
+import time
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 os.environ["TEMPLATEAI_AUTH_SECRET"] = "unit-test-secret"
 
-from modules.common.middleware.auth import AuthConfig, AuthMiddleware, AuthError
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from modules.common.middleware.auth import AuthConfig, AuthMiddleware, AuthError, TokenCache
+from modules.common.middleware.keyring import KeyRing, SigningKey, UnknownKeyError
+from modules.common.middleware.permissions import (
+    PermissionSet,
+    RoleRegistry,
+    current_permissions,
+    permission_context,
+)
+from modules.common.middleware.revocation import (
+    BloomFilter,
+    InMemoryRevocationBackend,
+    RedisRevocationBackend,
+    RevocationList,
+)
 
 
 class TestAuthMiddleware(unittest.TestCase):
@@ -66,5 +88,492 @@ class TestAuthMiddleware(unittest.TestCase):
             protected_endpoint(token="Bearer invalid")
 
 
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.config = AuthConfig(secret_key="unit-test-secret", leeway_seconds=0)
+        self.issuer = AuthMiddleware(self.config)
+        self.token = self.issuer.issue_token(user_id="user123", username="tester", role="user")
+    
+    def test_repeat_validation_skips_decode(self):
+        auth = AuthMiddleware(self.config)
+        with patch("modules.common.middleware.auth.jwt.decode", wraps=jwt.decode) as decode:
+            for _ in range(5):
+                self.assertTrue(auth.validate_token(self.token))
+                self.assertEqual(auth.extract_user(self.token)["user_id"], "user123")
+        self.assertEqual(decode.call_count, 1)
+        stats = auth.token_cache.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 9)
+    
+    def test_entries_expire_at_exp(self):
+        cache = TokenCache(max_entries=10, leeway_seconds=5)
+        now = time.time()
+        cache.put("a", {"exp": now + 60})
+        cache.put("b", {"exp": now + 3})
+        cache.put("c", {"sub": "no-exp"})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get("c"))
+        with patch("modules.common.middleware.auth.time.time", return_value=now + 56):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+    
+    def test_cache_is_bounded(self):
+        cache = TokenCache(max_entries=3)
+        exp = time.time() + 60
+        for i in range(10):
+            cache.put(f"t{i}", {"exp": exp})
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.stats()["evictions"], 7)
+        self.assertIsNone(cache.get("t0"))
+        self.assertIsNotNone(cache.get("t9"))
+    
+    def test_logout_drops_cached_payload(self):
+        auth = AuthMiddleware(self.config)
+        auth.validate_token(self.token)
+        auth.logout(self.token)
+        self.assertNotIn(self.token, auth.token_cache)
+    
+    def test_validate_many_dedupes_and_uses_cache(self):
+        auth = AuthMiddleware(self.config)
+        self.addCleanup(auth.close)
+        auth.validate_token(self.token)
+        others = [self.issuer.issue_token(user_id=f"u{i}", username="x", role="user") for i in range(4)]
+        batch = [self.token, "not-a-token", self.token] + others + others
+        with patch("modules.common.middleware.auth.jwt.decode", wraps=jwt.decode) as decode:
+            results = auth.validate_many(batch)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[self.token]["sub"], "user123")
+        self.assertIsNone(results["not-a-token"])
+        self.assertEqual([results[t]["sub"] for t in others], ["u0", "u1", "u2", "u3"])
+        # One decode per distinct uncached token; the cached one is served directly
+        # and the malformed one is rejected before decoding.
+        self.assertEqual(decode.call_count, 4)
+        self.assertTrue(all(t in auth.token_cache for t in others))
+    
+    def test_validate_many_rejects_revoked_tokens(self):
+        auth = AuthMiddleware(AuthConfig(secret_key="unit-test-secret", revocation=RevocationList()))
+        self.addCleanup(auth.close)
+        token = auth.issue_token(user_id="u1", username="x", role="user")
+        other = auth.issue_token(user_id="u2", username="y", role="user")
+        auth.logout(token)
+        results = auth.validate_many([token, other])
+        self.assertIsNone(results[token])
+        self.assertEqual(results[other]["sub"], "u2")
+    
+    def test_close_shuts_down_verify_pool(self):
+        others = [self.issuer.issue_token(user_id=f"u{i}", username="x", role="user") for i in range(3)]
+        with AuthMiddleware(self.config) as auth:
+            auth.validate_many(others)
+            pool = auth._executor
+            self.assertIsNotNone(pool)
+        self.assertIsNone(auth._executor)
+        self.assertTrue(pool._shutdown)
+        # A closed middleware still works; the pool is recreated on demand.
+        auth.token_cache.clear()
+        self.assertEqual(len(auth.validate_many(others)), 3)
+        auth.close()
+
+
+def _private_pem(key) -> bytes:
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def _public_pem(key) -> bytes:
+    return key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+
+
+class TestKeyRing(unittest.TestCase):
+    KEYS = {
+        "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate,
+    }
+    
+    def _auth(self, ring: KeyRing) -> AuthMiddleware:
+        return AuthMiddleware(AuthConfig(secret_key="", keyring=ring, token_cache_size=1))
+    
+    def test_asymmetric_algorithms(self):
+        for algorithm, generate in self.KEYS.items():
+            private = generate()
+            signer = KeyRing()
+            signer.add_pem("k1", _private_pem(private), algorithm, activate=True)
+            verifier = KeyRing()
+            verifier.add_pem("k1", _public_pem(private), algorithm)
+            
+            token = self._auth(signer).issue_token(user_id="u1", username="x", role="user")
+            self.assertEqual(jwt.get_unverified_header(token.split()[1])["kid"], "k1")
+            self.assertTrue(self._auth(verifier).validate_token(token), algorithm)
+    
+    def test_shared_secret_verifier_rejects_asymmetric_token(self):
+        private = self.KEYS["ES256"]()
+        signer = KeyRing()
+        signer.add_pem("k1", _private_pem(private), "ES256")
+        token = self._auth(signer).issue_token(user_id="u1", username="x", role="user")
+        
+        hs256 = AuthMiddleware(AuthConfig(secret_key="unit-test-secret"))
+        self.assertFalse(hs256.validate_token(token))
+    
+    def test_rotation_accepts_old_key_until_cutoff(self):
+        ring = KeyRing()
+        ring.add_pem("old", _private_pem(self.KEYS["ES256"]()), "ES256")
+        auth = AuthMiddleware(AuthConfig(secret_key="", keyring=ring))
+        old_token = auth.issue_token(user_id="u1", username="x", role="user")
+        
+        new_private = self.KEYS["ES256"]()
+        ring.rotate(SigningKey("new", "ES256", new_private.public_key(), new_private), grace_seconds=60)
+        new_token = auth.issue_token(user_id="u1", username="x", role="user")
+        self.assertEqual(ring.active_kid, "new")
+        self.assertTrue(auth.validate_token(old_token))
+        self.assertTrue(auth.validate_token(new_token))
+        
+        # Both tokens are cached (issue_token fills the cache); the cut-off still applies.
+        self.assertIn(old_token, auth.token_cache)
+        self.assertIn(new_token, auth.token_cache)
+        with patch("modules.common.middleware.keyring.time.time", return_value=time.time() + 61):
+            self.assertFalse(auth.validate_token(old_token))
+            self.assertTrue(auth.validate_token(new_token))
+            self.assertEqual(ring.prune(), ["old"])
+    
+    def test_retired_key_invalidates_cached_tokens(self):
+        ring = KeyRing()
+        ring.add_pem("old", _private_pem(self.KEYS["ES256"]()), "ES256")
+        auth = AuthMiddleware(AuthConfig(secret_key="", keyring=ring))
+        self.addCleanup(auth.close)
+        token = auth.issue_token(user_id="u1", username="x", role="user")
+        self.assertTrue(auth.validate_token(token))
+        self.assertIn(token, auth.token_cache)
+        
+        new_private = self.KEYS["ES256"]()
+        ring.add(SigningKey("new", "ES256", new_private.public_key(), new_private), activate=True)
+        ring.retire("old")
+        self.assertFalse(auth.validate_token(token))
+        self.assertNotIn(token, auth.token_cache)
+        self.assertEqual(auth.validate_many([token]), {token: None})
+        
+        fresh = auth.issue_token(user_id="u1", username="x", role="user")
+        ring.prune()
+        self.assertTrue(auth.validate_token(fresh))
+        self.assertFalse(auth.validate_token(token))
+    
+    def test_unknown_kid_rejected(self):
+        ring = KeyRing()
+        with self.assertRaises(UnknownKeyError):
+            ring.verification_key("missing")
+        
+        other = KeyRing()
+        other.add_pem("k9", _private_pem(self.KEYS["EdDSA"]()), "EdDSA")
+        token = self._auth(other).issue_token(user_id="u1", username="x", role="user")
+        ring.add_pem("k1", _public_pem(self.KEYS["EdDSA"]()), "EdDSA")
+        self.assertFalse(self._auth(ring).validate_token(token))
+    
+    def test_load_from_jwks_file_and_pem_directory(self):
+        private = self.KEYS["RS256"]()
+        signer = KeyRing()
+        signer.add_pem("rsa-1", _private_pem(private), "RS256")
+        token = self._auth(signer).issue_token(user_id="u1", username="x", role="user")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            jwks_file = Path(tmp) / "jwks.json"
+            jwks_file.write_text(json.dumps(signer.to_jwks()), encoding="utf-8")
+            from_jwks = KeyRing.from_path(jwks_file)
+            self.assertIn("rsa-1", from_jwks)
+            self.assertTrue(self._auth(from_jwks).validate_token(token))
+            
+            pem_dir = Path(tmp) / "pems"
+            pem_dir.mkdir()
+            (pem_dir / "rsa-1.pem").write_bytes(_public_pem(private))
+            from_dir = KeyRing.from_path(pem_dir, algorithm="RS256")
+            self.assertTrue(self._auth(from_dir).validate_token(token))
+
+
+class LocalRedisStandIn:
+    """In-process stand-in for the Redis calls RedisRevocationBackend makes."""
+    
+    def __init__(self):
+        self.values = {}
+        self.zsets = {}
+        self.counters = {}
+        self.exists_calls = 0
+    
+    def register_script(self, source):
+        """Mirror the revoke Lua script; it runs atomically, like on the server."""
+        def run(keys, args):
+            jti_key, log_key, expiry_key, sequence_key = keys
+            ttl, jti, expires_at = int(args[0]), args[1], int(args[2])
+            self.values[jti_key] = (1, time.time() + ttl)
+            sequence = self.counters[sequence_key] = self.counters.get(sequence_key, 0) + 1
+            self.zsets.setdefault(log_key, {})[jti] = sequence
+            expiries = self.zsets.setdefault(expiry_key, {})
+            expiries[jti] = expires_at
+            for member in [m for m, score in expiries.items() if score <= int(time.time())]:
+                self.zsets[log_key].pop(member, None)
+                del expiries[member]
+            return sequence
+        return run
+    
+    def exists(self, key):
+        self.exists_calls += 1
+        entry = self.values.get(key)
+        return int(entry is not None and entry[1] > time.time())
+    
+    def zrangebyscore(self, key, low, high, withscores=False):
+        if low == "-inf":
+            items = self.zsets.get(key, {}).items()
+        elif low.startswith("("):
+            items = [(m, score) for m, score in self.zsets.get(key, {}).items() if score > float(low[1:])]
+        else:
+            items = [(m, score) for m, score in self.zsets.get(key, {}).items() if score >= float(low)]
+        return [(member.encode(), float(score)) for member, score in sorted(items, key=lambda item: item[1])]
+
+
+class TestRevocation(unittest.TestCase):
+    def setUp(self):
+        self.config = AuthConfig(secret_key="unit-test-secret", leeway_seconds=0)
+    
+    def test_bloom_filter(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        self.assertTrue(all(f"jti-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives, 300)
+        self.assertFalse(bloom.add("jti-1"))
+        self.assertEqual(bloom.count, 1000)
+    
+    def test_logout_revokes_token_everywhere(self):
+        server = LocalRedisStandIn()
+        worker_a = AuthMiddleware(AuthConfig(
+            secret_key="unit-test-secret", revocation=RevocationList(RedisRevocationBackend(server)),
+        ))
+        worker_b_revocations = RevocationList(RedisRevocationBackend(server))
+        worker_b = AuthMiddleware(AuthConfig(secret_key="unit-test-secret", revocation=worker_b_revocations))
+        
+        token = worker_a.issue_token(user_id="u1", username="x", role="user")
+        other = worker_a.issue_token(user_id="u2", username="y", role="user")
+        self.assertTrue(worker_b.validate_token(token))
+        
+        worker_a.logout(token)
+        self.assertFalse(worker_a.validate_token(token))
+        self.assertIsNone(worker_a.extract_user(token))
+        
+        # Worker B learns about it on its next (background) refresh, even though
+        # it has the verified payload cached.
+        self.assertEqual(worker_b_revocations.refresh(), 1)
+        self.assertFalse(worker_b.validate_token(token))
+        self.assertTrue(worker_b.validate_token(other))
+    
+    def test_refresh_after_logout_is_rejected(self):
+        revocations = RevocationList()
+        auth = AuthMiddleware(AuthConfig(secret_key="unit-test-secret", revocation=revocations))
+        token = auth.issue_token(user_id="u1", username="x", role="user")
+        self.assertIsNotNone(auth.refresh_token(token))
+        auth.logout(token)
+        self.assertFalse(auth.validate_token(token))
+        self.assertIsNone(auth.refresh_token(token))
+        
+        # A worker that never cached the token: logout must not re-cache the payload.
+        other = AuthMiddleware(AuthConfig(secret_key="unit-test-secret", revocation=revocations))
+        second = auth.issue_token(user_id="u2", username="y", role="user")
+        other.logout(second)
+        self.assertNotIn(second, other.token_cache)
+        self.assertIsNone(other.refresh_token(second))
+        self.assertIsNone(auth.refresh_token(second))
+    
+    def test_unrevoked_tokens_skip_backend(self):
+        backend = InMemoryRevocationBackend()
+        revocations = RevocationList(backend, capacity=1000)
+        auth = AuthMiddleware(AuthConfig(secret_key="unit-test-secret", revocation=revocations))
+        tokens = [auth.issue_token(user_id=f"u{i}", username="x", role="user") for i in range(50)]
+        for token in tokens[:5]:
+            auth.logout(token)
+        
+        results = [auth.validate_token(token) for token in tokens]
+        self.assertEqual(results, [False] * 5 + [True] * 45)
+        # Only revoked tokens (plus the odd false positive) reach the backend.
+        self.assertLess(revocations.backend_checks, 10)
+    
+    def test_revocations_from_a_lagging_clock_are_not_skipped(self):
+        server = LocalRedisStandIn()
+        reader = RevocationList(RedisRevocationBackend(server), refresh_interval=0)
+        fast_worker, slow_worker = RedisRevocationBackend(server), RedisRevocationBackend(server)
+        expires_at = time.time() + 600
+        
+        fast_worker.revoke("first", expires_at)
+        self.assertEqual(reader.refresh(), 1)
+        # This revoke was stamped ten minutes earlier but commits after the reader's cursor.
+        with patch("modules.common.middleware.revocation.time.time", return_value=time.time() - 600):
+            slow_worker.revoke("second", expires_at)
+        self.assertEqual(reader.refresh(), 1)
+        self.assertTrue(reader.is_revoked("second"))
+        self.assertEqual(reader.refresh(), 0)
+    
+    def test_redis_log_prunes_expired_entries(self):
+        server = LocalRedisStandIn()
+        backend = RedisRevocationBackend(server)
+        backend.revoke("old", time.time() + 1)
+        with patch("time.time", return_value=time.time() + 5):
+            backend.revoke("new", time.time() + 60)
+        self.assertEqual(backend.active(), ["new"])
+    
+    def test_lazy_refresh_without_background_thread(self):
+        server = LocalRedisStandIn()
+        worker_a = AuthMiddleware(AuthConfig(
+            secret_key="unit-test-secret", revocation=RevocationList(RedisRevocationBackend(server)),
+        ))
+        worker_b = AuthMiddleware(AuthConfig(
+            secret_key="unit-test-secret",
+            revocation=RevocationList(RedisRevocationBackend(server), refresh_interval=0.05),
+        ))
+        token = worker_a.issue_token(user_id="u1", username="x", role="user")
+        self.assertTrue(worker_b.validate_token(token))
+        worker_a.logout(token)
+        time.sleep(0.06)
+        self.assertFalse(worker_b.validate_token(token))
+    
+    def test_in_memory_backend_prunes_expired_entries(self):
+        backend = InMemoryRevocationBackend()
+        now = time.time()
+        backend.revoke("old", now - 1)
+        backend.revoke("live", now + 60)
+        jtis, cursor = backend.changes_since(None)
+        self.assertEqual(jtis, ["live"])
+        self.assertEqual(len(backend._log), 1)
+        backend.revoke("newer", now + 60)
+        self.assertEqual(backend.changes_since(cursor), (["newer"], cursor + 1))
+        self.assertEqual(sorted(backend.active()), ["live", "newer"])
+    
+    def test_background_refresh(self):
+        backend = InMemoryRevocationBackend()
+        revocations = RevocationList(backend, refresh_interval=0.01)
+        revocations.start()
+        self.addCleanup(revocations.stop)
+        backend.revoke("remote-jti", time.time() + 60)
+        deadline = time.time() + 2
+        while not revocations.is_revoked("remote-jti") and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(revocations.is_revoked("remote-jti"))
+
+
+class TestPermissions(unittest.TestCase):
+    ROLES = """
+roles:
+  viewer:
+    permissions: ["posts:read", "comments:read"]
+  editor:
+    inherits: [viewer]
+    permissions: ["posts:*"]
+  admin:
+    inherits: [editor]
+    permissions: ["*"]
+"""
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = Path(tmp.name) / "roles.yaml"
+        path.write_text(self.ROLES, encoding="utf-8")
+        self.roles = RoleRegistry.from_file(path)
+    
+    def test_wildcards(self):
+        perms = PermissionSet(["read", "posts:*"])
+        self.assertIn("read", perms)
+        self.assertIn("posts:edit", perms)
+        self.assertIn("posts:edit:own", perms)
+        self.assertNotIn("postsx:edit", perms)
+        self.assertNotIn("admin", perms)
+        self.assertIn("anything", PermissionSet(["*"]))
+    
+    def test_role_inheritance(self):
+        editor = self.roles.compile("editor")
+        self.assertIn("comments:read", editor)
+        self.assertIn("posts:delete", editor)
+        self.assertNotIn("comments:delete", editor)
+        self.assertIn("comments:delete", self.roles.compile("admin"))
+        self.assertIn("billing:read", self.roles.compile("viewer", ["billing:read"]))
+        # Identical role/permission combinations share one compiled set.
+        self.assertIs(self.roles.compile("editor", ["x"]), self.roles.compile("editor", ["x"]))
+    
+    def test_inheritance_cycle_rejected(self):
+        with self.assertRaises(ValueError):
+            RoleRegistry({"a": {"inherits": ["b"]}, "b": {"inherits": ["a"]}})
+    
+    def test_extract_user_uses_role_definitions(self):
+        auth = AuthMiddleware(AuthConfig(secret_key="unit-test-secret", roles=self.roles))
+        token = auth.issue_token(user_id="u1", username="x", role="editor", permissions=["billing:read"])
+        user = auth.extract_user(token)
+        permissions = auth.compile_permissions(user["role"], user["permissions"])
+        self.assertIn("posts:publish", permissions)
+        self.assertIn("billing:read", permissions)
+        # The user dict stays plain data.
+        self.assertEqual(json.loads(json.dumps(user))["role"], "editor")
+    
+    def test_permissions_are_per_context(self):
+        auth = AuthMiddleware(AuthConfig(secret_key="unit-test-secret"))
+        
+        async def request(perms, probe):
+            auth.set_permissions(perms)
+            await asyncio.sleep(0)
+            return auth.check_permission(probe)
+        
+        async def main():
+            return await asyncio.gather(request(["read"], "read"), request(["write"], "read"))
+        
+        self.assertEqual(asyncio.run(main()), [True, False])
+        
+        with permission_context(PermissionSet(["audit:*"])):
+            self.assertTrue(auth.check_permission("audit:view"))
+        self.assertFalse(auth.check_permission("audit:view"))
+    
+    def test_require_auth_binds_permissions(self):
+        from modules.common.middleware import auth as auth_module
+        from modules.common.middleware.auth import require_auth
+        
+        token = auth_module._default_auth.issue_token(
+            user_id="u1", username="x", role="user", permissions=["reports:*"],
+        )
+        
+        @require_auth
+        def endpoint(*, current_user=None):
+            return "reports:export" in current_permissions()
+        
+        self.assertTrue(endpoint(token=token))
+        self.assertNotIn("reports:export", current_permissions())
+    
+    def test_require_auth_async_handlers(self):
+        from modules.common.middleware import auth as auth_module
+        from modules.common.middleware.auth import require_auth
+        
+        tokens = {
+            name: auth_module._default_auth.issue_token(
+                user_id=name, username=name, role="user", permissions=[f"{name}:*"],
+            )
+            for name in ("alice", "bob")
+        }
+        
+        @require_auth
+        async def endpoint(*, current_user=None):
+            await asyncio.sleep(0.01)
+            name = current_user["user_id"]
+            return name, f"{name}:read" in current_permissions(), "bob:read" in current_permissions()
+        
+        async def scenario():
+            return await asyncio.gather(endpoint(token=tokens["alice"]), endpoint(token=tokens["bob"]))
+        
+        self.assertTrue(asyncio.iscoroutinefunction(endpoint))
+        alice, bob = asyncio.run(scenario())
+        self.assertEqual(alice, ("alice", True, False))
+        self.assertEqual(bob, ("bob", True, True))
+        with self.assertRaises(AuthError):
+            asyncio.run(endpoint(token="bad"))
+
+
 if __name__ == "__main__":
     unittest.main()
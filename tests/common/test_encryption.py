@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Tests for the encryption helpers.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from cryptography.fernet import Fernet
+
+from modules.common.utils import encryption
+from modules.common.utils.encryption import (
+    BlindIndex,
+    EncryptionContext,
+    blind_index,
+    clear_encryption_cache,
+    decrypt_data,
+    decrypt_many,
+    encrypt_data,
+    encrypt_many,
+    get_encryption_context,
+    rotate_data,
+)
+from modules.common.utils.stream_encryption import (
+    HEADER_BYTES,
+    TAG_BYTES,
+    StreamIntegrityError,
+    decrypt_bytes,
+    decrypt_file,
+    decrypt_iter,
+    encrypt_bytes,
+    encrypt_file,
+    encrypt_iter,
+    encrypt_stream,
+)
+
+
+class TestEncryptionContextCache(unittest.TestCase):
+    def setUp(self):
+        clear_encryption_cache()
+    
+    def tearDown(self):
+        clear_encryption_cache()
+    
+    def test_round_trip_with_plain_and_fernet_secrets(self):
+        for secret in ("plain secret", Fernet.generate_key().decode("utf-8")):
+            token = encrypt_data("hello", secret=secret)
+            self.assertEqual(decrypt_data(token, secret=secret), "hello")
+            self.assertEqual(decrypt_data(token, secret="other"), "")
+    
+    def test_context_is_derived_once_per_secret(self):
+        with patch.object(encryption, "_derive_key", wraps=encryption._derive_key) as derive:
+            tokens = [encrypt_data(f"v{i}", secret="s1") for i in range(20)]
+            values = [decrypt_data(token, secret="s1") for token in tokens]
+        self.assertEqual(values, [f"v{i}" for i in range(20)])
+        self.assertEqual(derive.call_count, 1)
+        self.assertIs(get_encryption_context("s1").cipher(), get_encryption_context("s1").cipher())
+        self.assertIsNot(get_encryption_context("s1"), get_encryption_context("s2"))
+    
+    def test_environment_keys(self):
+        with patch.dict(os.environ, {"TEMPLATEAI_ENCRYPTION_KEY": "env-secret"}):
+            token = encrypt_data("from env")
+        self.assertEqual(decrypt_data(token, secret="env-secret"), "from env")
+        with patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(ValueError):
+                encrypt_data("no key")
+    
+    def test_rotation_with_previous_keys(self):
+        old_token = encrypt_data("secret value", secret="old")
+        ring = ["new", "old"]
+        self.assertEqual(decrypt_data(old_token, secret=ring), "secret value")
+        
+        rotated = rotate_data(old_token, secret=ring)
+        self.assertEqual(decrypt_data(rotated, secret="new"), "secret value")
+        self.assertEqual(decrypt_data(rotated, secret="old"), "")
+        
+        env = {"TEMPLATEAI_ENCRYPTION_KEY": "new", "TEMPLATEAI_ENCRYPTION_PREVIOUS_KEYS": "older,old"}
+        with patch.dict(os.environ, env):
+            self.assertEqual(decrypt_data(old_token), "secret value")
+    
+    def test_batch_helpers(self):
+        values = [f"row-{i}" for i in range(50)]
+        tokens = encrypt_many(values, secret="batch")
+        self.assertEqual(len(set(tokens)), 50)
+        tokens[3] = "corrupted"
+        tokens[4] = ""
+        decrypted = decrypt_many(tokens, secret="batch", default="?")
+        self.assertEqual(decrypted[:3], values[:3])
+        self.assertEqual(decrypted[3:5], ["?", "?"])
+        self.assertEqual(decrypted[5:], values[5:])
+        with self.assertRaises(ValueError):
+            encrypt_many(["ok", b"bytes"], secret="batch")
+    
+    def test_from_secret_is_uncached(self):
+        self.assertIsNot(EncryptionContext.from_secret("x"), EncryptionContext.from_secret("x"))
+        self.assertEqual(EncryptionContext.from_secret("x"), EncryptionContext.from_secret("x"))
+
+
+
+class TestBlindIndex(unittest.TestCase):
+    def setUp(self):
+        clear_encryption_cache()
+    
+    def test_deterministic_and_truncated(self):
+        index = BlindIndex("users.email", secret="k", bits=64, normalizer=str.lower)
+        token = index.compute("Alice@Example.com")
+        self.assertEqual(token, index.compute("alice@example.com"))
+        self.assertEqual(len(token), 11)  # 8 bytes, unpadded base64
+        self.assertNotEqual(token, index.compute("bob@example.com"))
+        self.assertEqual(blind_index("alice@example.com", column="users.email", secret="k"), token)
+        self.assertEqual(len(BlindIndex("c", secret="k", bits=32).compute("x")), 6)
+        with self.assertRaises(ValueError):
+            BlindIndex("c", secret="k", bits=12)
+    
+    def test_key_separation(self):
+        email = BlindIndex("users.email", secret="k").compute("a@x.io")
+        self.assertNotEqual(BlindIndex("users.backup_email", secret="k").compute("a@x.io"), email)
+        self.assertNotEqual(BlindIndex("users.email", secret="other").compute("a@x.io"), email)
+        dedicated = BlindIndex("users.email", secret="k", index_secret="index-only")
+        self.assertNotEqual(dedicated.compute("a@x.io"), email)
+        with patch.dict(os.environ, {"TEMPLATEAI_BLIND_INDEX_KEY": "index-only"}):
+            self.assertEqual(BlindIndex("users.email", secret="k").compute("a@x.io"), dedicated.compute("a@x.io"))
+    
+    def test_rotation_and_batch_reindex(self):
+        emails = [f"user{i}@example.com" for i in range(25)]
+        old_tokens = encrypt_many(emails, secret="old")
+        old_index = BlindIndex("users.email", secret="old")
+        table = {i: (old_tokens[i], old_index.compute(email)) for i, email in enumerate(emails)}
+        
+        rotating = BlindIndex("users.email", secret=["new", "old"])
+        lookups = rotating.lookup_tokens("user3@example.com")
+        self.assertEqual(len(lookups), 2)
+        self.assertIn(table[3][1], lookups)
+        
+        rows = [(row_id, ciphertext) for row_id, (ciphertext, _) in table.items()] + [(99, "garbage")]
+        batches = list(rotating.reindex(rows, batch_size=10))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 6])
+        reindexed = dict(pair for batch in batches for pair in batch)
+        self.assertIsNone(reindexed.pop(99))
+        new_index = BlindIndex("users.email", secret="new")
+        self.assertEqual(reindexed, {i: new_index.compute(email) for i, email in enumerate(emails)})
+
+
+class TestStreamEncryption(unittest.TestCase):
+    CHUNK = 1024
+    
+    def segments(self, token):
+        body = token[HEADER_BYTES:]
+        size = self.CHUNK + TAG_BYTES
+        return token[:HEADER_BYTES], [body[i:i + size] for i in range(0, len(body), size)]
+    
+    def test_round_trip_sizes_and_chunking(self):
+        for size in (0, 1, self.CHUNK - 1, self.CHUNK, self.CHUNK + 1, 10 * self.CHUNK + 17):
+            data = os.urandom(size)
+            token = encrypt_bytes(data, secret="k", chunk_size=self.CHUNK)
+            self.assertEqual(decrypt_bytes(token, secret="k"), data)
+            pieces = [token[i:i + 7] for i in range(0, len(token), 7)]
+            self.assertEqual(b"".join(decrypt_iter(pieces, secret="k")), data)
+    
+    def test_iterator_input_of_any_shape(self):
+        parts = [os.urandom(n) for n in (3, 5000, 0, 1, 2047, 999)]
+        token = b"".join(encrypt_iter(iter(parts), secret="k", chunk_size=self.CHUNK))
+        self.assertEqual(decrypt_bytes(token, secret="k"), b"".join(parts))
+    
+    def test_each_stream_is_unique(self):
+        self.assertNotEqual(encrypt_bytes(b"same", secret="k"), encrypt_bytes(b"same", secret="k"))
+    
+    def test_tampering_is_detected(self):
+        token = encrypt_bytes(os.urandom(5 * self.CHUNK), secret="k", chunk_size=self.CHUNK)
+        header, segments = self.segments(token)
+        
+        flipped = bytearray(token)
+        flipped[HEADER_BYTES + 10] ^= 1
+        truncated = header + b"".join(segments[:-1])
+        reordered = header + segments[1] + segments[0] + b"".join(segments[2:])
+        bad_header = bytearray(token)
+        bad_header[HEADER_BYTES - 1] ^= 1
+        for candidate in (bytes(flipped), truncated, reordered, bytes(bad_header), token[:10]):
+            with self.assertRaises(StreamIntegrityError):
+                decrypt_bytes(candidate, secret="k")
+        with self.assertRaises(StreamIntegrityError):
+            decrypt_bytes(token, secret="other")
+    
+    def test_previous_keys_still_decrypt(self):
+        token = encrypt_bytes(b"archived export", secret="old")
+        self.assertEqual(decrypt_bytes(token, secret=["new", "old"]), b"archived export")
+    
+    def test_files_in_bounded_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            plain = os.path.join(tmp, "export.bin")
+            sealed = os.path.join(tmp, "export.enc")
+            restored = os.path.join(tmp, "export.out")
+            with open(plain, "wb") as handle:
+                for _ in range(64):
+                    handle.write(os.urandom(128 * 1024))
+            
+            tracemalloc.start()
+            encrypt_file(plain, sealed, secret="k")
+            decrypt_file(sealed, restored, secret="k")
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            self.assertLess(peak, 1024 * 1024)
+            with open(plain, "rb") as left, open(restored, "rb") as right:
+                self.assertEqual(left.read(), right.read())
+            
+            with open(sealed, "r+b") as handle:
+                handle.truncate(os.path.getsize(sealed) - 1)
+            with self.assertRaises(StreamIntegrityError):
+                decrypt_file(sealed, restored, secret="k")
+            self.assertFalse(os.path.exists(restored))
+    
+    def test_stream_objects(self):
+        source, target = io.BytesIO(b"x" * 5000), io.BytesIO()
+        written = encrypt_stream(source, target, secret="k", chunk_size=self.CHUNK)
+        self.assertEqual(written, len(target.getvalue()))
+        self.assertEqual(decrypt_bytes(target.getvalue(), secret="k"), b"x" * 5000)
+
+
+if __name__ == "__main__":
+    unittest.main()
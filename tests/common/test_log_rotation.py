@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the compressing rotating file handler.
+"""
+
+import gzip
+import logging
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.middleware.log_rotation import CompressingRotatingFileHandler
+from modules.common.middleware.logging import setup_logging, shutdown_logging
+
+
+def _record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+class TestCompressingRotatingFileHandler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp.name, "app.log")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_size_rotation_compresses_in_background(self):
+        handler = CompressingRotatingFileHandler(
+            self.log_file, max_bytes=1000, retention_bytes=None, compression="gzip",
+        )
+        for i in range(100):
+            handler.emit(_record(f"line {i:03d} " + "x" * 40))
+        handler.close()
+        
+        rotated = [path for path in os.listdir(self.tmp.name) if path != "app.log"]
+        self.assertTrue(rotated)
+        self.assertTrue(all(path.endswith(".gz") for path in rotated))
+        lines = []
+        for path in handler.rotated_files():
+            with gzip.open(path, "rt", encoding="utf-8") as source:
+                lines.extend(source.read().splitlines())
+        with open(self.log_file, encoding="utf-8") as source:
+            lines.extend(source.read().splitlines())
+        self.assertEqual([line[:8] for line in lines], [f"line {i:03d}" for i in range(100)])
+        self.assertLessEqual(os.path.getsize(self.log_file), 1000)
+    
+    def test_size_limit_counts_encoded_bytes(self):
+        handler = CompressingRotatingFileHandler(
+            self.log_file, max_bytes=1000, retention_bytes=None, compression="none",
+        )
+        for i in range(60):
+            handler.emit(_record(f"{i:03d} " + "日志" * 10))  # 64 bytes, 25 characters per line
+        handler.close()
+        
+        self.assertTrue(handler.rotated_files())
+        self.assertLessEqual(os.path.getsize(self.log_file), 1000)
+        self.assertTrue(all(path.stat().st_size <= 1000 for path in handler.rotated_files()))
+    
+    def test_retention_by_total_bytes(self):
+        handler = CompressingRotatingFileHandler(
+            self.log_file, max_bytes=2000, retention_bytes=5000, compression="none",
+        )
+        for i in range(200):
+            handler.emit(_record(f"{i:04d} " + "y" * 60))
+            handler.wait_idle()
+        handler.close()
+        
+        rotated = handler.rotated_files()
+        self.assertTrue(rotated)
+        self.assertLessEqual(sum(path.stat().st_size for path in rotated), 5000)
+        # The newest rotated file survives; older ones were deleted first.
+        with open(rotated[-1], encoding="utf-8") as source:
+            self.assertGreaterEqual(int(source.readline()[:4]), 120)
+    
+    def test_time_rotation(self):
+        handler = CompressingRotatingFileHandler(
+            self.log_file, max_bytes=None, when="H", compression="gzip",
+        )
+        self.assertAlmostEqual(handler.rollover_at, time.time() + 3600, delta=5)
+        handler.emit(_record("before"))
+        handler.rollover_at = time.time() - 1
+        handler.emit(_record("after"))
+        handler.close()
+        
+        self.assertEqual(len(handler.rotated_files()), 1)
+        with open(self.log_file, encoding="utf-8") as source:
+            self.assertEqual(source.read(), "after\n")
+    
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            CompressingRotatingFileHandler(self.log_file, when="fortnight")
+        with self.assertRaises(ValueError):
+            CompressingRotatingFileHandler(self.log_file, compression="lz4")
+    
+    def test_setup_logging_uses_rotating_handler(self):
+        logger = setup_logging(log_file=self.log_file, max_bytes=4096, use_queue=True)
+        try:
+            for i in range(500):
+                logger.info("record %d", i)
+        finally:
+            shutdown_logging()
+            logging.getLogger().handlers.clear()
+        self.assertTrue(any(name.startswith("app.log.") for name in os.listdir(self.tmp.name)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,13 +6,27 @@
 import unittest
 from unittest.mock import patch, MagicMock
 import sys
+import io
+import json
 import logging
+import os
+import tempfile
 from pathlib import Path
 
 # 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from modules.common.middleware.logging import setup_logging
+from modules.common.middleware.logging import (
+    BoundedQueueHandler,
+    JsonFormatter,
+    SamplingFilter,
+    log_event,
+    log_request,
+    log_response,
+    logging_stats,
+    setup_logging,
+    shutdown_logging,
+)
 
 
 class TestLoggingMiddleware(unittest.TestCase):
@@ -79,5 +93,243 @@ class TestLoggingMiddleware(unittest.TestCase):
         self.assertIn("Error message", str(log_context.output))
 
 
+
+def _record(message, level=logging.INFO, args=None):
+    return logging.LogRecord("test", level, __file__, 1, message, args, None)
+
+
+class TestQueueLogging(unittest.TestCase):
+    """Queue mode and overflow policies"""
+    
+    def tearDown(self):
+        shutdown_logging()
+        logging.getLogger().handlers.clear()
+    
+    def test_queue_mode_writes_through_listener(self):
+        """Records reach the file handler via the background listener"""
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = os.path.join(tmp, "app.log")
+            logger = setup_logging(log_file=log_file, use_queue=True)
+            self.assertEqual(len(logger.handlers), 1)
+            self.assertIsInstance(logger.handlers[0], BoundedQueueHandler)
+            
+            for i in range(50):
+                logger.info("queued %d", i)
+            self.assertEqual(logging_stats()["queued"], 50)
+            shutdown_logging()
+            
+            with open(log_file, encoding="utf-8") as handle:
+                lines = handle.read().splitlines()
+            self.assertEqual(len(lines), 50)
+            self.assertIn("queued 49", lines[-1])
+            self.assertEqual(logging_stats(), {})
+    
+    def test_drop_policy_counts_overflow(self):
+        """A full queue drops records instead of blocking"""
+        handler = BoundedQueueHandler(maxsize=2, overflow="drop")
+        for i in range(5):
+            handler.emit(_record(f"m{i}"))
+        stats = handler.stats()
+        self.assertEqual((stats["queued"], stats["dropped"], stats["pending"]), (2, 3, 2))
+    
+    def test_block_policy_times_out(self):
+        """Blocking waits up to block_timeout, then drops"""
+        handler = BoundedQueueHandler(maxsize=1, overflow="block", block_timeout=0.01)
+        handler.emit(_record("first"))
+        handler.emit(_record("second"))
+        self.assertEqual(handler.stats()["dropped"], 1)
+    
+    def test_sample_policy_keeps_warnings(self):
+        """Under pressure only one in N low-level records is kept"""
+        handler = BoundedQueueHandler(maxsize=100, overflow="sample", sample_every=4, sample_threshold=0)
+        for i in range(8):
+            handler.emit(_record(f"info {i}"))
+        handler.emit(_record("warn", logging.WARNING))
+        stats = handler.stats()
+        self.assertEqual(stats["queued"], 3)
+        self.assertEqual(stats["sampled_out"], 6)
+    
+    def test_message_is_frozen_at_enqueue(self):
+        """Arguments are merged before the record leaves the calling thread"""
+        handler = BoundedQueueHandler(maxsize=10)
+        items = [1]
+        handler.emit(_record("items=%s", args=(items,)))
+        items.append(2)
+        self.assertEqual(handler.queue.get_nowait().getMessage(), "items=[1]")
+    
+    def test_invalid_overflow_policy(self):
+        """Unknown overflow policies are rejected"""
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(overflow="spill")
+
+
+
+class TestStructuredLogging(unittest.TestCase):
+    """JSON formatter and lazy request/response logging"""
+    
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.logger = logging.getLogger("test.structured")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        handler = logging.StreamHandler(self.stream)
+        handler.setFormatter(JsonFormatter())
+        self.logger.handlers = [handler]
+    
+    def lines(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+    
+    def test_messages_are_escaped(self):
+        """Quotes and newlines in messages still produce valid JSON"""
+        self.logger.info('he said "hi"\nthen left')
+        record = self.lines()[0]
+        self.assertEqual(record["message"], 'he said "hi"\nthen left')
+        self.assertEqual(record["level"], "INFO")
+        self.assertTrue(record["timestamp"].endswith("Z"))
+    
+    def test_request_and_response_fields(self):
+        """Request/response helpers attach their fields at the top level"""
+        log_request("GET", "/users", params={"q": "a\"b"}, logger=self.logger)
+        log_response(503, "/users", 12.5, logger=self.logger)
+        log_event("cache.miss", {"key": "k1"}, logger=self.logger)
+        request, response, event = self.lines()
+        self.assertEqual((request["method"], request["path"], request["params"]), ("GET", "/users", {"q": 'a"b'}))
+        self.assertEqual((response["status"], response["duration_ms"], response["level"]), (503, 12.5, "ERROR"))
+        self.assertEqual((event["message"], event["key"]), ("cache.miss", "k1"))
+    
+    def test_disabled_level_does_no_work(self):
+        """Nothing is formatted when the level is disabled"""
+        self.logger.setLevel(logging.ERROR)
+        rendered = []
+        
+        class Params(dict):
+            def __repr__(self):
+                rendered.append(True)
+                return super().__repr__()
+        
+        log_request("GET", "/users", params=Params(q="x"), logger=self.logger)
+        log_response(200, "/users", 1.0, logger=self.logger)
+        self.assertEqual(rendered, [])
+        self.assertEqual(self.stream.getvalue(), "")
+    
+    def test_exceptions_are_included(self):
+        """Tracebacks are serialized under "exception\""""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            self.logger.exception("failed")
+        self.assertIn("ValueError: boom", self.lines()[0]["exception"])
+
+
+
+class TestSamplingFilter(unittest.TestCase):
+    """Per-path sampling and duplicate suppression"""
+    
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.logger = logging.getLogger("test.sampling")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = logging.StreamHandler(self.stream)
+        self.handler.setFormatter(JsonFormatter())
+        self.logger.handlers = [self.handler]
+    
+    def lines(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+    
+    def test_path_rates(self):
+        """Hot paths are sampled, others keep every record"""
+        sampler = SamplingFilter(path_rates={"/health": 0.0, "/api/*": 0.1}, seed=1)
+        self.handler.addFilter(sampler)
+        for i in range(1000):
+            log_request("GET", "/health", logger=self.logger)
+            log_request("GET", "/api/items", params={"i": i}, logger=self.logger)
+            log_request("GET", "/login", params={"i": i}, logger=self.logger)
+        paths = [line["path"] for line in self.lines()]
+        self.assertEqual(paths.count("/health"), 0)
+        self.assertEqual(paths.count("/login"), 1000)
+        self.assertTrue(50 < paths.count("/api/items") < 150)
+        self.assertEqual(sampler.rate_for("/api/v2/x"), 0.1)
+        self.assertEqual(sampler.rate_for(None), 1.0)
+    
+    def test_errors_and_slow_requests_are_kept(self):
+        """Errors and slow requests bypass sampling"""
+        sampler = SamplingFilter(default_rate=0.0, slow_ms=500)
+        self.handler.addFilter(sampler)
+        log_response(200, "/a", 10, logger=self.logger)
+        for i in range(100):
+            log_response(200, "/a", 800 + i, logger=self.logger)
+            log_response(500, "/a", 10 + i, logger=self.logger)
+        lines = [(l["status"], l["duration_ms"]) for l in self.lines()]
+        self.assertEqual(len(lines), 200)
+        self.assertEqual(lines[:2], [(200, 800), (500, 10)])
+        self.assertEqual(sampler.stats(), {"sampled_out": 1, "suppressed": 0, "keys": 200})
+    
+    def test_dedup_important_can_be_disabled(self):
+        """With dedup_important=False, identical errors are all kept"""
+        self.handler.addFilter(SamplingFilter(dedup_important=False))
+        for _ in range(100):
+            self.logger.error("payment gateway timeout")
+        self.assertEqual(len(self.lines()), 100)
+    
+    def test_duplicate_lines_are_suppressed(self):
+        """Identical rendered lines are cut to the burst; different arguments are not"""
+        sampler = SamplingFilter()
+        self.handler.addFilter(sampler)
+        with patch("modules.common.middleware.logging.time.monotonic", return_value=100.0):
+            for _ in range(50):
+                self.logger.info("cache miss for %s", "user:1")
+            for i in range(50):
+                self.logger.info("cache miss for %s", f"user:{i + 2}")
+        self.assertEqual(len(self.lines()), 60)
+        self.assertEqual(sampler.stats()["suppressed"], 40)
+    
+    def test_error_storm_collapses_with_default_settings(self):
+        """Identical ERROR lines are cut to the burst, then one line carries the count"""
+        sampler = SamplingFilter()
+        self.handler.addFilter(sampler)
+        with patch("modules.common.middleware.logging.time.monotonic", return_value=100.0):
+            for _ in range(500):
+                self.logger.error("payment gateway timeout")
+        self.assertEqual(len(self.lines()), 10)
+        
+        with patch("modules.common.middleware.logging.time.monotonic", return_value=101.0):
+            self.logger.error("payment gateway timeout")
+        lines = self.lines()
+        self.assertEqual(len(lines), 11)
+        self.assertEqual(lines[-1]["message"], "payment gateway timeout [490 similar messages suppressed]")
+        self.assertEqual(lines[-1]["suppressed"], 490)
+    
+    def test_duplicate_errors_are_suppressed_with_summary(self):
+        """An error storm is cut to a burst plus a suppressed count"""
+        sampler = SamplingFilter(burst=3, refill_per_second=1000)
+        self.handler.addFilter(sampler)
+        with patch("modules.common.middleware.logging.time.monotonic", return_value=100.0):
+            for _ in range(50):
+                log_response(503, "/pay", 1.0, logger=self.logger)
+            log_response(503, "/other", 1.0, logger=self.logger)
+        self.assertEqual(len(self.lines()), 4)
+        self.assertEqual(sampler.stats()["suppressed"], 47)
+        
+        with patch("modules.common.middleware.logging.time.monotonic", return_value=101.0):
+            log_response(503, "/pay", 1.0, logger=self.logger)
+        summary = self.lines()[-1]
+        self.assertEqual(summary["suppressed"], 47)
+        self.assertIn("[47 similar messages suppressed]", summary["message"])
+    
+    def test_shared_between_handlers(self):
+        """A filter on several handlers decides once per record"""
+        sampler = SamplingFilter(burst=2, refill_per_second=0)
+        other = logging.StreamHandler(io.StringIO())
+        self.handler.addFilter(sampler)
+        other.addFilter(sampler)
+        self.logger.addHandler(other)
+        for _ in range(5):
+            self.logger.info("same line")
+        self.assertEqual(len(self.lines()), 2)
+        self.assertEqual(other.stream.getvalue().count("same line"), 2)
+        self.assertEqual(sampler.stats()["suppressed"], 3)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for in-process latency histograms and their Prometheus export.
+"""
+
+import logging
+import random
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.middleware.logging import log_response
+from modules.common.middleware.metrics import OTHER_PATH, LatencyHistograms, default_histograms
+
+
+class TestLatencyHistograms(unittest.TestCase):
+    def test_bucket_bounds_are_inclusive(self):
+        histograms = LatencyHistograms(min_ms=1, max_ms=1000, sub_buckets=4)
+        self.assertEqual(histograms.bounds_ms[:6], [1, 1.25, 1.5, 1.75, 2.0, 2.5])
+        self.assertEqual(histograms.bucket_index(0.2), 0)
+        self.assertEqual(histograms.bucket_index(1.25), 1)
+        self.assertEqual(histograms.bucket_index(1.26), 2)
+        self.assertEqual(histograms.bucket_index(10_000), histograms.bucket_count - 1)
+
+    def test_quantiles_within_bucket_error(self):
+        histograms = LatencyHistograms()
+        rng = random.Random(3)
+        values = sorted(rng.lognormvariate(3, 1) for _ in range(20_000))
+        for value in values:
+            histograms.observe("/api", 200, value)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * len(values)) - 1]
+            estimate = histograms.quantile(q, path="/api")
+            self.assertGreaterEqual(estimate, exact)
+            self.assertLessEqual(estimate, exact * 1.25)
+        self.assertIsNone(histograms.quantile(0.5, path="/missing"))
+
+    def test_per_thread_shards_are_merged(self):
+        histograms = LatencyHistograms()
+
+        def worker():
+            for i in range(1_000):
+                histograms.observe("/items", 200 if i % 10 else 500, 5.0)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        histograms.observe("/items", 200, 5.0)
+
+        snapshot = histograms.snapshot()
+        ok, failed = snapshot[("/items", 200)], snapshot[("/items", 500)]
+        self.assertEqual(sum(ok[:-1]), 7_201)
+        self.assertEqual(sum(failed[:-1]), 800)
+        self.assertAlmostEqual(ok[-1], 7_201 * 5.0)
+        # Finished threads were folded into one aggregate when they exited.
+        self.assertEqual(len(histograms._shards), 1)
+        self.assertEqual(sum(histograms.snapshot()[("/items", 200)][:-1]), 7_201)
+
+    def test_short_lived_threads_do_not_accumulate_shards(self):
+        histograms = LatencyHistograms()
+
+        def request(i):
+            histograms.observe("/items", 200, float(i % 50))
+
+        for batch in range(20):
+            threads = [threading.Thread(target=request, args=(i,)) for i in range(25)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            # No snapshot in between: shards are retired as their threads exit.
+            self.assertLessEqual(len(histograms._shards), 1)
+        self.assertEqual(sum(histograms.snapshot()[("/items", 200)][:-1]), 500)
+
+    def test_series_cardinality_is_capped(self):
+        histograms = LatencyHistograms(max_series=2)
+        for path in ("/a", "/b", "/c", "/d"):
+            histograms.observe(path, 200, 1.0)
+        self.assertEqual(
+            sorted(histograms.snapshot()),
+            [("/a", 200), ("/b", 200), (OTHER_PATH, 200)],
+        )
+
+    def test_prometheus_text(self):
+        histograms = LatencyHistograms(min_ms=1, max_ms=8, sub_buckets=1)
+        histograms.observe('/q"x', 200, 0.5)
+        histograms.observe('/q"x', 200, 3.0)
+        histograms.observe('/q"x', 200, 100.0)
+        lines = histograms.render_prometheus().splitlines()
+        labels = 'path="/q\\"x",status="200"'
+        self.assertIn("# TYPE http_request_duration_seconds histogram", lines)
+        self.assertEqual(
+            [line for line in lines if line.startswith("http_request_duration_seconds_bucket")],
+            [
+                f'http_request_duration_seconds_bucket{{{labels},le="0.001"}} 1',
+                f'http_request_duration_seconds_bucket{{{labels},le="0.002"}} 1',
+                f'http_request_duration_seconds_bucket{{{labels},le="0.004"}} 2',
+                f'http_request_duration_seconds_bucket{{{labels},le="0.008"}} 2',
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3',
+            ],
+        )
+        self.assertIn(f"http_request_duration_seconds_sum{{{labels}}} 0.1035", lines)
+        self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 3", lines)
+        self.assertIn(f"http_requests_total{{{labels}}} 3", lines)
+
+    def test_log_response_records_latency(self):
+        default_histograms.reset()
+        logger = logging.getLogger("test.metrics")
+        logger.setLevel(logging.CRITICAL)
+        log_response(200, "/health", 2.0, logger=logger)
+        log_response(503, "/health", 40.0, logger=logger)
+        snapshot = default_histograms.snapshot()
+        self.assertEqual(sum(snapshot[("/health", 200)][:-1]), 1)
+        self.assertEqual(sum(snapshot[("/health", 503)][:-1]), 1)
+        default_histograms.reset()
+
+
+if __name__ == "__main__":
+    unittest.main()
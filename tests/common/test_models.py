@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Tests for model serialization helpers.
+"""
+
+import copy
+import enum
+import io
+import json
+import pickle
+import sys
+import unittest
+import uuid
+from collections import namedtuple
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.models import (
+    BaseModel,
+    CompactTimestampMixin,
+    ModelBatch,
+    ModelValidationError,
+    TimestampMixin,
+    dump_models,
+    dumps_models,
+    serializers_for,
+    slotted_model,
+)
+
+
+class Status(enum.Enum):
+    ACTIVE = "active"
+
+
+class Kind(str, enum.Enum):
+    RUN = "run"
+
+
+class Priority(enum.IntEnum):
+    HIGH = 1
+
+
+Point = namedtuple("Point", "x y")
+
+
+@dataclass
+class Step(BaseModel):
+    name: str = "step"
+    started_at: datetime = field(default_factory=lambda: datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+    tags: List[str] = field(default_factory=lambda: ["a", "b"])
+
+
+@dataclass
+class Run(TimestampMixin, BaseModel):
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    title: str = 'quote " and ünïcode'
+    status: Status = Status.ACTIVE
+    kind: Kind = Kind.RUN
+    priority: Priority = Priority.HIGH
+    cost: Decimal = Decimal("1.50")
+    latency_ms: Optional[float] = 12.5
+    step: Step = field(default_factory=Step)
+    steps: List[Step] = field(default_factory=lambda: [Step(), Step(name="second")])
+    meta: Dict[Any, Any] = field(default_factory=lambda: {
+        "set": {1, 2}, 3: (date(2020, 1, 1), Point(1, Step())), "kind": Kind.RUN,
+    })
+
+
+@dataclass
+class ChildRun(Run):
+    extra: int = 1
+
+
+class TestCompiledSerializers(unittest.TestCase):
+    def test_to_dict_matches_asdict(self):
+        run = Run()
+        result = run.to_dict()
+        self.assertEqual(repr(result), repr(asdict(run)))
+        # Mutable values are still copied, immutable ones are shared.
+        self.assertIsNot(result["steps"][0]["tags"], run.steps[0].tags)
+        self.assertIsNot(result["meta"]["set"], run.meta["set"])
+        self.assertIs(result["title"], run.title)
+        self.assertIs(result["created_at"], run.created_at)
+    
+    def test_to_json_matches_previous_output(self):
+        run = Run()
+        legacy = json.dumps(asdict(run), default=str, ensure_ascii=False)
+        self.assertEqual(run.to_json(), legacy)
+        self.assertEqual(json.loads(run.to_json(compact=True)), json.loads(legacy))
+        self.assertTrue(run.to_json(compact=True).startswith('{"created_at":"'))
+    
+    def test_serializers_are_cached_per_class(self):
+        self.assertIs(serializers_for(Run), serializers_for(Run))
+        self.assertIsNot(serializers_for(ChildRun), serializers_for(Run))
+        self.assertIn("extra", ChildRun().to_dict())
+        self.assertNotIn("extra", Run().to_dict())
+    
+    def test_batch_helpers(self):
+        runs = [Run(), ChildRun(), Run()]
+        self.assertEqual(repr(dump_models(runs)), repr([asdict(run) for run in runs]))
+        legacy = json.dumps([asdict(run) for run in runs], default=str, ensure_ascii=False)
+        self.assertEqual(dumps_models(runs), legacy)
+        self.assertEqual(json.loads(dumps_models(runs, compact=True)), json.loads(legacy))
+
+
+@slotted_model
+class SlimRun(CompactTimestampMixin, BaseModel):
+    status: str = "pending"
+    attempts: int = 0
+    tags: List[str] = field(default_factory=list)
+
+
+@dataclass
+class WideRun(TimestampMixin, BaseModel):
+    status: str = "pending"
+    attempts: int = 0
+    tags: List[str] = field(default_factory=list)
+
+
+class TestSlottedModels(unittest.TestCase):
+    def test_instances_have_no_dict(self):
+        run = SlimRun(status="running")
+        self.assertFalse(hasattr(run, "__dict__"))
+        self.assertEqual(SlimRun.__slots__, ("status", "attempts", "tags"))
+        with self.assertRaises(AttributeError):
+            run.unknown = 1
+        self.assertEqual(SlimRun.__qualname__, "SlimRun")
+    
+    def test_compact_timestamps_round_trip(self):
+        stamp = datetime(2024, 5, 6, 7, 8, 9, 123456, tzinfo=timezone.utc)
+        run = SlimRun(created_at=stamp)
+        self.assertEqual(run._created_at_us, 1714979289123456)
+        self.assertEqual(run.created_at, stamp)
+        self.assertIsNone(run.updated_at)
+        run.touch()
+        self.assertGreater(run.updated_at, stamp)
+        # Naive datetimes are taken as UTC; epoch microseconds are accepted as is.
+        self.assertEqual(SlimRun(created_at=stamp.replace(tzinfo=None)).created_at, stamp)
+        self.assertEqual(SlimRun(created_at=1714979289123456).created_at, stamp)
+        with self.assertRaises(TypeError):
+            SlimRun(created_at="2024-05-06")
+    
+    def test_compatible_with_regular_models(self):
+        stamp = datetime(2024, 5, 6, tzinfo=timezone.utc)
+        slim = SlimRun(created_at=stamp, status="done", tags=["x"])
+        wide = WideRun(created_at=stamp, status="done", tags=["x"])
+        self.assertEqual(slim.to_dict(), wide.to_dict())
+        self.assertEqual(slim.to_json(), wide.to_json())
+        self.assertEqual(SlimRun.from_dict(wide.to_dict()), slim)
+        self.assertEqual(pickle.loads(pickle.dumps(slim)), slim)
+        self.assertEqual(copy.deepcopy(slim), slim)
+    
+    def test_default_created_at_is_now(self):
+        before = datetime.now(timezone.utc)
+        run = SlimRun()
+        self.assertLessEqual(before.replace(microsecond=0), run.created_at)
+        self.assertLessEqual(run.created_at, datetime.now(timezone.utc))
+
+
+@dataclass
+class Sample(TimestampMixin, BaseModel):
+    status: str = "ok"
+    latency_ms: float = 0.0
+    attempts: int = 1
+    error_rate: Optional[float] = None
+
+
+def make_samples(count=10):
+    return [
+        Sample(
+            status="failed" if i % 3 == 0 else "ok",
+            latency_ms=float(i),
+            attempts=i % 4,
+            error_rate=None if i % 2 else 0.5,
+        )
+        for i in range(count)
+    ]
+
+
+class TestModelBatch(unittest.TestCase):
+    def test_numeric_columns_are_typed_arrays(self):
+        batch = ModelBatch.from_models(make_samples())
+        self.assertEqual(len(batch), 10)
+        self.assertEqual(batch["latency_ms"].format, "d")
+        self.assertEqual(batch["attempts"].format, "q")
+        # Optional numeric columns holding None fall back to lists.
+        self.assertFalse(batch.is_numeric("error_rate"))
+        self.assertIsInstance(batch["status"], list)
+    
+    def test_slicing_is_zero_copy(self):
+        batch = ModelBatch.from_models(make_samples())
+        window = batch[2:8]
+        self.assertEqual(len(window), 6)
+        self.assertIs(window["latency_ms"].obj, batch["latency_ms"].obj)
+        self.assertEqual(list(window["latency_ms"]), [2.0, 3.0, 4.0, 5.0, 6.0, 7.0])
+        self.assertEqual(batch[-1].latency_ms, 9.0)
+    
+    def test_filters_and_aggregations(self):
+        batch = ModelBatch.from_models(make_samples())
+        failed = batch.where("status", "==", "failed").where("latency_ms", ">", 2)
+        self.assertEqual(list(failed["latency_ms"]), [3.0, 6.0, 9.0])
+        self.assertEqual(batch.where("attempts", "in", {0, 3}).count(), 5)
+        self.assertEqual(batch.where("error_rate", "<", 1).count(), 5)
+        self.assertEqual(batch.where("latency_ms", lambda v: v % 2 == 0).sum("latency_ms"), 20.0)
+        self.assertEqual(batch.mean("latency_ms"), 4.5)
+        self.assertEqual((batch.min("attempts"), batch.max("attempts")), (0, 3))
+        self.assertEqual(batch.count("error_rate"), 5)
+        self.assertEqual(batch.value_counts("status"), {"failed": 4, "ok": 6})
+        self.assertEqual(sorted(batch.group_by("status")), ["failed", "ok"])
+        self.assertIsNone(batch.where("latency_ms", ">", 100).mean("latency_ms"))
+        with self.assertRaises(ValueError):
+            batch.where("latency_ms", "~", 1)
+    
+    def test_exports_match_row_models(self):
+        samples = make_samples()
+        batch = ModelBatch.from_models(samples)
+        self.assertEqual(batch.to_records(), [sample.to_dict() for sample in samples])
+        self.assertEqual(batch.to_json(), dumps_models(samples))
+        self.assertEqual(batch.to_models(), samples)
+        rebuilt = ModelBatch.from_records(Sample, batch.to_records())
+        self.assertEqual(list(rebuilt), samples)
+        stream = io.StringIO()
+        self.assertEqual(batch[:2].to_csv(stream), 2)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0], "created_at,updated_at,status,latency_ms,attempts,error_rate")
+        self.assertTrue(lines[1].endswith(",,failed,0.0,0,0.5"))
+
+
+class Color(enum.Enum):
+    RED = "red"
+
+
+@dataclass
+class Record(TimestampMixin, BaseModel):
+    id: uuid.UUID = field(default_factory=uuid.uuid4)
+    color: Color = Color.RED
+    score: float = 0.0
+    count: int = 0
+    price: Optional[Decimal] = None
+    steps: List[Step] = field(default_factory=list)
+    span: Tuple[int, int] = (0, 0)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+class TestFromDict(unittest.TestCase):
+    def test_round_trips(self):
+        record = Record(score=1.5, count=2, price=Decimal("9.99"), steps=[Step(name="x")], span=(1, 2))
+        self.assertEqual(Record.from_dict(record.to_dict()), record)
+        data = json.loads(record.to_json())
+        data["color"] = "red"  # to_json renders plain enums with str()
+        self.assertEqual(Record.from_dict(data), record)
+    
+    def test_coercion(self):
+        record = Record.from_dict({
+            "id": "12345678-1234-5678-1234-567812345678",
+            "created_at": "2024-01-02T03:04:05Z",
+            "score": 3,
+            "steps": [{"name": "a", "started_at": "2024-01-02T00:00:00+00:00"}],
+        })
+        self.assertEqual(record.id, uuid.UUID("12345678-1234-5678-1234-567812345678"))
+        self.assertEqual(record.created_at, datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc))
+        self.assertIsInstance(record.score, float)
+        self.assertIsInstance(record.steps[0], Step)
+        self.assertEqual(record.steps[0].started_at.tzinfo, timezone.utc)
+    
+    def test_validation_errors(self):
+        cases = {
+            "Record.count: expected int, got str": {"count": "3"},
+            "Record.count: expected int, got bool": {"count": True},
+            "Record.steps: Step.name: expected str, got int": {"steps": [{"name": 1}]},
+        }
+        for message, data in cases.items():
+            with self.assertRaises(ModelValidationError) as ctx:
+                Record.from_dict(data)
+            self.assertEqual(str(ctx.exception), message)
+        for data in ({"id": "nope"}, {"created_at": "yesterday"}, {"color": "blue"}, {"price": "abc"}):
+            with self.assertRaises(ModelValidationError):
+                Record.from_dict(data)
+        with self.assertRaises(ModelValidationError):
+            Run.from_dict({"steps": None})
+    
+    def test_unknown_keys(self):
+        self.assertEqual(Record.from_dict({"count": 1, "other": 2}).extra, {})
+        with self.assertRaises(ModelValidationError):
+            Record.from_dict({"other": 2}, unknown="raise")
+        collected = Record.from_dict({"other": 2, "extra": {"kept": 1}}, unknown="collect")
+        self.assertEqual(collected.extra, {"kept": 1, "other": 2})
+        with self.assertRaises(TypeError):
+            Step.from_dict({}, unknown="collect")
+        with self.assertRaises(ValueError):
+            Step.from_dict({}, unknown="drop")
+    
+    def test_from_dicts_and_compact_models(self):
+        rows = [{"count": i, "score": i / 2} for i in range(5)]
+        records = Record.from_dicts(rows)
+        self.assertEqual([record.count for record in records], list(range(5)))
+        slim = SlimRun(status="done")
+        self.assertEqual(SlimRun.from_dict(json.loads(slim.to_json())), slim)
+
+
+if __name__ == "__main__":
+    unittest.main()
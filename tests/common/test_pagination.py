@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for keyset (cursor) pagination.
+"""
+
+import sqlite3
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.interfaces import CRUDRepository
+from modules.common.models import Cursor, CursorParams, CursorResult, InvalidCursorError, PaginationParams, PaginationResult
+
+SECRET = "test-cursor-secret"
+START = datetime(2024, 1, 1)
+
+
+class SqliteRunRepository(CRUDRepository[Dict[str, Any], int]):
+    """Minimal repository over an in-memory SQLite table (supports row values)."""
+    
+    def __init__(self, count: int):
+        self.db = sqlite3.connect(":memory:")
+        self.db.execute("CREATE TABLE runs (id INTEGER PRIMARY KEY, created_at TEXT)")
+        # Several rows share a timestamp, so the id tie-breaker matters.
+        self.db.executemany(
+            "INSERT INTO runs VALUES (?, ?)",
+            [(i, (START + timedelta(minutes=i // 3)).isoformat()) for i in range(count)],
+        )
+    
+    cursor_secret = SECRET
+    
+    def fetch_keyset(self, params: CursorParams, filters=None) -> List[Dict[str, Any]]:
+        where, args, order_by = params.keyset_sql(placeholder="?")
+        # Keys decode as datetimes; this table stores ISO text.
+        args = [arg.isoformat() if isinstance(arg, datetime) else arg for arg in args]
+        rows = self.db.execute(
+            f"SELECT id, created_at FROM runs {'WHERE ' + where if where else ''} ORDER BY {order_by} LIMIT ?",
+            args + [params.get_fetch_limit()],
+        ).fetchall()
+        return [{"id": row[0], "created_at": datetime.fromisoformat(row[1])} for row in rows]
+    
+    def find_by_id(self, id):
+        raise NotImplementedError
+    
+    def save(self, entity):
+        raise NotImplementedError
+    
+    def delete(self, id):
+        raise NotImplementedError
+    
+    def find_all(self, filters=None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    def find_paginated(self, params: PaginationParams, filters=None) -> PaginationResult:
+        raise NotImplementedError
+    
+    def count(self, filters=None) -> int:
+        raise NotImplementedError
+    
+    def exists(self, id) -> bool:
+        raise NotImplementedError
+
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip_typed_keys(self):
+        key = (datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), UUID(int=7), "name", 3, None)
+        token = Cursor(key, "prev", ("a", "b", "c", "d", "e")).encode(SECRET)
+        self.assertNotIn("=", token)
+        decoded = Cursor.decode(token, SECRET)
+        self.assertEqual(decoded, Cursor(key, "prev", ("a", "b", "c", "d", "e")))
+    
+    def test_rejects_tampering_and_other_secrets(self):
+        token = Cursor((1,), "next", ("id",)).encode(SECRET)
+        body, signature = token.split(".")
+        forged = Cursor((999,), "next", ("id",)).encode("other").split(".")[0]
+        for bad in (f"{forged}.{signature}", token + "x", "garbage", ""):
+            with self.assertRaises(InvalidCursorError):
+                Cursor.decode(bad, SECRET)
+        with self.assertRaises(InvalidCursorError):
+            Cursor.decode(token, "other")
+    
+    def test_params_validate_sort_and_clamp_limit(self):
+        token = Cursor((1,), "next", ("id",)).encode(SECRET)
+        with self.assertRaises(InvalidCursorError):
+            CursorParams(cursor=token, secret=SECRET)
+        params = CursorParams(cursor=token, sort=("id",), limit=1000, secret=SECRET)
+        self.assertEqual((params.limit, params.key, params.direction), (100, (1,), "next"))
+    
+    def test_params_reject_cursor_for_other_sort_direction(self):
+        token = Cursor((1,), "next", ("id",), descending=True).encode(SECRET)
+        self.assertTrue(Cursor.decode(token, SECRET).descending)
+        with self.assertRaises(InvalidCursorError):
+            CursorParams(cursor=token, sort=("id",), secret=SECRET)
+        params = CursorParams(cursor=token, sort=("id",), descending=True, secret=SECRET)
+        self.assertEqual(params.keyset_sql()[0], "(id) < (%s)")
+        page = CursorResult.from_rows([{"id": 0}], params, key=lambda row: (row["id"],))
+        self.assertTrue(Cursor.decode(page.prev_cursor, SECRET).descending)
+    
+    def test_keyset_sql(self):
+        self.assertEqual(CursorParams().keyset_sql(), ("", [], "created_at ASC, id ASC"))
+        token = Cursor((5, 9), "prev", ("created_at", "id")).encode(SECRET)
+        params = CursorParams(cursor=token, secret=SECRET)
+        self.assertEqual(
+            params.keyset_sql(),
+            ("(created_at, id) < (%s, %s)", [5, 9], "created_at DESC, id DESC"),
+        )
+        params.descending = True
+        self.assertEqual(params.keyset_sql()[0], "(created_at, id) > (%s, %s)")
+
+
+class TestRepositoryPaging(unittest.TestCase):
+    def test_walk_forward_and_back(self):
+        repository = SqliteRunRepository(47)
+        pages = []
+        page = repository.find_after(None, limit=10)
+        self.assertFalse(page.has_prev())
+        while True:
+            pages.append([item["id"] for item in page.items])
+            if not page.has_next():
+                break
+            page = repository.find_after(page.next_cursor, limit=10)
+        self.assertEqual(sum(pages, []), list(range(47)))
+        self.assertEqual([len(ids) for ids in pages], [10, 10, 10, 10, 7])
+        
+        backwards = []
+        while page.has_prev():
+            page = repository.find_after(page.prev_cursor, limit=10)
+            backwards.append([item["id"] for item in page.items])
+        self.assertEqual(backwards, pages[-2::-1])
+        self.assertTrue(page.has_next())
+    
+    def test_empty_page_links_back_to_cursor(self):
+        repository = SqliteRunRepository(20)
+        first = repository.find_after(None, limit=10)
+        repository.db.execute("DELETE FROM runs WHERE id >= 10")
+        empty = repository.find_after(first.next_cursor, limit=10)
+        self.assertEqual(empty.items, [])
+        self.assertFalse(empty.has_next())
+        self.assertTrue(empty.has_prev())
+        self.assertEqual(Cursor.decode(empty.prev_cursor, SECRET).key, Cursor.decode(first.next_cursor, SECRET).key)
+        # The boundary row 9 was never deleted and comes back.
+        back = repository.find_after(empty.prev_cursor, limit=10)
+        self.assertEqual([item["id"] for item in back.items], list(range(10)))
+        self.assertFalse(back.has_prev())
+    
+    def test_empty_backward_page_links_forward_to_cursor(self):
+        repository = SqliteRunRepository(20)
+        second = repository.find_after(repository.find_after(None, limit=10).next_cursor, limit=10)
+        repository.db.execute("DELETE FROM runs WHERE id < 10")
+        empty = repository.find_after(second.prev_cursor, limit=10)
+        self.assertEqual(empty.items, [])
+        self.assertTrue(empty.has_next())
+        self.assertFalse(empty.has_prev())
+        forward = repository.find_after(empty.next_cursor, limit=10)
+        self.assertEqual([item["id"] for item in forward.items], list(range(10, 20)))
+    
+    def test_walk_descending_on_custom_sort(self):
+        repository = SqliteRunRepository(25)
+        page = repository.find_after(None, limit=10, sort=("id",), descending=True)
+        ids = []
+        while True:
+            ids.extend(item["id"] for item in page.items)
+            if not page.has_next():
+                break
+            page = repository.find_after(page.next_cursor, limit=10, sort=("id",), descending=True)
+        self.assertEqual(ids, list(range(24, -1, -1)))
+        back = repository.find_after(page.prev_cursor, limit=10, sort=("id",), descending=True)
+        self.assertEqual([item["id"] for item in back.items], list(range(14, 4, -1)))
+        # A cursor only pages the sort it was issued for.
+        with self.assertRaises(InvalidCursorError):
+            repository.find_after(page.prev_cursor, limit=10)
+    
+    def test_fetch_keyset_is_required(self):
+        class Legacy(CRUDRepository):
+            find_by_id = save = delete = find_all = find_paginated = count = exists = None
+        with self.assertRaises(TypeError):
+            Legacy()
+
+
+if __name__ == "__main__":
+    unittest.main()
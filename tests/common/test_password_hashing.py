@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the pool-backed password hashing service.
+"""
+
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.utils.encryption import hash_password, verify_password
+from modules.common.utils.password_hashing import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    calibrate_iterations,
+    hash_iterations,
+)
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def setUp(self):
+        self.hasher = PasswordHasher(2_000, max_workers=2)
+    
+    def tearDown(self):
+        self.hasher.close()
+    
+    def test_hash_and_verify(self):
+        hashed = self.hasher.hash("s3cret")
+        self.assertEqual(hash_iterations(hashed), 2_000)
+        self.assertTrue(verify_password("s3cret", hashed))
+        self.assertTrue(self.hasher.verify("s3cret", hashed))
+        self.assertFalse(self.hasher.verify("wrong", hashed))
+    
+    def test_hash_many(self):
+        hashes = self.hasher.hash_many([f"pw{i}" for i in range(10)])
+        self.assertEqual(len(set(hashes)), 10)
+        self.assertTrue(all(verify_password(f"pw{i}", h) for i, h in enumerate(hashes)))
+    
+    def test_rehash_on_login_when_cost_is_outdated(self):
+        legacy = hash_password("s3cret", iterations=1_000)
+        valid, upgraded = self.hasher.verify_and_update("s3cret", legacy)
+        self.assertTrue(valid)
+        self.assertEqual(hash_iterations(upgraded), 2_000)
+        self.assertTrue(verify_password("s3cret", upgraded))
+        
+        self.assertEqual(self.hasher.verify_and_update("s3cret", upgraded), (True, None))
+        self.assertEqual(self.hasher.verify_and_update("wrong", legacy), (False, None))
+        self.assertTrue(self.hasher.needs_rehash("not-a-hash"))
+    
+    def test_async_api_does_not_block_the_loop(self):
+        legacy = hash_password("s3cret", iterations=1_000)
+        
+        async def scenario():
+            ticks = 0
+            
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+            
+            task = asyncio.ensure_future(ticker())
+            hashed = await self.hasher.hash_async("s3cret")
+            result = await self.hasher.verify_and_update_async("s3cret", legacy)
+            task.cancel()
+            return hashed, result, ticks
+        
+        hashed, (valid, upgraded), ticks = asyncio.run(scenario())
+        self.assertTrue(verify_password("s3cret", hashed))
+        self.assertTrue(valid)
+        self.assertEqual(hash_iterations(upgraded), 2_000)
+        self.assertGreater(ticks, 0)
+    
+    def test_full_queue_sheds_load(self):
+        hasher = PasswordHasher(1_000, max_workers=1, max_pending=1, queue_timeout=0.01)
+        try:
+            blocker = hasher._submit(True, time.sleep, 0.3)
+            with self.assertRaises(PasswordHasherBusy):
+                asyncio.run(hasher.hash_async("x"))
+            with self.assertRaises(PasswordHasherBusy):
+                hasher.hash("x")
+            self.assertEqual(hasher.rejected, 2)
+            blocker.result()
+            self.assertTrue(hasher.verify("x", hasher.hash("x")))
+        finally:
+            hasher.close()
+    
+    def test_process_pool(self):
+        with PasswordHasher(1_000, max_workers=1, executor="process") as hasher:
+            self.assertTrue(verify_password("p", hasher.hash("p")))
+    
+    def test_calibration_is_clamped(self):
+        self.assertEqual(calibrate_iterations(0.001, sample_iterations=1_000, min_iterations=50_000), 50_000)
+        self.assertEqual(
+            calibrate_iterations(10_000, sample_iterations=1_000, min_iterations=10_000, max_iterations=20_000),
+            20_000,
+        )
+        calibrated = calibrate_iterations(20, sample_iterations=10_000, min_iterations=10_000)
+        self.assertEqual(calibrated % 10_000, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Rate limit middleware tests.
+"""
+
+import asyncio
+import importlib
+import multiprocessing
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from modules.common.middleware.rate_limit import (
+    GCRARateLimiter,
+    MultiTierRateLimiter,
+    RateLimitExceeded,
+    RateLimiter,
+    RateLimitStore,
+    RedisRateLimiter,
+    SharedMemoryRateLimiter,
+    SlidingWindowRateLimiter,
+    create_limiter,
+    rate_limit,
+)
+
+# The package re-exports the `rate_limit` decorator under the module's name.
+rl = importlib.import_module("modules.common.middleware.rate_limit")
+
+
+class FakeClock:
+    """Controllable replacement for `time.time` inside the limiter module."""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class ClockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.object(rl.time, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestAlgorithms(ClockTestCase):
+    def assert_quota(self, limiter):
+        results = [limiter.is_allowed("client") for _ in range(5)]
+        self.assertEqual(results, [(True, 4), (True, 3), (True, 2), (True, 1), (True, 0)])
+        self.assertEqual(limiter.is_allowed("client"), (False, 0))
+        # Other identifiers keep their own quota.
+        self.assertEqual(limiter.is_allowed("other"), (True, 4))
+
+    def test_sliding_log_quota(self):
+        self.assert_quota(RateLimiter(max_requests=5, window_seconds=10))
+
+    def test_sliding_window_quota(self):
+        self.assert_quota(SlidingWindowRateLimiter(max_requests=5, window_seconds=10))
+
+    def test_gcra_quota(self):
+        self.assert_quota(GCRARateLimiter(max_requests=5, window_seconds=10))
+
+    def test_sliding_window_weights_previous_window(self):
+        limiter = SlidingWindowRateLimiter(max_requests=4, window_seconds=10)
+        self.clock.now = 1_000_000.0  # start of a window
+        for _ in range(4):
+            self.assertTrue(limiter.is_allowed("client")[0])
+        self.assertFalse(limiter.is_allowed("client")[0])
+
+        # Halfway through the next window half of the old count still applies.
+        self.clock.advance(15)
+        self.assertEqual(limiter.is_allowed("client"), (True, 1))
+        self.assertEqual(limiter.is_allowed("client"), (True, 0))
+        self.assertFalse(limiter.is_allowed("client")[0])
+
+        # Skipping a whole window forgets everything.
+        self.clock.advance(30)
+        self.assertEqual(limiter.is_allowed("client"), (True, 3))
+
+    def test_gcra_refills_one_request_per_interval(self):
+        limiter = GCRARateLimiter(max_requests=5, window_seconds=10)
+        for _ in range(5):
+            limiter.is_allowed("client")
+        self.assertFalse(limiter.is_allowed("client")[0])
+        self.clock.advance(2)
+        self.assertEqual(limiter.is_allowed("client"), (True, 0))
+        self.assertFalse(limiter.is_allowed("client")[0])
+        self.clock.advance(10)
+        self.assertEqual(limiter.is_allowed("client"), (True, 4))
+
+    def test_retry_after(self):
+        for limiter_cls in (RateLimiter, SlidingWindowRateLimiter, GCRARateLimiter):
+            self.clock.now = 1_000_000.0
+            limiter = limiter_cls(max_requests=5, window_seconds=10)
+            self.assertEqual(limiter.retry_after("client"), 0.0)
+            while limiter.is_allowed("client")[0]:
+                pass
+            delay = limiter.retry_after("client")
+            self.assertGreater(delay, 0.0, limiter_cls.__name__)
+            self.clock.advance(delay - 0.01)
+            self.assertFalse(limiter.is_allowed("client")[0], limiter_cls.__name__)
+            self.clock.advance(0.02)
+            self.assertTrue(limiter.is_allowed("client")[0], limiter_cls.__name__)
+
+    def test_create_limiter(self):
+        self.assertIsInstance(create_limiter("gcra", 5, 10), GCRARateLimiter)
+        self.assertIsInstance(create_limiter(), RateLimiter)
+        with self.assertRaises(ValueError):
+            create_limiter("leaky")
+
+
+class TestMultiTierRateLimiter(ClockTestCase):
+    def test_most_restrictive_tier_wins(self):
+        limiter = MultiTierRateLimiter([(100, 60), (3, 1)])
+        self.clock.now = 1_000_000.0
+        self.assertEqual(limiter.check("client"), (True, 2, 0.0))
+        self.assertEqual(limiter.is_allowed("client"), (True, 1))
+        self.assertEqual(limiter.is_allowed("client"), (True, 0))
+
+        decision = limiter.check("client")
+        self.assertFalse(decision.allowed)
+        self.assertGreater(decision.retry_after, 0)
+        self.assertAlmostEqual(limiter.retry_after("client"), decision.retry_after)
+
+        self.clock.advance(2)
+        self.assertEqual(limiter.check("client"), (True, 2, 0.0))
+
+    def test_denied_request_is_not_counted_in_any_tier(self):
+        limiter = MultiTierRateLimiter([(2, 1), (5, 60)])
+        for _ in range(4):
+            limiter.is_allowed("client")
+            self.clock.advance(0.1)
+        # Only two of the four attempts counted against the minute tier.
+        self.clock.advance(2)
+        results = [limiter.is_allowed("client")[0] for _ in range(3)]
+        self.clock.advance(2)
+        results.append(limiter.is_allowed("client")[0])
+        self.assertEqual(results, [True, True, False, True])
+        self.clock.advance(2)
+        self.assertFalse(limiter.is_allowed("client")[0])
+
+    def test_decorator_tiers(self):
+        @rate_limit(tiers=[(1, 1), (10, 60)])
+        def endpoint():
+            return "ok"
+
+        self.assertEqual(endpoint(), "ok")
+        with self.assertRaises(RateLimitExceeded):
+            endpoint()
+
+    def test_requires_tiers(self):
+        with self.assertRaises(ValueError):
+            MultiTierRateLimiter([])
+
+
+class TestRateLimitStore(ClockTestCase):
+    def test_lookup_does_not_insert(self):
+        store = RateLimitStore(max_identifiers=10, shards=2)
+        self.assertIsNone(store.get("ghost", self.clock.now))
+        self.assertNotIn("ghost", store)
+        self.assertEqual(len(store), 0)
+
+    def test_caps_tracked_identifiers(self):
+        for limiter_cls in (RateLimiter, SlidingWindowRateLimiter, GCRARateLimiter):
+            limiter = limiter_cls(5, 60, max_identifiers=64, shards=4)
+            for i in range(1000):
+                limiter.is_allowed(f"ip-{i}")
+            store = vars(limiter)[{RateLimiter: "requests",
+                                   SlidingWindowRateLimiter: "counters",
+                                   GCRARateLimiter: "arrivals"}[limiter_cls]]
+            stats = store.stats()
+            self.assertLessEqual(stats["size"], 64)
+            self.assertEqual(stats["size"] + stats["evictions"], 1000)
+
+    def test_expired_windows_are_swept(self):
+        limiter = RateLimiter(5, 10, max_identifiers=1000, shards=1)
+        for i in range(100):
+            limiter.is_allowed(f"ip-{i}")
+        self.clock.advance(11)
+        limiter.is_allowed("fresh")
+        limiter.is_allowed("fresh-2")
+        self.assertLess(len(limiter.requests), 100)
+        self.assertGreater(limiter.requests.stats()["expirations"], 0)
+
+    def test_lru_keeps_active_identifier(self):
+        store = RateLimitStore(max_identifiers=2, shards=1)
+        now = self.clock.now
+        store.add("a", [now + 60], now)
+        store.add("b", [now + 60], now)
+        store.get("a", now)
+        store.add("c", [now + 60], now)
+        self.assertIn("a", store)
+        self.assertNotIn("b", store)
+        self.assertEqual(store.evictions, 1)
+
+
+class TestThreadSafety(unittest.TestCase):
+    def test_concurrent_checks_do_not_over_admit(self):
+        for limiter_cls in (RateLimiter, SlidingWindowRateLimiter, GCRARateLimiter):
+            limiter = limiter_cls(max_requests=500, window_seconds=3600, shards=4)
+            admitted = []
+            barrier = threading.Barrier(8)
+
+            def worker():
+                barrier.wait()
+                count = 0
+                for i in range(400):
+                    if limiter.is_allowed(f"client-{i % 3}")[0]:
+                        count += 1
+                admitted.append(count)
+
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(sum(admitted), 1500, limiter_cls.__name__)
+
+
+def _hammer(limiter, results, checks):
+    """Worker body for the pre-fork test (module level so it survives fork)."""
+    results.put(sum(limiter.is_allowed("shared-client")[0] for _ in range(checks)))
+
+
+class TestSharedMemoryRateLimiter(ClockTestCase):
+    def setUp(self):
+        super().setUp()
+        self.limiter = SharedMemoryRateLimiter(5, 10, slots=64, stripes=8)
+        self.addCleanup(self.limiter.close)
+
+    def test_quota(self):
+        results = [self.limiter.is_allowed("client") for _ in range(6)]
+        self.assertEqual(results[:5], [(True, 4), (True, 3), (True, 2), (True, 1), (True, 0)])
+        self.assertEqual(results[5], (False, 0))
+        self.assertEqual(self.limiter.is_allowed("other"), (True, 4))
+        self.assertAlmostEqual(self.limiter.retry_after("client"), 2, delta=0.01)
+        self.clock.advance(2)
+        self.assertEqual(self.limiter.is_allowed("client"), (True, 0))
+
+    def test_full_slot_group_never_loosens_limits(self):
+        limiter = SharedMemoryRateLimiter(1, 60, slots=8, stripes=8)
+        self.addCleanup(limiter.close)
+        admitted = sum(limiter.is_allowed(f"client-{i}")[0] for i in range(200))
+        # Identifiers beyond the slot count share buckets instead of getting fresh ones.
+        self.assertLessEqual(admitted, 8)
+        self.assertFalse(any(limiter.is_allowed(f"client-{i}")[0] for i in range(200)))
+
+    def test_invalid_geometry(self):
+        with self.assertRaises(ValueError):
+            SharedMemoryRateLimiter(slots=10, stripes=4)
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requires fork")
+class TestSharedMemoryAcrossProcesses(unittest.TestCase):
+    def test_forked_workers_share_one_quota(self):
+        ctx = multiprocessing.get_context("fork")
+        limiter = SharedMemoryRateLimiter(50, 3600, slots=64, stripes=8)
+        self.addCleanup(limiter.close)
+        results = ctx.Queue()
+        workers = [ctx.Process(target=_hammer, args=(limiter, results, 40)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(10)
+        self.assertEqual(sum(results.get(timeout=5) for _ in workers), 50)
+
+
+class TestRateLimitDecorator(ClockTestCase):
+    def test_decorator_with_algorithm(self):
+        @rate_limit(max_requests=2, window_seconds=60, algorithm="gcra")
+        def endpoint():
+            return "ok"
+
+        self.assertEqual(endpoint(), "ok")
+        self.assertEqual(endpoint(), "ok")
+        with self.assertRaises(Exception):
+            endpoint()
+
+    def test_decorator_identifier_func(self):
+        @rate_limit(max_requests=1, window_seconds=60, identifier_func=lambda user: user)
+        def endpoint(user):
+            return user
+
+        self.assertEqual(endpoint("a"), "a")
+        self.assertEqual(endpoint("b"), "b")
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            endpoint("a")
+        self.assertGreater(ctx.exception.retry_after, 0)
+
+    def test_sync_wait_mode_sleeps_until_allowed(self):
+        @rate_limit(max_requests=1, window_seconds=10, algorithm="gcra", wait=True)
+        def endpoint():
+            return "ok"
+
+        with patch.object(rl.time, "sleep", self.clock.advance):
+            self.assertEqual(endpoint(), "ok")
+            start = self.clock.now
+            self.assertEqual(endpoint(), "ok")
+            self.assertAlmostEqual(self.clock.now - start, 10, delta=0.01)
+
+    def test_wait_mode_respects_max_wait(self):
+        @rate_limit(max_requests=1, window_seconds=10, wait=True, max_wait=1)
+        def endpoint():
+            return "ok"
+
+        endpoint()
+        with patch.object(rl.time, "sleep", self.clock.advance):
+            with self.assertRaises(RateLimitExceeded):
+                endpoint()
+
+
+class TestAsyncRateLimit(unittest.TestCase):
+    def test_wraps_coroutines(self):
+        @rate_limit(max_requests=1, window_seconds=60)
+        async def handler(value):
+            return value
+
+        self.assertTrue(asyncio.iscoroutinefunction(handler))
+        self.assertEqual(asyncio.run(handler(1)), 1)
+        with self.assertRaises(RateLimitExceeded):
+            asyncio.run(handler(2))
+
+    def test_async_wait_mode_smooths_bursts(self):
+        @rate_limit(max_requests=2, window_seconds=0.2, algorithm="gcra", wait=True)
+        async def job(i):
+            return i
+
+        async def burst():
+            return await asyncio.gather(*(job(i) for i in range(4)))
+
+        start = time.perf_counter()
+        self.assertEqual(asyncio.run(burst()), [0, 1, 2, 3])
+        # Two requests fit in the burst, the other two are spaced 0.1s apart.
+        self.assertGreaterEqual(time.perf_counter() - start, 0.18)
+
+    def test_network_limiter_runs_off_the_event_loop(self):
+        loop_threads = []
+
+        class RemoteLimiter:
+            def is_allowed(self, identifier):
+                loop_threads.append(threading.get_ident())
+                return True, 0
+
+        @rate_limit(limiter=RemoteLimiter())
+        async def handler():
+            return threading.get_ident()
+
+        self.assertNotEqual(asyncio.run(handler()), loop_threads[0])
+
+    def test_awaits_async_limiter(self):
+        class AsyncLimiter:
+            async def is_allowed(self, identifier):
+                return identifier != "blocked", 0
+
+            async def retry_after(self, identifier):
+                return 2.5
+
+        @rate_limit(limiter=AsyncLimiter(), identifier_func=lambda name: name)
+        async def handler(name):
+            return name
+
+        self.assertEqual(asyncio.run(handler("ok")), "ok")
+        with self.assertRaises(RateLimitExceeded) as caught:
+            asyncio.run(handler("blocked"))
+        self.assertEqual(caught.exception.retry_after, 2.5)
+
+
+class LocalRedisStandIn:
+    """In-process stand-in for the Redis calls RedisRateLimiter makes.
+
+    `register_script` returns a callable that mirrors the Lua sliding-log
+    script against a plain dict of sorted sets.
+    """
+
+    def __init__(self):
+        self.zsets = {}
+        self.down = False
+        self.calls = 0
+
+    def register_script(self, source):
+        self.script_source = source
+
+        def run(keys, args):
+            self.calls += 1
+            if self.down:
+                raise rl.redis.ConnectionError("connection refused")
+            now_ms, window_ms, limit, member = int(args[0]), int(args[1]), int(args[2]), args[3]
+            zset = self.zsets.setdefault(keys[0], {})
+            for stale in [m for m, score in zset.items() if score <= now_ms - window_ms]:
+                del zset[stale]
+            if len(zset) >= limit:
+                return [0, 0]
+            zset[member] = now_ms
+            return [1, limit - len(zset)]
+
+        return run
+
+    def zcount(self, key, low, high):
+        low = float(low.lstrip("(")) if isinstance(low, str) else low
+        return sum(1 for score in self.zsets.get(key, {}).values() if score > low)
+
+    def zrange(self, key, start, end, withscores=False):
+        ordered = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+        end = None if end == -1 else end + 1
+        return [(m.encode(), float(score)) for m, score in ordered[start:end]]
+
+
+class TestRedisRateLimiter(ClockTestCase):
+    def test_quota_shared_across_limiters(self):
+        server = LocalRedisStandIn()
+        worker_a = RedisRateLimiter(3, 60, client=server, module="api")
+        worker_b = RedisRateLimiter(3, 60, client=server, module="api")
+
+        self.assertEqual(worker_a.is_allowed("client"), (True, 2))
+        self.assertEqual(worker_b.is_allowed("client"), (True, 1))
+        self.assertEqual(worker_a.is_allowed("client"), (True, 0))
+        self.assertEqual(worker_b.is_allowed("client"), (False, 0))
+        self.assertIn("rate:api:client", server.zsets)
+
+        self.assertAlmostEqual(worker_b.retry_after("client"), 60, delta=0.01)
+
+        self.clock.advance(61)
+        self.assertEqual(worker_b.is_allowed("client"), (True, 2))
+
+    def test_falls_back_to_local_limiter(self):
+        server = LocalRedisStandIn()
+        server.down = True
+        limiter = RedisRateLimiter(2, 60, client=server, retry_interval=5)
+
+        self.assertEqual(limiter.is_allowed("client"), (True, 1))
+        self.assertEqual(limiter.is_allowed("client"), (True, 0))
+        self.assertEqual(limiter.is_allowed("client"), (False, 0))
+        # Redis is not retried until the retry interval has passed.
+        self.assertEqual(server.calls, 1)
+
+        server.down = False
+        self.clock.advance(5)
+        self.assertEqual(limiter.is_allowed("client"), (True, 1))
+        self.assertEqual(server.calls, 2)
+
+    def test_decorator_accepts_limiter(self):
+        limiter = RedisRateLimiter(1, 60, client=LocalRedisStandIn())
+
+        @rate_limit(limiter=limiter)
+        def endpoint():
+            return "ok"
+
+        self.assertEqual(endpoint(), "ok")
+        with self.assertRaises(Exception):
+            endpoint()
+
+
+if __name__ == "__main__":
+    unittest.main()